@@ -1,81 +1,49 @@
-import uvicorn
+import argparse
+import os
 
-from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
-from a2a.types import (
-    AgentCapabilities,
-    AgentCard,
-    AgentSkill,
-)
-from agent_executor import (
-    HelloWorldAgentExecutor,  # type: ignore[import-untyped]
-)
+import uvicorn
 
 
-if __name__ == '__main__':
-    # --8<-- [start:AgentSkill]
-    skill = AgentSkill(
-        id='hello_world',
-        name='Returns hello world',
-        description='just returns hello world',
-        tags=['hello world'],
-        examples=['hi', 'hello world'],
-    )
-    # --8<-- [end:AgentSkill]
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='A2A agent server for the Salesforce MCP agent')
+    parser.add_argument('--host', default=os.getenv('A2A_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('A2A_PORT', '9999')))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('A2A_WORKERS', '1')),
+                        help='Worker processes (0 = one per CPU core)')
+    parser.add_argument('--keep-alive', type=int, default=int(os.getenv('A2A_KEEP_ALIVE', '5')),
+                        help='Seconds an idle client connection is kept open')
+    parser.add_argument('--backlog', type=int, default=int(os.getenv('A2A_BACKLOG', '2048')),
+                        help='Maximum number of pending connections')
+    parser.add_argument('--graceful-timeout', type=int, default=int(os.getenv('A2A_GRACEFUL_TIMEOUT', '30')),
+                        help='Seconds to wait for in-flight requests on shutdown')
+    args = parser.parse_args(argv)
+    args.workers = args.workers or os.cpu_count() or 1
+    if args.workers > 1 and os.getenv('MCP_RECORD'):
+        # Every worker would truncate and overwrite the same cassette
+        parser.error('MCP_RECORD records a single process: run with --workers 1')
+    return args
 
-    extended_skill = AgentSkill(
-        id='super_hello_world',
-        name='Returns a SUPER Hello World',
-        description='A more enthusiastic greeting, only for authenticated users.',
-        tags=['hello world', 'super', 'extended'],
-        examples=['super hi', 'give me a super hello'],
-    )
 
-    # --8<-- [start:AgentCard]
-    # This will be the public-facing agent card
-    public_agent_card = AgentCard(
-        name='Hello World Agent',
-        description='Just a hello world agent',
-        url='http://localhost:9999/',
-        version='1.0.0',
-        default_input_modes=['text'],
-        default_output_modes=['text'],
-        capabilities=AgentCapabilities(streaming=True),
-        skills=[skill],  # Only the basic skill for the public card
-        supports_authenticated_extended_card=True,
-    )
-    # --8<-- [end:AgentCard]
+if __name__ == '__main__':
+    args = parse_args()
+    workers = args.workers
 
-    # This will be the authenticated extended agent card
-    # It includes the additional 'extended_skill'
-    specific_extended_agent_card = public_agent_card.model_copy(
-        update={
-            'name': 'Hello World Agent - Extended Edition',  # Different name for clarity
-            'description': 'The full-featured hello world agent for authenticated users.',
-            'version': '1.0.1',  # Could even be a different version
-            # Capabilities and other fields like url, default_input_modes, default_output_modes,
-            # supports_authenticated_extended_card are inherited from public_agent_card unless specified here.
-            'skills': [
-                skill,
-                extended_skill,
-            ],  # Both skills for the extended card
-        }
-    )
+    # Worker processes build the app through the factory and read these
+    os.environ['A2A_PORT'] = str(args.port)
+    os.environ['A2A_WORKERS'] = str(workers)
 
-    request_handler = DefaultRequestHandler(
-        agent_executor=HelloWorldAgentExecutor(),
-        task_store=InMemoryTaskStore(),
+    uvicorn.run(
+        'app:create_app',
+        factory=True,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        timeout_graceful_shutdown=args.graceful_timeout,
     )
 
-    server = A2AStarletteApplication(
-        agent_card=public_agent_card,
-        http_handler=request_handler,
-        extended_agent_card=specific_extended_agent_card,
-    )
-
-    uvicorn.run(server.build(), host='0.0.0.0', port=9999)
-
 '''
 
 Agent Card                --> http://localhost:9999/.well-known/agent-card.json
@@ -10,6 +10,12 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("A2A Agent")
 
 
+def part_payload(part):
+    """Return the data of a DataPart or the text of a TextPart."""
+    root = part.root
+    return root.data if getattr(root, "kind", None) == "data" else getattr(root, "text", None)
+
+
 async def main():
     #base_url = "http://localhost:9999"  # Endpoint of your A2A agent
     base_url = "<Salesforce A2A Server or your custom A2A Server>"  # Endpoint of your A2A agent
@@ -54,8 +60,13 @@ async def main():
                     print("[Agent Client] Parsed JSON catalog:", json.dumps(parsed, indent=2))
                 except json.JSONDecodeError as e:
                     print("[Agent Client] JSON parsing failed:", e)
+            elif root and getattr(root, "result", None) and getattr(root.result, "artifacts", None):
+                # Task result: resource contents are collected in the task artifacts
+                for artifact in root.result.artifacts:
+                    contents = [part_payload(part) for part in artifact.parts]
+                    print(f"[Agent Client] Artifact '{artifact.name}':", json.dumps(contents, indent=2))
             else:
-                print("[Agent Client] No message parts found in response.root.result. Maybe the response object is a Task")
+                print("[Agent Client] No message parts or artifacts found in response.root.result.")
         except Exception as ex:
             logger.exception("❌ Exception during non-streaming send: %s", ex)
 
@@ -80,6 +91,12 @@ async def main():
                             print("[Agent Client][stream] Parsed JSON catalog:", json.dumps(parsed, indent=2))
                         except json.JSONDecodeError as e:
                             print("[Agent Client][stream] JSON parsing failed:", e)
+                    elif root and getattr(root, "result", None) and getattr(root.result, "artifact", None):
+                        # Artifact chunk streamed while the MCP resource is being read
+                        for part in root.result.artifact.parts:
+                            print("[Agent Client][stream] Artifact chunk:", json.dumps(part_payload(part)))
+                        if root.result.last_chunk:
+                            print("[Agent Client][stream] Artifact complete.")
                     else:
                         print("[Agent Client][stream] No parts found in event.root.result")
             except Exception as ex:
@@ -1,57 +1,125 @@
 import asyncio
 import json
-from openai import OpenAI
-import httpx
+import logging
+import sys
+import time
+from uuid import uuid4
+from openai import AsyncOpenAI
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
-from a2a.utils import new_agent_text_message
+from a2a.server.tasks import TaskUpdater
+from a2a.types import DataPart, Part, TextPart
+from a2a.utils import new_agent_text_message, new_task
 import os
 
-client = OpenAI()
+# Make the shared `mcp_common` package (repository root) importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from mcp_common import (  # noqa: E402
+    CODEC,
+    CapabilityCache,
+    CapabilityRegistry,
+    DecisionCache,
+    MCPError,
+    MCPTransport,
+    METRICS,
+    Payload,
+    PlanExecutor,
+    RECORDER,
+    ResourceCache,
+    capability_fingerprint,
+    create_transport,
+    normalize_plan,
+)
+
+logger = logging.getLogger("LLMBackedAgent")
+executor_logger = logging.getLogger("Agent Executor")
+
+# Histogram of LLMBackedAgent.invoke stages (recorded when MCP_METRICS is on)
+STAGE_METRIC = "agent_stage_duration_seconds"
 
 
 class LLMBackedAgent:
     """
-    MCP-style LLM agent:
-    - Discovers resources via JSON-RPC POST
-    - Uses LLM to orchestrate which resource to call
-    - Executes resource via JSON-RPC and streams output to EventQueue
+    MCP-style LLM agent: discovers the server's resources, asks the LLM which
+    resource (or plan of resources) answers the user message, reads it and
+    streams the contents to the EventQueue. The caches, limits and transports
+    it relies on are described under "Performance Tuning" in the README.
     """
 
-    def __init__(self, mcp_base_url="http://localhost:8888"):
+    def __init__(
+        self,
+        mcp_base_url="http://localhost:8888",
+        transport: MCPTransport = None,
+        capability_cache: CapabilityCache = None,
+        llm_client: AsyncOpenAI = None,
+        decision_cache: DecisionCache = None,
+        resource_cache: ResourceCache = None,
+    ):
         self.mcp_base_url = mcp_base_url
-        self.resources = {}  # {name: uri}
+        self.transport = transport or create_transport(mcp_base_url, on_message=self.handle_notification)
+        self.capability_cache = capability_cache or CapabilityCache(
+            snapshot_path=os.getenv("MCP_CAPABILITY_SNAPSHOT")
+        )
+        self.registry = CapabilityRegistry()
+        # OPENAI_BASE_URL points the client at another (e.g. local fake) endpoint
+        self.llm_timeout = float(os.getenv("LLM_TIMEOUT", "30"))
+        self.llm_client = llm_client or AsyncOpenAI(
+            timeout=self.llm_timeout,
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+        )
+        # Caps concurrent completions so a burst of A2A messages cannot flood the LLM API
+        self.llm_semaphore = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+        self.decision_cache = decision_cache or DecisionCache()
+        # Values are stored in the JSON-RPC response shape: {"result": {"contents": [...]}}
+        self.resource_cache = resource_cache or ResourceCache()
+        self.plan_executor = PlanExecutor()
+
+    @property
+    def resources(self) -> dict:
+        """Discovered resources by name."""
+        return self.registry.resources
+
+    async def _fetch_resources(self) -> list:
+        data = await self.transport.call("resources/list")
+        if "error" in data:
+            # Apex answers failures with HTTP 200 and an error object: never cache them
+            error = data["error"] or {}
+            raise MCPError(error.get("code", 0), error.get("message", "resources/list failed"), error.get("data"))
+        return data.get("result", {}).get("resources", [])
 
     async def discover_resources(self):
-        """Fetch available resources from MCP server using JSON-RPC POST."""
-        async with httpx.AsyncClient() as client:
-            try:
-                payload = {
-                    "jsonrpc": "2.0",
-                    "id": 1,
-                    "method": "resources/list",
-                    "params": {}
-                }
-                resp = await client.post(self.mcp_base_url, json=payload)
-                resp.raise_for_status()
-                data = resp.json()
-                self.resources = {
-                    r["name"]: r.get("uri") for r in data.get("result", {}).get("resources", [])
-                }
-                print(f"[LLMBackedAgent] Discovered resources: {list(self.resources.keys())}")
-            except Exception as e:
-                print(f"[LLMBackedAgent] Failed to discover resources: {e}")
-                self.resources = {}
+        """Fetch available resources from MCP server using JSON-RPC POST (cached with TTL)."""
+        try:
+            resources = await self.capability_cache.get_or_fetch("resources", self._fetch_resources)
+            self.registry.update("resources", resources)
+            logger.debug("Discovered resources: %s", list(self.resources))
+        except Exception as e:
+            logger.error("Failed to discover resources: %s", e)
+            self.registry.update("resources", [])
 
     async def orchestrate_llm(self, user_message: str) -> dict:
-        """Ask LLM which resource to call, returning JSON instructions."""
+        """
+        Ask LLM which resource to call, returning JSON instructions: one call, or a
+        plan `{"steps": [...]}` when the request needs several resources.
+        Never blocks the event loop; waits for a free slot when LLM_MAX_CONCURRENCY
+        completions are already running and gives up after LLM_TIMEOUT seconds.
+        Decisions for an already seen request (same resources) come from the decision cache.
+        """
+        fingerprint = capability_fingerprint(*self.resources)
+        cached = self.decision_cache.get(user_message, fingerprint)
+        if cached is not None:
+            logger.debug("Orchestration decision served from cache: %s", cached)
+            return cached
+
         system_prompt = (
             "You are an orchestrator. Given the user request and the available MCP resources, "
-            "always respond in JSON with fields: type ('resource'), name, and arguments (optional).\n"
-            f"Available resources: {list(self.resources.keys())}"
+            "always respond in JSON with fields: type ('resource'), name, and arguments (optional). "
+            "If the request needs several resources, respond with {\"steps\": [...]} instead, one such "
+            "object per resource; a step may add an id and depends_on (ids of steps that must run first).\n"
+            f"Available resources: {self.registry.candidates(user_message, kinds=('resources',))['resources']}"
         )
         try:
-            response = client.chat.completions.create(
+            completion = dict(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -59,72 +127,230 @@ class LLMBackedAgent:
                 ],
                 temperature=0,
             )
+            async with self.llm_semaphore:
+                started = time.perf_counter()
+                response = await asyncio.wait_for(
+                    self.llm_client.chat.completions.create(**completion),
+                    timeout=self.llm_timeout,
+                )
+            if RECORDER.enabled:
+                RECORDER.record("llm", completion, response.model_dump(mode="json"), time.perf_counter() - started)
             raw = response.choices[0].message.content.strip()
             if not raw:
                 raise ValueError("Empty LLM output")
             instructions = json.loads(raw)
-        except Exception:
-            # Fallback to first discovered resource
+            steps = normalize_plan(instructions)
+            if all(step["name"] in self.resources for step in steps):
+                self.decision_cache.put(user_message, fingerprint, instructions)
+        except Exception as e:
+            logger.warning("LLM orchestration failed, using fallback: %s", e)
+            # Fallback to the resource closest to the request
+            resource = self._closest_resource(user_message)
             instructions = {
                 "type": "resource",
-                "name": list(self.resources.keys())[0] if self.resources else "hello_world"
+                "name": resource["name"] if resource else "hello_world"
             }
         return instructions
 
-    async def execute_capability(self, instructions: dict, event_queue: EventQueue):
-        """Execute resource using JSON-RPC POST and stream output to EventQueue."""
+    async def stream_resource(self, name: str, uri: str, updater: TaskUpdater):
+        """
+        Read a resource and stream each `contents` entry to the task as a chunk
+        of one artifact while the HTTP body is still arriving (or from the
+        resource cache when the URI was read recently).
+        """
+        artifact_id = str(uuid4())
+        chunks = 0
+        pending = None  # held back one entry so the final chunk can be flagged
+        contents = self.resource_cache.stream_or_fetch(
+            uri,
+            lambda: self.transport.stream_items("resources/read", {"uri": uri}),
+            wrap=lambda items: {"result": {"contents": items}},
+            unwrap=lambda value: value["result"].get("contents", []),
+        )
+        async for content in contents:
+            if pending is not None:
+                await self._enqueue(updater.add_artifact(
+                    [Part(root=DataPart(data=pending))],
+                    artifact_id=artifact_id,
+                    name=name,
+                    append=chunks > 0,
+                    last_chunk=False,
+                ))
+                chunks += 1
+            pending = content
+        if pending is not None:
+            await self._enqueue(updater.add_artifact(
+                [Part(root=DataPart(data=pending))],
+                artifact_id=artifact_id,
+                name=name,
+                append=chunks > 0,
+                last_chunk=True,
+            ))
+            chunks += 1
+        logger.debug("Streamed %d content chunks for '%s'", chunks, uri)
+
+    async def execute_capability(self, instructions: dict, event_queue: EventQueue, updater: TaskUpdater = None):
+        """
+        Execute resource using JSON-RPC POST and stream output to EventQueue.
+        With a TaskUpdater the contents are streamed as artifact chunks;
+        otherwise the whole result is sent as one text message.
+        """
         name = instructions.get("name")
-        uri = self.resources.get(name)
+        uri = self._resource_uri(name)
+        try:
+            if updater is not None:
+                await self.stream_resource(name, uri, updater)
+                return
+            result = await self._read_resource(uri)
+            # Stream the result to EventQueue
+            await self._enqueue(event_queue.enqueue_event(new_agent_text_message(CODEC.dumps(result))))
+            logger.debug("Streamed result: %s", Payload(result))
+        except Exception as e:
+            logger.error("Failed to execute resource '%s': %s", name, e)
+            if updater is not None:
+                raise
+
+    async def _enqueue(self, write):
+        """Await an EventQueue write, timed as the `enqueue_event` stage."""
+        with METRICS.span(STAGE_METRIC, stage="enqueue_event"):
+            await write
+
+    def _closest_resource(self, text: str):
+        """The resource whose name/description best matches `text`, else the first one."""
+        names = self.registry.search("resources", text, limit=1)
+        if names:
+            return self.resources[names[0]]
+        return next(iter(self.resources.values()), None)
+
+    def _resource_uri(self, name: str) -> str:
+        resource = self.resources.get(name)
+        if resource is None and self.registry.resource_for_uri(name) is not None:
+            # The LLM picked a concrete URI (e.g. one record of a URI template)
+            return name
+        uri = resource.get("uri") if resource else None
         if not uri:
-            # fallback to first resource URI
-            uri = list(self.resources.values())[0] if self.resources else "hello_world"
-            print(f"[LLMBackedAgent] Resource '{name}' not found, using default URI '{uri}'.")
-
-        async with httpx.AsyncClient() as client:
-            try:
-                payload = {
-                    "jsonrpc": "2.0",
-                    "id": 2,
-                    "method": "resources/read",
-                    "params": {"uri": uri}
-                }
-                resp = await client.post(self.mcp_base_url, json=payload)
-                resp.raise_for_status()
-                result = resp.json()
-                # Stream the result to EventQueue
-                await event_queue.enqueue_event(new_agent_text_message(json.dumps(result)))
-                print(f"[LLMBackedAgent] Streamed result: {result}")
-            except Exception as e:
-                print(f"[LLMBackedAgent] Failed to execute resource '{name}': {e}")
-
-    async def invoke(self, user_message: str, event_queue: EventQueue):
-        """Main entry point: discover resources, orchestrate LLM, execute capability."""
-        await self.discover_resources()
+            # The cached resource list may be stale: rediscover on the next message
+            self.capability_cache.invalidate("resources")
+            closest = self._closest_resource(name)
+            uri = closest.get("uri") if closest else "hello_world"
+            logger.warning("Resource '%s' not found, using closest URI '%s'.", name, uri)
+        return uri
+
+    async def _read_resource(self, uri: str) -> dict:
+        async def fetch():
+            data = await self.transport.call("resources/read", {"uri": uri})
+            if "error" in data:
+                return data
+            # Cached in the shape stream_resource stores, without this reply's id
+            return {"result": data.get("result") or {}}
+
+        return await self.resource_cache.get_or_fetch(uri, fetch, cacheable=lambda r: "error" not in r)
+
+    async def execute_plan(self, steps: list, event_queue: EventQueue, updater: TaskUpdater = None):
+        """
+        Execute a multi-resource plan (see `normalize_plan`); independent steps run
+        concurrently, so the latency is that of the longest dependency chain.
+        With a TaskUpdater every step streams its own artifact and a final `plan`
+        artifact lists the step outcomes; otherwise the merged results are sent
+        as one text message.
+        """
+        async def run_step(step: dict):
+            uri = self._resource_uri(step["name"])
+            if updater is not None:
+                await self.stream_resource(step["name"], uri, updater)
+                return None
+            return await self._read_resource(uri)
+
+        outcomes = await self.plan_executor.execute(steps, run_step)
+        if updater is None:
+            await self._enqueue(event_queue.enqueue_event(new_agent_text_message(CODEC.dumps({"steps": outcomes}))))
+            return
+        if not any(outcome["status"] == "ok" for outcome in outcomes):
+            raise RuntimeError("; ".join(f"{o['name']}: {o['error']}" for o in outcomes))
+        summary = [{k: v for k, v in outcome.items() if k != "result"} for outcome in outcomes]
+        await self._enqueue(updater.add_artifact([Part(root=DataPart(data={"steps": summary}))], name="plan"))
+
+    async def invoke(self, user_message: str, event_queue: EventQueue, updater: TaskUpdater = None):
+        """Main entry point: discover resources, orchestrate LLM, execute the capability or plan."""
+        started = time.perf_counter()
+        with METRICS.span(STAGE_METRIC, stage="discover_resources"):
+            await self.discover_resources()
         if not self.resources:
-            print("[LLMBackedAgent] No resources discovered. Exiting invoke.")
+            logger.warning("No resources discovered. Exiting invoke.")
             return
-        instructions = await self.orchestrate_llm(user_message)
-        await self.execute_capability(instructions, event_queue)
+        with METRICS.span(STAGE_METRIC, stage="orchestrate_llm"):
+            steps = normalize_plan(await self.orchestrate_llm(user_message))
+        if len(steps) == 1:
+            with METRICS.span(STAGE_METRIC, stage="execute_capability"):
+                await self.execute_capability(steps[0], event_queue, updater)
+        else:
+            with METRICS.span(STAGE_METRIC, stage="execute_plan"):
+                await self.execute_plan(steps, event_queue, updater)
+        if RECORDER.enabled:
+            RECORDER.record("prompt", {"client": "agent", "text": user_message}, None, time.perf_counter() - started)
+
+    def invalidate_capabilities(self, kind: str = None):
+        """
+        Drop cached discovery results (all kinds when `kind` is None).
+        Invalidating resources also purges the cached resource contents.
+        """
+        self.capability_cache.invalidate(kind)
+        if kind in (None, "resources"):
+            self.resource_cache.purge()
+
+    def handle_notification(self, message: dict) -> bool:
+        """Apply a server notification (`notifications/*/list_changed`, ...) to the local caches."""
+        handled = self.capability_cache.handle_notification(message)
+        return self.resource_cache.handle_notification(message) or handled
+
+    async def aclose(self):
+        """Release the pooled MCP and LLM connections."""
+        await self.transport.aclose()
+        await self.llm_client.close()
 
 
 class HelloWorldAgentExecutor(AgentExecutor):
     """
     AgentExecutor using MCP-style LLMBackedAgent:
     - LLM decides which resource to call
-    - Streams responses to EventQueue
+    - Streams resource contents to EventQueue as artifact chunks of a task
     """
 
     def __init__(self):
         self.llm_agent = LLMBackedAgent(mcp_base_url=os.getenv("MCP_SERVER_URL"))
+        self._running = {}  # {task_id: asyncio.Task running execute()}
 
     async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
         user_message = context.get_user_input()
-        print(f"[Agent Executor] Received user message: {user_message}")
+        executor_logger.info("Received user message: %s", user_message)
+
+        task = context.current_task
+        if task is None:
+            task = new_task(context.message)
+            await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue, task.id, task.context_id)
+        await updater.start_work()
 
-        # Invoke the LLM-backed agent
-        await self.llm_agent.invoke(user_message, event_queue)
+        # Invoke the LLM-backed agent; cancel() can interrupt it mid-flight
+        self._running[task.id] = asyncio.current_task()
+        try:
+            await self.llm_agent.invoke(user_message, event_queue, updater)
+        except Exception as e:
+            await updater.failed(updater.new_agent_message([Part(root=TextPart(text=str(e)))]))
+            return
+        finally:
+            self._running.pop(task.id, None)
+        await updater.complete()
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
-        # Optional: implement cancellation logic if your agent supports streaming cancellation
+        """Abort the running LLM/MCP calls of the task and mark it canceled."""
+        executor_logger.info("Cancel requested.")
+
+        running = self._running.pop(context.task_id, None)
+        if running is not None and not running.done():
+            running.cancel()
+        await TaskUpdater(event_queue, context.task_id, context.context_id).cancel()
 
-        print("[Agent Executor] Cancel requested.")
+    async def aclose(self) -> None:
+        """Close long-lived resources (called on server shutdown)."""
+        await self.llm_agent.aclose()
@@ -0,0 +1,154 @@
+import contextlib
+import logging
+import os
+
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.types import (
+    AgentCapabilities,
+    AgentCard,
+    AgentSkill,
+)
+from a2a.utils.constants import PREV_AGENT_CARD_WELL_KNOWN_PATH
+from agent_executor import (
+    HelloWorldAgentExecutor,  # type: ignore[import-untyped]
+)
+from mcp_common import METRICS, configure_logging
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from task_store import create_task_store
+
+logger = logging.getLogger("A2AServer")
+
+
+def build_agent_cards(url: str = None) -> tuple[AgentCard, AgentCard]:
+    """Return the public agent card and the authenticated extended card."""
+    url = url or os.getenv('A2A_PUBLIC_URL') or f"http://localhost:{os.getenv('A2A_PORT', '9999')}/"
+
+    # --8<-- [start:AgentSkill]
+    skill = AgentSkill(
+        id='hello_world',
+        name='Returns hello world',
+        description='just returns hello world',
+        tags=['hello world'],
+        examples=['hi', 'hello world'],
+    )
+    # --8<-- [end:AgentSkill]
+
+    extended_skill = AgentSkill(
+        id='super_hello_world',
+        name='Returns a SUPER Hello World',
+        description='A more enthusiastic greeting, only for authenticated users.',
+        tags=['hello world', 'super', 'extended'],
+        examples=['super hi', 'give me a super hello'],
+    )
+
+    # --8<-- [start:AgentCard]
+    # This will be the public-facing agent card
+    public_agent_card = AgentCard(
+        name='Hello World Agent',
+        description='Just a hello world agent',
+        url=url,
+        version='1.0.0',
+        default_input_modes=['text'],
+        default_output_modes=['text'],
+        capabilities=AgentCapabilities(streaming=True),
+        skills=[skill],  # Only the basic skill for the public card
+        supports_authenticated_extended_card=True,
+    )
+    # --8<-- [end:AgentCard]
+
+    # This will be the authenticated extended agent card
+    # It includes the additional 'extended_skill'
+    specific_extended_agent_card = public_agent_card.model_copy(
+        update={
+            'name': 'Hello World Agent - Extended Edition',  # Different name for clarity
+            'description': 'The full-featured hello world agent for authenticated users.',
+            'version': '1.0.1',  # Could even be a different version
+            # Capabilities and other fields like url, default_input_modes, default_output_modes,
+            # supports_authenticated_extended_card are inherited from public_agent_card unless specified here.
+            'skills': [
+                skill,
+                extended_skill,
+            ],  # Both skills for the extended card
+        }
+    )
+    return public_agent_card, specific_extended_agent_card
+
+
+def _card_json(card: AgentCard) -> bytes:
+    return card.model_dump_json(exclude_none=True, by_alias=True).encode('utf-8')
+
+
+class PrecomputedCardApplication(A2AStarletteApplication):
+    """
+    A2AStarletteApplication that serializes the agent cards once at startup:
+    - `/.well-known/agent-card.json` returns the same pre-encoded bytes on every hit
+      instead of dumping the pydantic model per request
+    - Card modifiers, when configured, still run per request (SDK behaviour)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._agent_card_json = _card_json(self.agent_card)
+        self._extended_card_json = _card_json(self.extended_agent_card) if self.extended_agent_card else None
+
+    async def _handle_get_agent_card(self, request: Request) -> Response:
+        if self.card_modifier or request.url.path == PREV_AGENT_CARD_WELL_KNOWN_PATH:
+            return await super()._handle_get_agent_card(request)
+        return Response(self._agent_card_json, media_type='application/json')
+
+    async def _handle_get_authenticated_extended_agent_card(self, request: Request) -> Response:
+        if (
+            self.extended_card_modifier
+            or self._extended_card_json is None
+            or not self.agent_card.supports_authenticated_extended_card
+        ):
+            return await super()._handle_get_authenticated_extended_agent_card(request)
+        return Response(self._extended_card_json, media_type='application/json')
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Prometheus scrape endpoint for the stage and MCP request histograms of this worker."""
+    return Response(METRICS.render(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def create_app():
+    """
+    App factory, called once in every worker process (`uvicorn --factory app:create_app`).
+    Each worker gets its own agent executor, and with it its own pooled MCP/LLM
+    connections, plus its own task store handle and pre-encoded agent cards.
+    """
+    configure_logging()
+    public_agent_card, specific_extended_agent_card = build_agent_cards()
+
+    agent_executor = HelloWorldAgentExecutor()
+    # InMemoryTaskStore by default; A2A_TASK_STORE=sqlite:///tasks.db persists tasks
+    task_store = create_task_store()
+    if int(os.getenv('A2A_WORKERS', '1')) > 1 and not hasattr(task_store, 'aclose'):
+        logger.warning('In-memory task store with several workers: tasks are only visible to the worker '
+                       'that created them, set A2A_TASK_STORE=sqlite:///tasks.db to share them')
+
+    request_handler = DefaultRequestHandler(
+        agent_executor=agent_executor,
+        task_store=task_store,
+    )
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        # Close the pooled MCP connections on server shutdown
+        await agent_executor.aclose()
+        # Flush buffered task writes
+        if hasattr(task_store, 'aclose'):
+            await task_store.aclose()
+
+    server = PrecomputedCardApplication(
+        agent_card=public_agent_card,
+        http_handler=request_handler,
+        extended_agent_card=specific_extended_agent_card,
+    )
+    # /metrics is only mounted when MCP_METRICS is on
+    routes = [Route('/metrics', metrics_endpoint, methods=['GET'])] if METRICS.enabled else []
+    return server.build(lifespan=lifespan, routes=routes)
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import InMemoryTaskStore, TaskStore
+from a2a.types import Task, TaskState
+
+logger = logging.getLogger("TaskStore")
+
+TERMINAL_STATES = (
+    TaskState.completed.value,
+    TaskState.canceled.value,
+    TaskState.failed.value,
+    TaskState.rejected.value,
+)
+
+# Written at once even when writes are buffered: other workers must find new tasks
+# (tasks/get, resubscribe) and final states (tasks/cancel) without waiting for a flush
+_WRITE_THROUGH_STATES = (TaskState.submitted.value, *TERMINAL_STATES)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    context_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_context_id ON tasks (context_id);
+CREATE INDEX IF NOT EXISTS tasks_state_updated_at ON tasks (state, updated_at);
+"""
+
+_UPSERT = """
+INSERT INTO tasks (id, context_id, state, updated_at, data) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    context_id = excluded.context_id,
+    state = excluded.state,
+    updated_at = excluded.updated_at,
+    data = excluded.data
+"""
+
+
+class SQLiteTaskStore(TaskStore):
+    """
+    A2A TaskStore persisted in SQLite, shareable by several worker processes:
+    - WAL journal mode, so readers in other workers never block the writer
+    - Writes go straight to the database by default. With `flush_interval` > 0,
+      intermediate states are buffered and flushed as one transaction every
+      `flush_interval` seconds or once `batch_size` tasks are pending; new
+      (submitted) and terminal tasks are still written at once. Buffered writes
+      are only visible to this process and are lost if it crashes
+    - Indexed lookup by task id and by context id (`list_by_context`)
+    - Tasks in a terminal state are deleted `ttl` seconds after their last update
+      by a periodic compaction, so the database stays bounded
+
+    All SQLite calls run on one dedicated thread and never block the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = None,
+        batch_size: int = None,
+        ttl: float = None,
+        compact_interval: float = None,
+    ):
+        self.path = path
+        self.flush_interval = float(os.getenv("A2A_TASK_FLUSH_INTERVAL", "0")) if flush_interval is None else flush_interval
+        self.batch_size = int(os.getenv("A2A_TASK_BATCH_SIZE", "100")) if batch_size is None else batch_size
+        self.ttl = float(os.getenv("A2A_TASK_TTL", "3600")) if ttl is None else ttl
+        self.compact_interval = float(os.getenv("A2A_TASK_COMPACT_INTERVAL", "60")) if compact_interval is None else compact_interval
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-task-store")
+        self._conn = None
+        self._pending = {}  # {task_id: Task} not yet written
+        self._background = None
+        self._closed = False
+
+    # -- SQLite thread ---------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _write_rows(self, rows: list):
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(_UPSERT, rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _select(self, sql: str, params: tuple) -> list:
+        return self._connect().execute(sql, params).fetchall()
+
+    def _delete(self, task_id: str):
+        self._connect().execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def _compact(self, cutoff: float) -> int:
+        placeholders = ", ".join("?" for _ in TERMINAL_STATES)
+        cursor = self._connect().execute(
+            f"DELETE FROM tasks WHERE state IN ({placeholders}) AND updated_at < ?",
+            (*TERMINAL_STATES, cutoff),
+        )
+        return cursor.rowcount
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # -- TaskStore -------------------------------------------------------------
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        self._ensure_background()
+        self._pending[task.id] = task
+        if (
+            self.flush_interval <= 0
+            or len(self._pending) >= self.batch_size
+            or task.status.state.value in _WRITE_THROUGH_STATES
+        ):
+            await self.flush()
+
+    async def get(self, task_id: str, context: ServerCallContext | None = None) -> Task | None:
+        task = self._pending.get(task_id)
+        if task is not None:
+            return task
+        rows = await self._run(self._select, "SELECT data FROM tasks WHERE id = ?", (task_id,))
+        return Task.model_validate_json(rows[0][0]) if rows else None
+
+    async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+        self._pending.pop(task_id, None)
+        await self._run(self._delete, task_id)
+
+    async def list_by_context(self, context_id: str) -> list[Task]:
+        """Return all tasks of a context, oldest update first."""
+        await self.flush()
+        rows = await self._run(
+            self._select,
+            "SELECT data FROM tasks WHERE context_id = ? ORDER BY updated_at",
+            (context_id,),
+        )
+        return [Task.model_validate_json(data) for (data,) in rows]
+
+    async def flush(self) -> None:
+        """Write all buffered tasks in one transaction."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        now = time.time()
+        rows = [
+            (task.id, task.context_id, task.status.state.value, now, task.model_dump_json(exclude_none=True))
+            for task in batch.values()
+        ]
+        try:
+            await self._run(self._write_rows, rows)
+        except Exception:
+            # Keep the batch (unless newer versions arrived meanwhile) for the next flush
+            for task_id, task in batch.items():
+                self._pending.setdefault(task_id, task)
+            raise
+
+    async def compact(self) -> int:
+        """Delete terminal tasks not updated for `ttl` seconds; returns the number removed."""
+        if self.ttl <= 0:
+            return 0
+        removed = await self._run(self._compact, time.time() - self.ttl)
+        if removed:
+            logger.info("Compacted %d finished tasks", removed)
+        return removed
+
+    def _ensure_background(self):
+        if self._background is None and not self._closed:
+            self._background = asyncio.get_running_loop().create_task(self._background_loop())
+
+    async def _background_loop(self):
+        interval = self.flush_interval if self.flush_interval > 0 else self.compact_interval
+        next_compaction = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+                if time.monotonic() >= next_compaction:
+                    next_compaction = time.monotonic() + self.compact_interval
+                    await self.compact()
+            except Exception as e:
+                logger.error("Task store maintenance failed: %s", e)
+
+    async def aclose(self) -> None:
+        """Flush pending writes and close the database."""
+        self._closed = True
+        if self._background is not None:
+            self._background.cancel()
+            self._background = None
+        await self.flush()
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+
+
+def create_task_store(url: str = None) -> TaskStore:
+    """
+    Build the task store selected by `url` or env A2A_TASK_STORE:
+    - `memory` (default): InMemoryTaskStore, lost on restart
+    - `sqlite:///path/to/tasks.db`: SQLiteTaskStore, shared by all workers on the host
+    """
+    url = url or os.getenv("A2A_TASK_STORE", "memory")
+    if url == "memory":
+        return InMemoryTaskStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteTaskStore(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported A2A_TASK_STORE '{url}' (use 'memory' or 'sqlite:///path')")
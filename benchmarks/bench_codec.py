@@ -0,0 +1,90 @@
+"""
+Encode/decode cost of the JSON codec backends (`mcp_common.JSONCodec`) on MCP
+payloads shaped like the Apex server's replies (pretty-printed, as written by
+`JSONGenerator`):
+
+    decode   `tools/list` and a large `resources/read` reply (MCPTransport.call)
+    typed    `decode_response()` (validates the result shape with msgspec at DEBUG only)
+    encode   the `resources/read` result re-encoded for the A2A EventQueue
+    peak     bytes allocated while decoding the large reply once (tracemalloc)
+
+Backends that are not installed are skipped. The run fails (exit status 1) when
+`decode_response()` of an optional backend is not faster than with `json`.
+
+    python benchmarks/bench_codec.py --items 500 --item-size 1000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from mcp_common.codec import MSGSPEC_AVAILABLE, ORJSON_AVAILABLE, JSONCodec  # noqa: E402
+from stub_mcp_server import _reply  # noqa: E402
+
+
+def _per_op(fn, seconds: float) -> float:
+    """Mean seconds per call of `fn`, run for about `seconds`."""
+    calls, start = 0, time.perf_counter()
+    while True:
+        for _ in range(10):
+            fn()
+        calls += 10
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return elapsed / calls
+
+
+def _peak_bytes(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=500, help="Contents in the resources/read reply")
+    parser.add_argument("--item-size", type=int, default=1000, help="Characters of text per content")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Time spent per measurement")
+    args = parser.parse_args()
+
+    tools = json.dumps(_reply({"id": 1, "method": "tools/list"}), indent=2).encode()
+    read_reply = _reply({"id": 2, "method": "resources/read", "params": {"uri": "@server://products"}},
+                        args.items, args.item_size)
+    read = json.dumps(read_reply, indent=2).encode()
+    result = read_reply["result"]
+    print(f"tools/list {len(tools)} bytes, resources/read {len(read) / 1024:.0f} KiB ({args.items} contents)")
+
+    backends = ["json"] + ["orjson"] * ORJSON_AVAILABLE + ["msgspec"] * MSGSPEC_AVAILABLE
+    baseline = {}
+    slower = []
+    print(f"{'backend':<8} {'decode tools':>13} {'decode read':>12} {'typed read':>11} {'encode':>9} {'peak':>9}")
+    for backend in backends:
+        codec = JSONCodec(backend)
+        timings = {
+            "tools": _per_op(lambda: codec.loads(tools), args.seconds),
+            "read": _per_op(lambda: codec.loads(read), args.seconds),
+            "typed": _per_op(lambda: codec.decode_response("resources/read", read), args.seconds),
+            "encode": _per_op(lambda: codec.dumps(result), args.seconds),
+        }
+        baseline = baseline or timings
+        peak = _peak_bytes(lambda: codec.loads(read))
+        cells = [f"{timings[key] * 1e6:7.1f} µs" for key in ("tools", "read", "typed", "encode")]
+        print(f"{backend:<8} {cells[0]:>13} {cells[1]:>12} {cells[2]:>11} {cells[3]:>9} {peak / 1024:6.0f} KiB")
+        if backend != "json":
+            speedup = ", ".join(f"{key} x{baseline[key] / timings[key]:.1f}" for key in timings)
+            print(f"{'':<8} vs json: {speedup}")
+            if timings["typed"] >= baseline["typed"]:
+                slower.append(backend)
+    print(f"auto codec: {JSONCodec('auto').backend}")
+    if slower:
+        sys.exit(f"decode_response() is not faster than json with: {', '.join(slower)}")
+
+
+if __name__ == "__main__":
+    main()
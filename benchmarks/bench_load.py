@@ -0,0 +1,347 @@
+"""
+Load generator and latency benchmark for the Python MCP clients and the A2A server.
+
+Starts the stub MCP server and the fake LLM as separate processes (so they do
+not compete with the load generator for the event loop), then drives each
+scenario with a fixed number of concurrent workers:
+
+    transport  MCPTransport resources/read round trip
+    client     MCPClient.invoke: LLM orchestration + execute_plan
+    agent      LLMBackedAgent.invoke (discovery, orchestration, resources/read)
+    a2a        message/send against the A2A server started with __main__.py
+
+Caches that would turn the repeated requests into local hits (resource cache,
+decision cache) are disabled unless `--cache` is given. Per scenario the
+report has p50/p95/p99 latency, requests per second, errors and memory (RSS of
+the process running the client code). Results are written as JSON with
+`--output` and compared against an earlier run with `--compare`:
+
+    python benchmarks/bench_load.py --scenario agent a2a --requests 2000 --concurrency 50 \\
+        --mcp-latency 0.05 --llm-latency 0.2 --output results/HEAD.json --compare results/main.json
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BENCHMARKS = os.path.join(ROOT, "benchmarks")
+sys.path.insert(0, ROOT)
+from mcp_common import DecisionCache, MCPTransport, ResourceCache  # noqa: E402
+
+SCENARIOS = ("transport", "client", "agent", "a2a")
+PROMPT = "Show me the catalog of products."
+RESOURCE_URI = "@server://services"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _memory_kb(pid="self") -> dict:
+    """Current and peak resident set size in KiB (Linux /proc, else getrusage peak only)."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            fields = dict(line.split(":", 1) for line in status if ":" in line)
+        return {"rss": int(fields["VmRSS"].split()[0]), "peak": int(fields["VmHWM"].split()[0])}
+    except (OSError, KeyError):
+        if pid != "self":
+            return {}
+        return {"peak": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+@contextlib.asynccontextmanager
+async def spawn(args: list, port: int, env: dict = None, probe: str = "/"):
+    """Run `python <args>` in a subprocess until the context exits; yields its process."""
+    process = subprocess.Popen(
+        [sys.executable, *args],
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        async with httpx.AsyncClient() as client:
+            for _ in range(300):
+                if process.poll() is not None:
+                    raise RuntimeError(f"{args[0]} exited with code {process.returncode}")
+                try:
+                    await client.get(f"http://127.0.0.1:{port}{probe}")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.05)
+            else:
+                raise RuntimeError(f"{args[0]} did not start on port {port}")
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def _load_mcp_client_module():
+    spec = importlib.util.spec_from_file_location("mcp_client", os.path.join(ROOT, "client", "mcp-client.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# -- Scenarios: async context managers yielding one request coroutine ------------
+
+
+@contextlib.asynccontextmanager
+async def transport_scenario(args, urls):
+    async with MCPTransport(urls["mcp"]) as transport:
+        async def request():
+            body = await transport.call("resources/read", {"uri": RESOURCE_URI})
+            if "error" in body:
+                raise RuntimeError(body["error"])
+        yield request
+
+
+@contextlib.asynccontextmanager
+async def client_scenario(args, urls):
+    module = _load_mcp_client_module()
+    client = module.MCPClient(
+        urls["mcp"],
+        decision_cache=None if args.cache else DecisionCache(max_size=0),
+        resource_cache=None if args.cache else ResourceCache(ttl=0),
+    )
+    await client.connect()
+    try:
+        async def request():
+            if await client.invoke(PROMPT) is None:
+                raise RuntimeError("MCPClient.invoke returned no result")
+        yield request
+    finally:
+        await client.close()
+
+
+@contextlib.asynccontextmanager
+async def agent_scenario(args, urls):
+    sys.path.insert(0, os.path.join(ROOT, "agent-to-agent"))
+    from a2a.server.events import EventQueue
+    from agent_executor import LLMBackedAgent
+
+    agent = LLMBackedAgent(
+        urls["mcp"],
+        decision_cache=None if args.cache else DecisionCache(max_size=0),
+        resource_cache=None if args.cache else ResourceCache(ttl=0),
+    )
+    try:
+        async def request():
+            queue = EventQueue()
+            await agent.invoke(PROMPT, queue)
+            event = await queue.dequeue_event(no_wait=True)
+            if '"error"' in event.parts[0].root.text:
+                raise RuntimeError(event.parts[0].root.text)
+        yield request
+    finally:
+        await agent.aclose()
+
+
+@contextlib.asynccontextmanager
+async def a2a_scenario(args, urls):
+    port = _free_port()
+    env = {
+        "MCP_SERVER_URL": urls["mcp"],
+        "OPENAI_BASE_URL": urls["llm"],
+        "OPENAI_API_KEY": "fake",
+        "MCP_LOG_LEVEL": "WARNING",
+    }
+    if not args.cache:
+        env.update(MCP_RESOURCE_CACHE_TTL="0", MCP_DECISION_CACHE_SIZE="0")
+    server_args = [os.path.join(ROOT, "agent-to-agent", "__main__.py"), "--port", str(port), "--workers", str(args.a2a_workers)]
+    async with spawn(server_args, port, env, probe="/.well-known/agent-card.json") as process:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+            async def request():
+                resp = await client.post(f"http://127.0.0.1:{port}/", json={
+                    "jsonrpc": "2.0",
+                    "id": "1",
+                    "method": "message/send",
+                    "params": {"message": {
+                        "role": "user", "messageId": os.urandom(8).hex(), "parts": [{"kind": "text", "text": PROMPT}],
+                    }},
+                })
+                body = resp.json()
+                state = (body.get("result") or {}).get("status", {}).get("state")
+                if state != "completed":
+                    raise RuntimeError(body.get("error") or f"task {state}")
+            request.server_pid = process.pid
+            yield request
+
+
+SCENARIO_FACTORIES = {
+    "transport": transport_scenario,
+    "client": client_scenario,
+    "agent": agent_scenario,
+    "a2a": a2a_scenario,
+}
+
+
+async def drive(request, total: int, concurrency: int) -> tuple:
+    """Run `total` requests with `concurrency` workers; returns (latencies, errors, elapsed)."""
+    latencies, errors = [], []
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                await request()
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(repr(e))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def run_scenario(name: str, args, urls) -> dict:
+    async with SCENARIO_FACTORIES[name](args, urls) as request:
+        if args.warmup:
+            await drive(request, args.warmup, min(args.concurrency, args.warmup))
+        memory_before = _memory_kb()
+        latencies, errors, elapsed = await drive(request, args.requests, args.concurrency)
+        memory_after = _memory_kb()
+        server_pid = getattr(request, "server_pid", None)
+        server_memory = _memory_kb(server_pid) if server_pid else None
+
+    latencies.sort()
+    report = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+        "memory_kb": {"before": memory_before, "after": memory_after},
+    }
+    if server_memory is not None:
+        report["memory_kb"]["server"] = server_memory
+    return report
+
+
+def print_report(results: dict, baseline: dict = None):
+    print(f"{'scenario':<10} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'peak RSS MiB':>13}")
+    for name, report in results["scenarios"].items():
+        latency = report["latency_ms"]
+        peak = report["memory_kb"]["after"].get("peak", 0) / 1024
+        print(f"{name:<10} {report['rps']:>9.1f} {latency['p50']:>9.2f} {latency['p95']:>9.2f} "
+              f"{latency['p99']:>9.2f} {report['errors']:>7} {peak:>13.1f}")
+        old = (baseline or {}).get("scenarios", {}).get(name)
+        if old:
+            changes = [f"rps {_change(old['rps'], report['rps'])}"]
+            changes += [f"{p} {_change(old['latency_ms'][p], latency[p])}" for p in ("p50", "p95", "p99")]
+            print(f"{'':<10} vs {baseline['meta']['commit']}: " + ", ".join(changes))
+
+
+def _change(old: float, new: float) -> str:
+    return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests before each scenario")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent in-flight requests")
+    parser.add_argument("--mcp-latency", type=float, default=0.0, help="Stub MCP server seconds per request")
+    parser.add_argument("--mcp-jitter", type=float, default=0.0, help="Random extra seconds per MCP request")
+    parser.add_argument("--items", type=int, default=10, help="Contents per resources/read")
+    parser.add_argument("--item-size", type=int, default=0, help="Characters of text per content")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Fake LLM seconds per completion")
+    parser.add_argument("--a2a-workers", type=int, default=1, help="Worker processes of the A2A server")
+    parser.add_argument("--cache", action="store_true", help="Keep the resource and decision caches enabled")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    mcp_port, llm_port = _free_port(), _free_port()
+    os.environ.update(
+        OPENAI_BASE_URL=f"http://127.0.0.1:{llm_port}/v1",
+        OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "fake"),
+        MCP_LOG_LEVEL=os.getenv("MCP_LOG_LEVEL", "WARNING"),
+    )
+    urls = {"mcp": f"http://127.0.0.1:{mcp_port}/", "llm": os.environ["OPENAI_BASE_URL"]}
+    stub_args = [
+        os.path.join(BENCHMARKS, "stub_mcp_server.py"), "--port", str(mcp_port),
+        "--latency", str(args.mcp_latency), "--jitter", str(args.mcp_jitter),
+        "--items", str(args.items), "--item-size", str(args.item_size),
+    ]
+    llm_args = [os.path.join(BENCHMARKS, "fake_llm_server.py"), "--port", str(llm_port), "--latency", str(args.llm_latency)]
+
+    # Quiet the clients' INFO logging so it does not dominate the measurement
+    from mcp_common import configure_logging
+    configure_logging()
+
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "scenarios": {},
+    }
+    async with spawn(stub_args, mcp_port), spawn(llm_args, llm_port):
+        for name in args.scenario:
+            results["scenarios"][name] = await run_scenario(name, args, urls)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+Exercises the retry, hedging and circuit breaker layer (`mcp_common.ResilientCaller`)
+of `MCPTransport` against the fault-injecting stub MCP server:
+
+    retries   share of successful resources/read calls at --fail-rate, without
+              and with retries
+    hedging   p50/p99 latency when --slow-rate of the requests stall, without
+              and with hedged requests
+    breaker   an outage opens the circuit (calls fail fast without reaching the
+              server), a ping probe closes it again once the server is back
+
+    python benchmarks/bench_resilience.py --requests 300 --fail-rate 0.3 --slow-rate 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from mcp_common import CircuitBreaker, CircuitOpenError, MCPTransport, ResilientCaller  # noqa: E402
+from bench_load import percentile  # noqa: E402
+from stub_mcp_server import build_app, serve_app  # noqa: E402
+
+URI = "@server://services"
+
+
+async def _read_all(transport: MCPTransport, requests: int, concurrency: int) -> tuple:
+    """Return (successful call latencies, failed calls)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await transport.call("resources/read", {"uri": URI})
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                failures += 1
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return sorted(latencies), failures
+
+
+def _no_breaker() -> CircuitBreaker:
+    return CircuitBreaker(failure_threshold=0)
+
+
+async def bench_retries(app, url: str, args):
+    app.state.fail_rate, app.state.slow_rate = args.fail_rate, 0.0
+    for label, attempts in (("no retries", 1), (f"{args.attempts} attempts", args.attempts)):
+        resilience = ResilientCaller(max_attempts=attempts, base_delay=0.01, breaker=_no_breaker())
+        async with MCPTransport(url, resilience=resilience) as transport:
+            latencies, failures = await _read_all(transport, args.requests, args.concurrency)
+        success = len(latencies) / args.requests * 100
+        print(f"  {label:<14} success {success:5.1f}%  retries {resilience.retries}")
+
+
+async def bench_hedging(app, url: str, args):
+    app.state.fail_rate, app.state.slow_rate, app.state.slow_latency = 0.0, args.slow_rate, args.slow_latency
+    for label, hedge_delay in (("no hedging", None), (f"hedge {args.hedge_delay}s", args.hedge_delay)):
+        resilience = ResilientCaller(hedge_delay=hedge_delay, breaker=_no_breaker())
+        async with MCPTransport(url, resilience=resilience) as transport:
+            latencies, _ = await _read_all(transport, args.requests, args.concurrency)
+        print(f"  {label:<14} p50 {percentile(latencies, 50) * 1000:7.1f} ms  "
+              f"p99 {percentile(latencies, 99) * 1000:7.1f} ms  hedges {resilience.hedges} "
+              f"(won {resilience.hedge_wins})")
+
+
+async def bench_breaker(app, url: str, args):
+    app.state.fail_rate, app.state.slow_rate = 1.0, 0.0
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=args.reset_timeout)
+    resilience = ResilientCaller(max_attempts=1, breaker=breaker)
+    async with MCPTransport(url, resilience=resilience) as transport:
+        app.state.requests = 0
+        outcomes = {"failed": 0, "short-circuited": 0}
+        for _ in range(50):
+            try:
+                await transport.call("resources/read", {"uri": URI})
+            except CircuitOpenError:
+                outcomes["short-circuited"] += 1
+            except Exception:
+                outcomes["failed"] += 1
+        print(f"  outage: 50 calls -> {outcomes}, {app.state.requests} reached the server, state {breaker.state}")
+
+        app.state.fail_rate = 0.0
+        await asyncio.sleep(args.reset_timeout)
+        await transport.call("resources/read", {"uri": URI})
+        print(f"  recovery after {args.reset_timeout}s: ping probe closed the circuit, state {breaker.state}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--fail-rate", type=float, default=0.3)
+    parser.add_argument("--attempts", type=int, default=3)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=1.0)
+    parser.add_argument("--hedge-delay", type=float, default=0.1)
+    parser.add_argument("--reset-timeout", type=float, default=1.0)
+    parser.add_argument("--port", type=int, default=8888)
+    args = parser.parse_args()
+
+    app = build_app()
+    async with serve_app(app, port=args.port) as url:
+        print(f"Retries (fail rate {args.fail_rate}):")
+        await bench_retries(app, url, args)
+        print(f"Hedging ({args.slow_rate * 100:.0f}% of requests +{args.slow_latency}s):")
+        await bench_hedging(app, url, args)
+        print("Circuit breaker:")
+        await bench_breaker(app, url, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
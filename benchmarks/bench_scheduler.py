@@ -0,0 +1,98 @@
+"""
+Exercises the request scheduler (`mcp_common.RequestScheduler`) in front of
+`MCPTransport` against the stub MCP server, with an unbounded burst of callers:
+
+    burst      requests per second and peak concurrency seen by the server,
+               without and with a rate limit and in-flight cap
+    lanes      p50/p95 wait for a slot of interactive `resources/read` calls
+               queued behind a flood of background `resources/list` discovery
+    throttle   throughput while the stub reports an API usage past the
+               threshold in `Sforce-Limit-Info`, and the resulting throttle factor
+
+    python benchmarks/bench_scheduler.py --requests 200 --rate 100 --max-in-flight 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from mcp_common import MCPTransport, RequestScheduler  # noqa: E402
+from bench_load import percentile  # noqa: E402
+from stub_mcp_server import build_app, serve_app  # noqa: E402
+
+URI = "@server://services"
+
+
+async def _burst(transport: MCPTransport, calls: list) -> list:
+    """Start every (method, params) call at once; returns each call's latency, in order."""
+    async def one(method, params):
+        start = time.perf_counter()
+        await transport.call(method, params)
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*(one(method, params) for method, params in calls))
+
+
+async def bench_burst(app, url: str, args):
+    calls = [("resources/read", {"uri": URI})] * args.requests
+    for label, rate, max_in_flight in (("unbounded", 0, 0), ("scheduled", args.rate, args.max_in_flight)):
+        scheduler = RequestScheduler(rate=rate, max_in_flight=max_in_flight)
+        app.state.peak_in_flight = 0
+        async with MCPTransport(url, scheduler=scheduler) as transport:
+            start = time.perf_counter()
+            await _burst(transport, calls)
+            elapsed = time.perf_counter() - start
+        print(f"  {label:<10} {args.requests / elapsed:7.1f} req/s  peak in flight at server {app.state.peak_in_flight}")
+
+
+async def bench_lanes(app, url: str, args):
+    background = [("resources/list", {})] * args.requests
+    interactive = [("resources/read", {"uri": URI})] * (args.requests // 10)
+    scheduler = RequestScheduler(rate=0, max_in_flight=args.max_in_flight)
+    async with MCPTransport(url, scheduler=scheduler) as transport:
+        latencies = await _burst(transport, background + interactive)
+    for lane, values in (("background", latencies[:len(background)]), ("interactive", latencies[len(background):])):
+        values = sorted(values)
+        print(f"  {lane:<11} {len(values):4d} calls  p50 {percentile(values, 50) * 1000:7.1f} ms  "
+              f"p95 {percentile(values, 95) * 1000:7.1f} ms")
+
+
+async def bench_throttle(app, url: str, args):
+    calls = [("resources/read", {"uri": URI})] * args.requests
+    for label, api_used in (("low usage", 0), ("high usage", int(args.api_limit * 0.9))):
+        app.state.api_limit, app.state.api_used, app.state.requests = args.api_limit, api_used, 0
+        scheduler = RequestScheduler(rate=args.rate, max_in_flight=args.max_in_flight)
+        async with MCPTransport(url, scheduler=scheduler) as transport:
+            start = time.perf_counter()
+            await _burst(transport, calls)
+            elapsed = time.perf_counter() - start
+        used, allotment = scheduler.api_usage
+        print(f"  {label:<10} {args.requests / elapsed:7.1f} req/s  api-usage {used}/{allotment}  "
+              f"throttle factor {scheduler.factor:.2f}")
+    app.state.api_limit = 0
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=100.0, help="Token bucket rate of the scheduled runs")
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub latency per request")
+    parser.add_argument("--api-limit", type=int, default=15000, help="Daily allotment reported by the stub")
+    parser.add_argument("--port", type=int, default=8888)
+    args = parser.parse_args()
+
+    app = build_app(latency=args.latency)
+    async with serve_app(app, port=args.port) as url:
+        print(f"Burst of {args.requests} calls (rate {args.rate}/s, max in flight {args.max_in_flight}):")
+        await bench_burst(app, url, args)
+        print(f"Priority lanes (max in flight {args.max_in_flight}):")
+        await bench_lanes(app, url, args)
+        print("Adaptive throttling (Sforce-Limit-Info):")
+        await bench_throttle(app, url, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+Requests-per-second benchmark: one httpx.AsyncClient per call (the previous
+LLMBackedAgent behaviour) versus the shared pooled `MCPTransport`.
+
+Each "message" performs the two MCP calls made per A2A message
+(`resources/list` + `resources/read`) against the local stub server.
+
+    python benchmarks/bench_transport.py --messages 500 --concurrency 20
+
+Note: the stub serves plain HTTP, so the measured gain only covers the TCP
+handshake; against Salesforce the saved TLS handshake makes it larger.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from mcp_common import MCPTransport  # noqa: E402
+from stub_mcp_server import serve_in_background  # noqa: E402
+
+
+async def per_call_client(url: str):
+    for message_id, method, params in ((1, "resources/list", {}), (2, "resources/read", {"uri": "@server://services"})):
+        async with httpx.AsyncClient() as client:
+            payload = {"jsonrpc": "2.0", "id": message_id, "method": method, "params": params}
+            resp = await client.post(url, json=payload)
+            resp.raise_for_status()
+            resp.json()
+
+
+async def pooled_transport(transport: MCPTransport):
+    await transport.call("resources/list")
+    await transport.call("resources/read", {"uri": "@server://services"})
+
+
+async def run(label: str, make_call, messages: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await make_call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(messages)))
+    elapsed = time.perf_counter() - start
+    rps = messages / elapsed
+    print(f"{label:<22} {messages} messages in {elapsed:.2f}s -> {rps:.1f} msg/s")
+    return rps
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8888)
+    args = parser.parse_args()
+
+    async with serve_in_background(port=args.port) as url:
+        baseline = await run("client per call", lambda: per_call_client(url), args.messages, args.concurrency)
+        async with MCPTransport(url) as transport:
+            pooled = await run("pooled MCPTransport", lambda: pooled_transport(transport), args.messages, args.concurrency)
+    print(f"Speed-up: {pooled / baseline:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
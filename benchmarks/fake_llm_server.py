@@ -0,0 +1,108 @@
+"""
+Local stand-in for the OpenAI Chat Completions API.
+
+Always routes to the first capability it finds in the orchestrator prompt
+(the `Available resources: [...]` system prompt of `LLMBackedAgent` or the
+`Available capabilities` message of `MCPClient`), after an optional delay.
+With `--plan N` it answers with a plan of the first N capabilities instead.
+`app.state.requests` counts the completions and `app.state.max_in_flight`
+records how many of them ran at the same time.
+Point the clients at it with:
+
+    python benchmarks/fake_llm_server.py --port 8889 --latency 0.5
+    export OPENAI_BASE_URL=http://127.0.0.1:8889/v1 OPENAI_API_KEY=fake
+"""
+import argparse
+import asyncio
+import ast
+import contextlib
+import json
+import re
+import time
+from uuid import uuid4
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from stub_mcp_server import serve_app
+
+_AGENT_RESOURCES = re.compile(r"Available resources: (\[.*?\])")
+
+
+def _candidates(messages: list) -> list:
+    for message in messages:
+        content = message.get("content") or ""
+        match = _AGENT_RESOURCES.search(content)
+        if match:
+            return [("resource", name) for name in ast.literal_eval(match.group(1))]
+        if content.startswith("Available capabilities:"):
+            capabilities = json.loads(content.split(":", 1)[1])
+            return (
+                [("resource", name) for name in capabilities.get("resources", [])]
+                + [("tool", name) for name in capabilities.get("tools", [])]
+            )
+    return []
+
+
+def _decide(messages: list, plan: int = 1) -> dict:
+    calls = [
+        {"type": type_, "name": name, "arguments": {}}
+        for type_, name in _candidates(messages)[:max(plan, 1)]
+    ] or [{"type": "resource", "name": "hello_world", "arguments": {}}]
+    return calls[0] if plan <= 1 else {"steps": calls}
+
+
+async def chat_completions(request: Request) -> JSONResponse:
+    body = await request.json()
+    state = request.app.state
+    state.requests += 1
+    state.in_flight += 1
+    state.max_in_flight = max(state.max_in_flight, state.in_flight)
+    try:
+        if state.latency:
+            await asyncio.sleep(state.latency)
+    finally:
+        state.in_flight -= 1
+    return JSONResponse({
+        "id": f"chatcmpl-{uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": json.dumps(_decide(body.get("messages", []), request.app.state.plan))},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    })
+
+
+def build_app(latency: float = 0.0, plan: int = 1) -> Starlette:
+    """Build the fake LLM app; every completion takes `latency` seconds."""
+    app = Starlette(routes=[Route("/v1/chat/completions", chat_completions, methods=["POST"])])
+    app.state.latency = latency
+    app.state.plan = plan
+    app.state.requests = 0
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+    return app
+
+
+@contextlib.asynccontextmanager
+async def serve_in_background(host: str = "127.0.0.1", port: int = 8889, latency: float = 0.0, plan: int = 1):
+    """Run the fake LLM inside the current event loop; yields its OpenAI base URL."""
+    async with serve_app(build_app(latency, plan), host, port) as url:
+        yield f"{url}v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake OpenAI endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8889)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per completion")
+    parser.add_argument("--plan", type=int, default=1, help="Answer with a plan of this many capabilities")
+    args = parser.parse_args()
+    uvicorn.run(build_app(args.latency, args.plan), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,110 @@
+"""
+Local stand-in for the Salesforce OAuth token endpoint (`/services/oauth2/token`).
+
+Issues random access tokens for the `client_credentials` and JWT bearer
+(`urn:ietf:params:oauth:grant-type:jwt-bearer`) grants, after an optional delay,
+so `mcp_common.TokenManager` can be exercised without a Connected App:
+
+    python benchmarks/fake_token_server.py --port 8890 --ttl 60
+    export MCP_AUTH_LOGIN_URL=http://127.0.0.1:8890 MCP_AUTH_CLIENT_ID=id MCP_AUTH_CLIENT_SECRET=secret
+
+JWT assertions are decoded and their claims checked, but the signature is not
+verified. `app.state.issued` lists every token handed out.
+"""
+import argparse
+import asyncio
+import base64
+import contextlib
+import json
+import secrets
+import time
+from urllib.parse import parse_qs
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from stub_mcp_server import serve_app
+
+JWT_BEARER_GRANT = "urn:ietf:params:oauth:grant-type:jwt-bearer"
+
+
+def _error(error: str, description: str) -> JSONResponse:
+    return JSONResponse({"error": error, "error_description": description}, status_code=400)
+
+
+def _jwt_claims(assertion: str) -> dict:
+    payload = assertion.split(".")[1]
+    return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+
+async def token_endpoint(request: Request) -> JSONResponse:
+    state = request.app.state
+    form = {key: values[0] for key, values in parse_qs((await request.body()).decode()).items()}
+    if state.latency:
+        await asyncio.sleep(state.latency)
+
+    grant = form.get("grant_type")
+    if grant == "client_credentials":
+        if state.client_id and form.get("client_id") != state.client_id:
+            return _error("invalid_client_id", "client identifier invalid")
+        if state.client_secret and form.get("client_secret") != state.client_secret:
+            return _error("invalid_client", "invalid client credentials")
+    elif grant == JWT_BEARER_GRANT:
+        try:
+            claims = _jwt_claims(form.get("assertion", ""))
+        except (IndexError, ValueError):
+            return _error("invalid_grant", "invalid assertion")
+        if not claims.get("iss") or not claims.get("sub") or claims.get("exp", 0) < time.time():
+            return _error("invalid_grant", "invalid assertion")
+    else:
+        return _error("unsupported_grant_type", "grant type not supported")
+
+    token = f"00D000000000000!{secrets.token_hex(24)}"
+    state.issued.append(token)
+    body = {
+        "access_token": token,
+        "instance_url": str(request.base_url).rstrip("/"),
+        "token_type": "Bearer",
+        "issued_at": str(int(time.time() * 1000)),
+        "scope": "api",
+    }
+    if state.ttl:
+        body["expires_in"] = state.ttl
+    return JSONResponse(body)
+
+
+def build_app(latency: float = 0.0, ttl: int = 0, client_id: str = None, client_secret: str = None) -> Starlette:
+    """
+    Build the fake token endpoint; `ttl` adds `expires_in` to the responses (Salesforce
+    omits it), `client_id`/`client_secret` are checked when given.
+    """
+    app = Starlette(routes=[Route("/services/oauth2/token", token_endpoint, methods=["POST"])])
+    app.state.latency = latency
+    app.state.ttl = ttl
+    app.state.client_id = client_id
+    app.state.client_secret = client_secret
+    app.state.issued = []
+    return app
+
+
+@contextlib.asynccontextmanager
+async def serve_in_background(host: str = "127.0.0.1", port: int = 8890, **options):
+    """Run the fake token endpoint inside the current event loop; yields its login URL."""
+    async with serve_app(build_app(**options), host, port) as url:
+        yield url.rstrip("/")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake Salesforce OAuth token endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8890)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per token request")
+    parser.add_argument("--ttl", type=int, default=0, help="expires_in of issued tokens (0 = omitted)")
+    parser.add_argument("--client-id", help="Only accept this client id")
+    parser.add_argument("--client-secret", help="Only accept this client secret")
+    args = parser.parse_args()
+    app = build_app(args.latency, args.ttl, args.client_id, args.client_secret)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,141 @@
+"""
+Replays a recorded session through `MCPClient` or `LLMBackedAgent` fully offline
+and profiles the client side with cProfile:
+
+    MCP_RECORD=session.jsonl.gz python agent-to-agent/__main__.py     # record against the org and OpenAI
+    python benchmarks/profile_replay.py session.jsonl.gz --target agent --runs 20 --time-scale 0
+    python benchmarks/profile_replay.py session.jsonl.gz --profile agent.prof    # then e.g. snakeviz agent.prof
+    py-spy record -o agent.svg -- python benchmarks/profile_replay.py session.jsonl.gz --runs 200
+
+The replay server (`replay_server.py`) answers the MCP and LLM requests from the
+cassette on its own thread, with the recorded timings scaled by `--time-scale`
+(0 leaves only client-side cost in the wall times). The prompts replayed are the
+cassette's `prompt` entries of the target client (`--prompt` overrides them).
+Caches that would turn repeated runs into local hits (resource cache, decision
+cache) are disabled unless `--cache` is given.
+
+The report has the replayed latency per prompt next to the recorded one, then the
+top functions of the profile.
+"""
+import argparse
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
+
+os.environ.pop("MCP_RECORD", None)  # never re-record a replay
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from mcp_common import DecisionCache, ResourceCache, configure_logging, load_cassette  # noqa: E402
+from bench_load import _free_port, _load_mcp_client_module, percentile  # noqa: E402
+from replay_server import build_app, serve_in_thread  # noqa: E402
+
+CLIENTS = {"agent": "agent", "client": "mcp-client"}
+
+
+async def _client_request(args, url):
+    """(request(prompt) coroutine function, close coroutine function) for MCPClient."""
+    module = _load_mcp_client_module()
+    client = module.MCPClient(
+        url,
+        decision_cache=None if args.cache else DecisionCache(max_size=0),
+        resource_cache=None if args.cache else ResourceCache(ttl=0),
+    )
+    await client.connect()
+
+    return client.invoke, client.close
+
+
+async def _agent_request(args, url):
+    """(request(prompt) coroutine function, close coroutine function) for LLMBackedAgent."""
+    sys.path.insert(0, os.path.join(ROOT, "agent-to-agent"))
+    from a2a.server.events import EventQueue
+    from agent_executor import LLMBackedAgent
+
+    agent = LLMBackedAgent(
+        url,
+        decision_cache=None if args.cache else DecisionCache(max_size=0),
+        resource_cache=None if args.cache else ResourceCache(ttl=0),
+    )
+
+    async def request(prompt: str):
+        await agent.invoke(prompt, EventQueue())
+
+    return request, agent.aclose
+
+
+async def replay(args, url, prompts: list, profiler: cProfile.Profile) -> dict:
+    """Run every prompt `args.runs` times; returns {prompt: sorted latencies}."""
+    make = _agent_request if args.target == "agent" else _client_request
+    request, close = await make(args, url)
+    latencies = {prompt: [] for prompt in prompts}
+    try:
+        for prompt in prompts[:args.warmup]:
+            await request(prompt)
+        profiler.enable()
+        for _ in range(args.runs):
+            for prompt in prompts:
+                start = time.perf_counter()
+                await request(prompt)
+                latencies[prompt].append(time.perf_counter() - start)
+        profiler.disable()
+    finally:
+        await close()
+    return {prompt: sorted(values) for prompt, values in latencies.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cassette", help="Cassette recorded with MCP_RECORD")
+    parser.add_argument("--target", choices=sorted(CLIENTS), default="agent")
+    parser.add_argument("--prompt", action="append", help="Prompt to replay (repeatable), instead of the recorded ones")
+    parser.add_argument("--runs", type=int, default=10, help="Times every prompt is replayed")
+    parser.add_argument("--warmup", type=int, default=1, help="Unprofiled prompts before the runs")
+    parser.add_argument("--time-scale", type=float, default=0.0, help="Factor applied to the recorded durations")
+    parser.add_argument("--cache", action="store_true", help="Keep the resource and decision caches enabled")
+    parser.add_argument("--top", type=int, default=25, help="Functions listed from the profile")
+    parser.add_argument("--sort", default="cumulative", help="pstats sort key (cumulative, tottime, ...)")
+    parser.add_argument("--profile", help="Also write the cProfile stats to this file")
+    args = parser.parse_args()
+
+    entries = load_cassette(args.cassette)
+    recorded = {}
+    for entry in entries:
+        if entry["kind"] == "prompt" and entry["request"].get("client") == CLIENTS[args.target]:
+            recorded.setdefault(entry["request"]["text"], []).append(entry["duration"])
+    prompts = args.prompt or list(recorded)
+    if not prompts:
+        parser.error(f"no {CLIENTS[args.target]} prompts in {args.cassette}, pass --prompt")
+
+    port = _free_port()
+    os.environ.update(
+        OPENAI_BASE_URL=f"http://127.0.0.1:{port}/v1",
+        OPENAI_API_KEY="replay",
+        MCP_LOG_LEVEL=os.getenv("MCP_LOG_LEVEL", "WARNING"),
+    )
+    configure_logging()
+    profiler = cProfile.Profile()
+    with serve_in_thread(build_app(entries, args.time_scale), port=port) as url:
+        latencies = asyncio.run(replay(args, url, prompts, profiler))
+
+    print(f"{len(entries)} exchanges, {len(prompts)} prompts x {args.runs} runs, time scale {args.time_scale}")
+    print(f"{'prompt':<40} {'recorded':>10} {'p50':>10} {'p95':>10}")
+    for prompt, values in latencies.items():
+        before = recorded.get(prompt)
+        before = f"{sorted(before)[len(before) // 2] * 1000:8.1f}ms" if before else "-"
+        print(f"{prompt[:40]:<40} {before:>10} {percentile(values, 50) * 1000:8.1f}ms "
+              f"{percentile(values, 95) * 1000:8.1f}ms")
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats(args.sort).print_stats(args.top)
+    print(out.getvalue())
+    if args.profile:
+        profiler.dump_stats(args.profile)
+        print(f"Profile written to {args.profile}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Replays a cassette recorded with MCP_RECORD (`mcp_common.CassetteRecorder`) as a
+local server that stands in for both the Salesforce MCP endpoint and OpenAI:
+
+    python benchmarks/replay_server.py session.jsonl.gz --port 8892 --time-scale 1
+    export MCP_SERVER_URL=http://127.0.0.1:8892/ OPENAI_BASE_URL=http://127.0.0.1:8892/v1 OPENAI_API_KEY=replay
+
+POST `/` answers JSON-RPC requests (and batches) with the recorded reply for the
+same method and params, under the caller's id; recordings of one request are served
+in turn. A request never recorded gets the first reply recorded for its method, or
+"method not found". POST `/v1/chat/completions` answers with the completion recorded
+for the same messages, else the recorded completions in order.
+
+Every reply waits its recorded duration times `--time-scale` (1 = original timings,
+0.5 = twice as fast, 0 = no waiting). `serve_in_thread()` runs it in-process on
+its own event loop, so it stays out of a profile of the calling thread.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from mcp_common import load_cassette  # noqa: E402
+from stub_mcp_server import serve_app  # noqa: E402
+
+
+def _key(*parts) -> str:
+    return json.dumps(parts, sort_keys=True, separators=(",", ":"))
+
+
+class Recordings:
+    """Recorded (reply, duration) pairs by key, served in turn (the last one repeats)."""
+
+    def __init__(self):
+        self._replies = {}
+        self._served = {}
+
+    def add(self, key: str, reply, duration: float):
+        self._replies.setdefault(key, []).append((reply, duration))
+
+    def next(self, key: str):
+        replies = self._replies.get(key)
+        if not replies:
+            return None
+        position = self._served.get(key, 0)
+        self._served[key] = position + 1
+        return replies[min(position, len(replies) - 1)]
+
+    def __contains__(self, key: str):
+        return key in self._replies
+
+    def __len__(self):
+        return sum(len(replies) for replies in self._replies.values())
+
+
+def _index(entries: list) -> dict:
+    """{"mcp" | "mcp-method" | "llm" | "llm-order": Recordings} of a cassette's exchanges."""
+    index = {name: Recordings() for name in ("mcp", "mcp-method", "llm", "llm-order")}
+    for entry in entries:
+        request, reply, duration = entry["request"], entry["response"], entry["duration"]
+        if entry["kind"] == "mcp":
+            messages, replies = (request, reply) if isinstance(request, list) else ([request], [reply])
+            by_id = {r.get("id"): r for r in replies if isinstance(r, dict)}
+            for message in messages:
+                if message.get("id") in by_id:
+                    method = message.get("method")
+                    reply = by_id[message["id"]]
+                    index["mcp"].add(_key(method, message.get("params") or {}), reply, duration)
+                    if _key(method) not in index["mcp-method"]:
+                        index["mcp-method"].add(_key(method), reply, duration)
+        elif entry["kind"] == "llm":
+            index["llm"].add(_key(request.get("model"), request.get("messages")), reply, duration)
+            index["llm-order"].add("", reply, duration)
+    return index
+
+
+def _answer(index: dict, message: dict) -> tuple:
+    """(reply under the request's id, recorded duration) for one JSON-RPC message."""
+    method = message.get("method")
+    found = index["mcp"].next(_key(method, message.get("params") or {})) or index["mcp-method"].next(_key(method))
+    if found is None:
+        if method == "initialize":
+            result = {"protocolVersion": "2025-06-18", "capabilities": {}, "serverInfo": {"name": "replay"}}
+            return {"jsonrpc": "2.0", "id": message.get("id"), "result": result}, 0.0
+        error = {"code": -32601, "message": f"Method not recorded: {method}"}
+        return {"jsonrpc": "2.0", "id": message.get("id"), "error": error}, 0.0
+    reply, duration = found
+    return {**reply, "id": message.get("id")}, duration
+
+
+async def mcp_endpoint(request: Request) -> Response:
+    state = request.app.state
+    body = await request.json()
+    state.requests += 1
+    messages = body if isinstance(body, list) else [body]
+    answers = [_answer(state.index, message) for message in messages if "id" in message and "method" in message]
+    if not answers:
+        return Response(status_code=202)
+    delay = max(duration for _, duration in answers) * state.time_scale
+    if delay:
+        await asyncio.sleep(delay)
+    replies = [reply for reply, _ in answers]
+    return JSONResponse(replies if isinstance(body, list) else replies[0])
+
+
+async def chat_completions(request: Request) -> JSONResponse:
+    state = request.app.state
+    body = await request.json()
+    state.requests += 1
+    found = state.index["llm"].next(_key(body.get("model"), body.get("messages"))) or state.index["llm-order"].next("")
+    if found is None:
+        return JSONResponse({"error": {"message": "No completion recorded", "type": "invalid_request_error"}}, 404)
+    completion, duration = found
+    if duration * state.time_scale:
+        await asyncio.sleep(duration * state.time_scale)
+    return JSONResponse({**completion, "created": int(time.time())})
+
+
+def build_app(cassette, time_scale: float = 1.0) -> Starlette:
+    """Build the replay app for a cassette path (or its loaded entries)."""
+    entries = load_cassette(cassette) if isinstance(cassette, str) else cassette
+    app = Starlette(routes=[
+        Route("/", mcp_endpoint, methods=["POST"]),
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/chat/completions", chat_completions, methods=["POST"]),
+    ])
+    app.state.index = _index(entries)
+    app.state.time_scale = time_scale
+    app.state.requests = 0
+    return app
+
+
+@contextlib.asynccontextmanager
+async def serve_in_background(cassette, host: str = "127.0.0.1", port: int = 8892, time_scale: float = 1.0):
+    """Run the replay server inside the current event loop."""
+    async with serve_app(build_app(cassette, time_scale), host, port) as url:
+        yield url
+
+
+@contextlib.contextmanager
+def serve_in_thread(app, host: str = "127.0.0.1", port: int = 8892):
+    """Run an ASGI app on its own event loop in a daemon thread; yields its URL."""
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="replay-server", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Replay server could not start on {host}:{port}")
+        time.sleep(0.01)
+    try:
+        yield f"http://{host}:{port}/"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded MCP/LLM cassette")
+    parser.add_argument("cassette", help="Cassette recorded with MCP_RECORD")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8892)
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Factor applied to the recorded durations")
+    args = parser.parse_args()
+    uvicorn.run(build_app(args.cassette, args.time_scale), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,285 @@
+"""
+Local stand-in for the Salesforce Apex MCP server (`RestResourceMcpServer`).
+
+Answers the JSON-RPC methods routed by `Method.execute` with canned payloads
+shaped like the Apex responses, so the Python clients can be exercised and
+benchmarked without a Salesforce org.
+
+Run standalone:
+    python benchmarks/stub_mcp_server.py --port 8888
+
+`--latency` delays every HTTP request (plus up to `--jitter` seconds), and
+`--items` / `--item-size` control the number and text size of the
+`resources/read` contents, so payload-size effects can be measured.
+
+Fault injection: `--fail-rate` answers that share of requests with
+`--fail-status` (503 by default, 403 sends Salesforce's REQUEST_LIMIT_EXCEEDED
+body) and `--slow-rate` delays that share by `--slow-latency` seconds;
+`app.state.fail_next` and `app.state.slow_next` do the same to exactly the next N
+requests. All options live on `app.state` and can be changed while the stub is running.
+
+`app.state.rpc_errors` ({method: count}) answers the next `count` requests for a
+method with a JSON-RPC INTERNAL_ERROR at HTTP 200, as `Server.cls` does when a
+method throws.
+
+`--api-limit` adds Salesforce's `Sforce-Limit-Info: api-usage=N/M` header, counting
+every request from `--api-used`; `app.state.peak_in_flight` is the largest number of
+requests handled at once.
+"""
+import argparse
+import asyncio
+import contextlib
+import random
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+RESOURCES = [
+    {
+        "uri": "@server://services",
+        "name": "product-catalog",
+        "title": "Catalog of products",
+        "description": "List of all available products",
+        "mimeType": "application/json",
+        "size": 65536,
+    }
+]
+
+TOOLS = [
+    {
+        "name": "LeadTool",
+        "description": "Manages lead operations",
+        "inputSchema": {"type": "object", "properties": {"action": {"type": "string"}}},
+    }
+]
+
+PROMPTS = [
+    {
+        "name": "code-review",
+        "description": "Code review guidelines",
+        "arguments": [],
+    }
+]
+
+
+def _catalog_contents(uri: str, count: int = 10, text_size: int = 0) -> list:
+    return [
+        {
+            "uri": f"{uri}/01t00000000000{i:04d}",
+            "name": f"Product {i}",
+            "title": f"Product {i}",
+            "text": f"Description of product {i}".ljust(text_size, "."),
+        }
+        for i in range(count)
+    ]
+
+
+def _result(method: str, params: dict, items: int = 10, item_size: int = 0):
+    if method == "initialize":
+        return {
+            "protocolVersion": "2025-06-18",
+            "serverInfo": {"name": "salesforce-mcp-server", "title": "Salesforce MCP Server", "version": "1.0.0"},
+            "capabilities": {
+                "resources": {"listChanged": True},
+                "tools": {"listChanged": True},
+                "prompts": {"listChanged": True},
+            },
+        }
+    if method == "resources/list":
+        return {"resources": RESOURCES}
+    if method == "resources/templates/list":
+        return {"resourceTemplates": []}
+    if method == "resources/read":
+        return {"contents": _catalog_contents(params.get("uri", RESOURCES[0]["uri"]), items, item_size)}
+    if method == "tools/list":
+        return {"tools": TOOLS}
+    if method == "tools/call":
+        return {"content": [{"type": "text", "text": f"Called {params.get('name')}"}], "isError": False}
+    if method == "prompts/list":
+        return {"prompts": PROMPTS}
+    if method == "prompts/get":
+        return {"description": "desc", "messages": []}
+    if method == "ping":
+        return {}
+    return None
+
+
+def _reply(message: dict, items: int = 10, item_size: int = 0) -> dict:
+    result = _result(message.get("method"), message.get("params") or {}, items, item_size)
+    if result is None:
+        return {"jsonrpc": "2.0", "id": message.get("id"), "error": {"code": -32601, "message": "Method not found"}}
+    return {"jsonrpc": "2.0", "id": message.get("id"), "result": result}
+
+
+def _answer(state, message: dict) -> dict:
+    """The reply to one message, unless a JSON-RPC error is injected for its method."""
+    method = message.get("method")
+    if state.rpc_errors.get(method):
+        state.rpc_errors[method] -= 1
+        error = {"code": -32603, "message": "Internal error", "data": f"Injected {method} failure"}
+        return {"jsonrpc": "2.0", "id": message.get("id"), "error": error}
+    return _reply(message, state.items, state.item_size)
+
+
+def _fault(status: int) -> JSONResponse:
+    """Error reply shaped like the Salesforce REST API's."""
+    if status == 403:
+        body = [{"message": "TotalRequests Limit exceeded.", "errorCode": "REQUEST_LIMIT_EXCEEDED"}]
+    else:
+        body = [{"message": "Service unavailable", "errorCode": "SERVER_UNAVAILABLE"}]
+    return JSONResponse(body, status_code=status)
+
+
+def _take(state, name: str) -> bool:
+    """Use up one of the `app.state.<name>` faults for the next requests, if any are left."""
+    left = getattr(state, name)
+    if left > 0:
+        setattr(state, name, left - 1)
+    return left > 0
+
+
+def _unauthorized() -> JSONResponse:
+    body = [{"message": "Session expired or invalid", "errorCode": "INVALID_SESSION_ID"}]
+    return JSONResponse(body, status_code=401)
+
+
+async def mcp_endpoint(request: Request) -> JSONResponse:
+    state = request.app.state
+    state.in_flight += 1
+    state.peak_in_flight = max(state.peak_in_flight, state.in_flight)
+    try:
+        resp = await _handle(request)
+    finally:
+        state.in_flight -= 1
+    if state.api_limit:
+        resp.headers["Sforce-Limit-Info"] = f"api-usage={state.api_used + state.requests}/{state.api_limit}"
+    return resp
+
+
+async def _handle(request: Request) -> JSONResponse:
+    state = request.app.state
+    body = await request.json()
+    state.requests += 1
+    if state.require_auth:
+        authorization = request.headers.get("authorization", "")
+        if not authorization.startswith("Bearer ") or authorization[7:] in state.revoked:
+            return _unauthorized()
+    if state.latency or state.jitter:
+        await asyncio.sleep(state.latency + random.uniform(0, state.jitter))
+    if _take(state, "slow_next") or (state.slow_rate and random.random() < state.slow_rate):
+        await asyncio.sleep(state.slow_latency)
+    if _take(state, "fail_next") or (state.fail_rate and random.random() < state.fail_rate):
+        return _fault(state.fail_status)
+    if isinstance(body, list):
+        if not state.batch:
+            # Same answer as the Apex server, which cannot deserialize an array
+            return JSONResponse({"jsonrpc": "2.0", "id": -1, "error": {"code": -32603, "message": "Internal error"}})
+        return JSONResponse([_answer(state, message) for message in body])
+    return JSONResponse(_answer(state, body))
+
+
+def build_app(
+    batch: bool = True,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    items: int = 10,
+    item_size: int = 0,
+    fail_rate: float = 0.0,
+    fail_status: int = 503,
+    slow_rate: float = 0.0,
+    slow_latency: float = 1.0,
+    require_auth: bool = False,
+    api_limit: int = 0,
+    api_used: int = 0,
+    rpc_errors: dict = None,
+) -> Starlette:
+    """
+    Build the stub app; `batch=False` rejects JSON-RPC arrays like the Apex server.
+    Every request waits `latency` + up to `jitter` seconds; `resources/read` returns
+    `items` contents whose text is padded to `item_size` characters. A `fail_rate`
+    share of requests fails with `fail_status`, a `slow_rate` share takes
+    `slow_latency` seconds longer. With `require_auth`, requests without a Bearer
+    token, or with one listed in `app.state.revoked`, get a 401 INVALID_SESSION_ID.
+    With `api_limit`, responses report `api_used` + requests received so far out of it
+    in `Sforce-Limit-Info`. `rpc_errors` ({method: count}) injects JSON-RPC errors.
+    """
+    app = Starlette(routes=[Route("/", mcp_endpoint, methods=["POST"])])
+    app.state.batch = batch
+    app.state.latency = latency
+    app.state.jitter = jitter
+    app.state.items = items
+    app.state.item_size = item_size
+    app.state.fail_rate = fail_rate
+    app.state.fail_status = fail_status
+    app.state.slow_rate = slow_rate
+    app.state.slow_latency = slow_latency
+    app.state.fail_next = 0
+    app.state.slow_next = 0
+    app.state.require_auth = require_auth
+    app.state.revoked = set()
+    app.state.api_limit = api_limit
+    app.state.api_used = api_used
+    app.state.rpc_errors = dict(rpc_errors or {})
+    app.state.requests = 0  # requests received, including failed ones
+    app.state.in_flight = 0
+    app.state.peak_in_flight = 0
+    return app
+
+
+@contextlib.asynccontextmanager
+async def serve_app(app, host: str = "127.0.0.1", port: int = 8888):
+    """Run an ASGI app inside the current event loop for the duration of the context."""
+    config = uvicorn.Config(app, host=host, port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://{host}:{port}/"
+    finally:
+        server.should_exit = True
+        await task
+
+
+@contextlib.asynccontextmanager
+async def serve_in_background(host: str = "127.0.0.1", port: int = 8888, batch: bool = True, **options):
+    """Run the stub inside the current event loop; `options` are passed to build_app()."""
+    async with serve_app(build_app(batch=batch, **options), host, port) as url:
+        yield url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub MCP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--no-batch", action="store_true", help="Reject JSON-RPC batches like the Apex server")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra seconds (0..jitter) per request")
+    parser.add_argument("--items", type=int, default=10, help="Contents returned by resources/read")
+    parser.add_argument("--item-size", type=int, default=0, help="Characters of text per resources/read content")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with --fail-status")
+    parser.add_argument("--fail-status", type=int, default=503, help="HTTP status of injected failures (403 = limit)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Share of requests delayed by --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="Extra seconds for slow requests")
+    parser.add_argument("--require-auth", action="store_true", help="Answer 401 to requests without a Bearer token")
+    parser.add_argument("--api-limit", type=int, default=0, help="Daily API allotment reported in Sforce-Limit-Info")
+    parser.add_argument("--api-used", type=int, default=0, help="API requests already used at start")
+    args = parser.parse_args()
+    app = build_app(
+        batch=not args.no_batch,
+        latency=args.latency,
+        jitter=args.jitter,
+        items=args.items,
+        item_size=args.item_size,
+        fail_rate=args.fail_rate,
+        fail_status=args.fail_status,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        require_auth=args.require_auth,
+        api_limit=args.api_limit,
+        api_used=args.api_used,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,247 @@
+"""
+Local stand-in for an MCP server speaking the Streamable HTTP transport of
+protocol 2025-06-18 (one endpoint, `Mcp-Session-Id`, SSE replies), answering
+with the same canned payloads as `stub_mcp_server.py`, so
+`mcp_common.StreamableHTTPTransport` can be exercised without a Salesforce org:
+
+    python benchmarks/stub_streamable_server.py --port 8891 --items 500 --item-size 1000
+    export MCP_TRANSPORT=streamable-http MCP_SERVER_URL=http://127.0.0.1:8891/
+
+POST `initialize` opens a session; every other message needs its `Mcp-Session-Id`
+(404 once the session is unknown, e.g. after DELETE or `app.state.sessions.clear()`).
+Requests accepting `text/event-stream` are answered with an SSE stream: a priming
+event, a `notifications/progress` event when the request carries a progressToken,
+then the reply, written in `--chunk-size` pieces `--chunk-delay` seconds apart.
+A `--drop-rate` share of those streams ends in the middle of the reply; GET with
+`Last-Event-ID` replays the rest.
+
+GET without `Last-Event-ID` opens the session's push stream: `broadcast(app, message)`
+sends a message to every open push stream, and `--list-changed-every` pushes
+`notifications/resources/list_changed` periodically. `--no-listen` answers that
+GET with 405, like the Apex REST endpoint.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import uuid
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from stub_mcp_server import _answer, serve_app
+
+PROTOCOL_VERSION = "2025-06-18"
+# Request streams kept for Last-Event-ID replay
+MAX_STORED_STREAMS = 100
+
+
+def _error(status: int, message: str) -> JSONResponse:
+    return JSONResponse({"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": message}}, status)
+
+
+def _record(state, sid: str, stream: str, message: dict = None) -> str:
+    """Format the next SSE event of `stream` and keep it for replay."""
+    key = (sid, stream)
+    events = state.streams.setdefault(key, [])
+    data = "" if message is None else f"data: {json.dumps(message)}\n"
+    events.append(f"id: {sid}/{stream}/{len(events)}\n{data}\n")
+    if len(state.streams) > MAX_STORED_STREAMS:
+        state.streams.pop(next(iter(state.streams)))
+    return events[-1]
+
+
+async def _write(state, events: list, drop: bool = False):
+    body = "".join(events)
+    if drop:
+        body = body[:len(body) - len(events[-1]) // 2]
+    size = state.chunk_size or len(body) or 1
+    for start in range(0, len(body), size):
+        if start and state.chunk_delay:
+            await asyncio.sleep(state.chunk_delay)
+        yield body[start:start + size]
+
+
+async def _push(state, sid: str, queue: asyncio.Queue, backlog: list):
+    try:
+        for event in backlog:
+            yield event
+        while sid in state.sessions:
+            try:
+                message = await asyncio.wait_for(queue.get(), state.list_changed_every or None)
+            except asyncio.TimeoutError:
+                message = {"jsonrpc": "2.0", "method": "notifications/resources/list_changed"}
+            if message is None:
+                break
+            yield _record(state, sid, "push", message)
+    finally:
+        state.listeners.get(sid, set()).discard(queue)
+
+
+def broadcast(app, message: dict):
+    """Send `message` on every open push stream."""
+    for queues in app.state.listeners.values():
+        for queue in queues:
+            queue.put_nowait(message)
+
+
+async def post_message(request: Request) -> Response:
+    state = request.app.state
+    message = await request.json()
+    state.requests += 1
+    if isinstance(message, list):
+        return _error(400, "Batches are not supported")
+    if message.get("method") == "initialize":
+        if state.rpc_errors.get("initialize"):
+            return JSONResponse(_answer(state, message))
+        sid = uuid.uuid4().hex
+        state.sessions.add(sid)
+        result = {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {kind: {"listChanged": True} for kind in ("tools", "resources", "prompts")},
+            "serverInfo": {"name": "stub-streamable-mcp", "version": "1.0.0"},
+        }
+        return JSONResponse({"jsonrpc": "2.0", "id": message.get("id"), "result": result}, headers={"Mcp-Session-Id": sid})
+    sid = request.headers.get("mcp-session-id")
+    if sid is None:
+        return _error(400, "Missing Mcp-Session-Id")
+    if sid not in state.sessions:
+        return Response(status_code=404)
+    if "method" not in message or "id" not in message:
+        return Response(status_code=202)
+    if state.latency:
+        await asyncio.sleep(state.latency)
+    reply = _answer(state, message)
+    if "text/event-stream" not in request.headers.get("accept", ""):
+        return JSONResponse(reply)
+
+    state.stream_count += 1
+    stream = str(state.stream_count)
+    events = [_record(state, sid, stream)]
+    token = ((message.get("params") or {}).get("_meta") or {}).get("progressToken")
+    if token is not None:
+        progress = {"progressToken": token, "progress": 0, "message": f"Running {message['method']}"}
+        events.append(_record(state, sid, stream, {"jsonrpc": "2.0", "method": "notifications/progress", "params": progress}))
+    events.append(_record(state, sid, stream, reply))
+    drop = bool(state.drop_rate) and random.random() < state.drop_rate
+    state.dropped += drop
+    return StreamingResponse(_write(state, events, drop), media_type="text/event-stream")
+
+
+async def open_stream(request: Request) -> Response:
+    state = request.app.state
+    if not state.listen:
+        return Response(status_code=405)
+    sid = request.headers.get("mcp-session-id")
+    if sid is None:
+        return _error(400, "Missing Mcp-Session-Id")
+    if sid not in state.sessions:
+        return Response(status_code=404)
+    backlog = []
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        event_sid, _, position = last_event_id.rpartition("/")
+        event_sid, _, stream = event_sid.partition("/")
+        events = state.streams.get((event_sid, stream))
+        if event_sid != sid or events is None or not position.isdigit():
+            return Response(status_code=404)
+        backlog = events[int(position) + 1:]
+        if stream != "push":
+            state.resumed += 1
+            return StreamingResponse(_write(state, backlog), media_type="text/event-stream")
+    queue = asyncio.Queue()
+    state.listeners.setdefault(sid, set()).add(queue)
+    return StreamingResponse(_push(state, sid, queue, backlog), media_type="text/event-stream")
+
+
+async def end_session(request: Request) -> Response:
+    state = request.app.state
+    sid = request.headers.get("mcp-session-id")
+    if sid not in state.sessions:
+        return Response(status_code=404)
+    state.sessions.discard(sid)
+    for queue in state.listeners.pop(sid, ()):
+        queue.put_nowait(None)
+    return Response(status_code=200)
+
+
+def build_app(
+    latency: float = 0.0,
+    items: int = 10,
+    item_size: int = 0,
+    chunk_size: int = 0,
+    chunk_delay: float = 0.0,
+    drop_rate: float = 0.0,
+    list_changed_every: float = 0.0,
+    listen: bool = True,
+    rpc_errors: dict = None,
+) -> Starlette:
+    """
+    Build the stub app. Every request waits `latency` seconds; `resources/read`
+    returns `items` contents padded to `item_size` characters. SSE replies are written
+    `chunk_size` characters at a time (0 = at once), `chunk_delay` seconds apart, and a
+    `drop_rate` share ends mid-reply. `listen=False` answers GET with 405.
+    `rpc_errors` ({method: count}) answers the next `count` requests for a method
+    (`initialize` included) with a JSON-RPC error.
+    Counters: `app.state.requests`, `app.state.dropped`, `app.state.resumed`.
+    """
+    app = Starlette(routes=[
+        Route("/", post_message, methods=["POST"]),
+        Route("/", open_stream, methods=["GET"]),
+        Route("/", end_session, methods=["DELETE"]),
+    ])
+    app.state.latency = latency
+    app.state.items = items
+    app.state.item_size = item_size
+    app.state.chunk_size = chunk_size
+    app.state.chunk_delay = chunk_delay
+    app.state.drop_rate = drop_rate
+    app.state.list_changed_every = list_changed_every
+    app.state.listen = listen
+    app.state.rpc_errors = dict(rpc_errors or {})
+    app.state.sessions = set()
+    app.state.streams = {}  # {(session id, stream): [SSE events]}
+    app.state.listeners = {}  # {session id: {push stream queues}}
+    app.state.stream_count = 0
+    app.state.requests = 0
+    app.state.dropped = 0
+    app.state.resumed = 0
+    return app
+
+
+@contextlib.asynccontextmanager
+async def serve_in_background(host: str = "127.0.0.1", port: int = 8891, **options):
+    """Run the stub inside the current event loop; `options` are passed to build_app()."""
+    async with serve_app(build_app(**options), host, port) as url:
+        yield url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub MCP server (Streamable HTTP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8891)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--items", type=int, default=10, help="Contents returned by resources/read")
+    parser.add_argument("--item-size", type=int, default=0, help="Characters of text per resources/read content")
+    parser.add_argument("--chunk-size", type=int, default=0, help="Characters per SSE write (0 = whole reply)")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Seconds between SSE writes")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Share of SSE replies cut off mid-reply")
+    parser.add_argument("--list-changed-every", type=float, default=0.0,
+                        help="Seconds between pushed resources/list_changed notifications (0 = never)")
+    parser.add_argument("--no-listen", action="store_true", help="Answer GET with 405 like the Apex server")
+    args = parser.parse_args()
+    app = build_app(
+        latency=args.latency,
+        items=args.items,
+        item_size=args.item_size,
+        chunk_size=args.chunk_size,
+        chunk_delay=args.chunk_delay,
+        drop_rate=args.drop_rate,
+        list_changed_every=args.list_changed_every,
+        listen=not args.no_listen,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
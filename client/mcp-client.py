@@ -1,71 +1,295 @@
 import asyncio
 import aiohttp
+import httpx
 import json
+import logging
 import os
+import sys
+import time
 from dotenv import load_dotenv
 import openai
 
+# Make the shared `mcp_common` package (repository root) importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from mcp_common import (  # noqa: E402
+    CODEC,
+    CapabilityCache,
+    CapabilityRegistry,
+    CircuitOpenError,
+    DecisionCache,
+    JSONRPCBatcher,
+    MCPError,
+    METRICS,
+    Payload,
+    PlanExecutor,
+    RECORDER,
+    RequestScheduler,
+    ResilientCaller,
+    ResourceCache,
+    SCHEDULER,
+    StreamableHTTPTransport,
+    TokenManager,
+    TransientError,
+    capability_fingerprint,
+    configure_logging,
+    is_idempotent,
+    lane_for,
+    normalize_plan,
+)
+from mcp_common.resilience import transient_error  # noqa: E402
+
 # Load environment variables from .env file (for API keys, server URL, etc.)
 load_dotenv()
 
 # Initialize the OpenAI client (new v1 SDK interface)
 openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+logger = logging.getLogger("MCPClient")
+
 class MCPClient:
     """
     MCP client to discover tools/resources/prompts, orchestrate LLM calls,
     and dynamically execute MCP capabilities (tools or resources).
     """
 
-    def __init__(self, server_url: str):
+    def __init__(
+        self,
+        server_url: str,
+        capability_cache: CapabilityCache = None,
+        decision_cache: DecisionCache = None,
+        resource_cache: ResourceCache = None,
+        auth: TokenManager = None,
+        scheduler: RequestScheduler = None,
+    ):
         self.server_url = server_url
         self.session = None
         self.message_id = 0
         self.tools = []
         self.resources = []
         self.prompts = []
+        # Name/URI indexes of the discovered capabilities and keyword pre-filter for the LLM prompt
+        self.registry = CapabilityRegistry()
+        # Seconds spent per discovery call during the last connect(), plus "total"
+        self.connect_timings = {}
+        # Discovery results survive restarts when MCP_CAPABILITY_SNAPSHOT points to a file
+        self.capability_cache = capability_cache or CapabilityCache(
+            snapshot_path=os.getenv("MCP_CAPABILITY_SNAPSHOT")
+        )
+        # Remembers LLM routing decisions for repeated prompts
+        self.decision_cache = decision_cache or DecisionCache()
+        # Serves repeated resources/read calls for the same URI locally
+        self.resource_cache = resource_cache or ResourceCache()
+        # Packs several calls into one JSON-RPC array POST (see send_batch)
+        self.batcher = JSONRPCBatcher(
+            self._send,
+            max_batch_size=int(os.getenv("MCP_BATCH_MAX_SIZE", "50")),
+            max_concurrency=int(os.getenv("MCP_BATCH_FALLBACK_CONCURRENCY", "8")),
+        )
+        # Runs the independent steps of multi-capability plans concurrently
+        self.plan_executor = PlanExecutor()
+        # Retries/hedges idempotent calls and fails fast while the server is down
+        self.resilience = ResilientCaller(retry_on=(aiohttp.ClientConnectionError,))
+        self.resilience.breaker.probe = self._ping
+        # Salesforce OAuth token (MCP_AUTH_* variables); None sends no Authorization header
+        self.auth = auth if auth is not None else TokenManager.from_env()
+        # Rate limit, in-flight cap and priority lanes shared with every MCP transport of the process
+        self.scheduler = scheduler or SCHEDULER
+        # MCP_TRANSPORT=streamable-http: one MCP session (Mcp-Session-Id, SSE replies,
+        # pushed list_changed notifications) instead of independent JSON POSTs
+        self.streamable = None
+        if os.getenv("MCP_TRANSPORT", "json").strip().lower() == "streamable-http":
+            self.streamable = StreamableHTTPTransport(
+                server_url, on_message=self.handle_notification, auth=self.auth, scheduler=self.scheduler
+            )
+            # Protocol 2025-06-18 has no JSON-RPC batching
+            self.batcher.batch_supported = False
 
     async def connect(self):
         """
         Connect to MCP server and discover tools, resources, and prompts.
+        The three list calls run concurrently; fresh entries from the capability
+        cache are used without a round trip. A failed list call leaves that
+        capability kind empty instead of aborting the connection.
         """
-        self.session = aiohttp.ClientSession()
-        print(f"✅ Connected to MCP server at {self.server_url}")
+        if self.streamable is None:
+            # The Streamable HTTP session has its own pooled client
+            self.session = aiohttp.ClientSession()
+        logger.info("✅ Connected to MCP server at %s", self.server_url)
+
+        # Discover capabilities concurrently
+        self.connect_timings = {}
+        start = time.perf_counter()
+        self.tools, self.resources, self.prompts = await asyncio.gather(
+            self.discover("tools"),
+            self.discover("resources"),
+            self.discover("prompts"),
+        )
+        self.connect_timings["total"] = time.perf_counter() - start
+        for kind in ("tools", "resources", "prompts"):
+            self.registry.update(kind, getattr(self, kind))
 
-        # Discover capabilities
-        tools_resp = await self.send_request("tools/list")
-        self.tools = tools_resp.get("result", {}).get("tools", [])
+        if logger.isEnabledFor(logging.INFO):
+            breakdown = ", ".join(f"{kind} {secs * 1000:.0f} ms" for kind, secs in self.connect_timings.items())
+            logger.info("⏱️ Discovery time: %s", breakdown)
 
-        resources_resp = await self.send_request("resources/list")
-        self.resources = resources_resp.get("result", {}).get("resources", [])
+    async def discover(self, kind: str) -> list:
+        """
+        Return the `tools`, `resources` or `prompts` list, from cache when fresh.
+        Returns an empty list (not cached) when the list call fails.
+        """
+        async def fetch():
+            response = await self.send_request(f"{kind}/list")
+            if response is None or "error" in response:
+                raise RuntimeError(f"{kind}/list returned no result")
+            return response.get("result", {}).get(kind, [])
 
-        prompts_resp = await self.send_request("prompts/list")
-        self.prompts = prompts_resp.get("result", {}).get("prompts", [])
+        start = time.perf_counter()
+        try:
+            return await self.capability_cache.get_or_fetch(kind, fetch)
+        except Exception as e:
+            logger.warning("⚠️ Discovery of %s failed: %s", kind, e)
+            return []
+        finally:
+            self.connect_timings[kind] = time.perf_counter() - start
 
-    async def send_request(self, method: str, params: dict = None):
+    def invalidate_capabilities(self, kind: str = None):
         """
-        Send a JSON-RPC request to the MCP server.
+        Drop cached discovery results (all kinds when `kind` is None).
+        Invalidating resources also purges the cached resource contents.
         """
-        self.message_id += 1
-        msg_id = str(self.message_id)
+        self.capability_cache.invalidate(kind)
+        if kind in (None, "resources"):
+            self.resource_cache.purge()
+
+    def handle_notification(self, message: dict) -> bool:
+        """
+        Apply a server notification (`notifications/*/list_changed`,
+        `notifications/resources/updated`) to the local caches.
+        """
+        handled = self.capability_cache.handle_notification(message)
+        return self.resource_cache.handle_notification(message) or handled
 
-        request = {"jsonrpc": "2.0", "id": msg_id, "method": method}
+    def _build_request(self, method: str, params: dict = None) -> dict:
+        self.message_id += 1
+        request = {"jsonrpc": "2.0", "id": str(self.message_id), "method": method}
         if params:
             request["params"] = params
+        return request
 
-        async with self.session.post(
-            self.server_url,
-            json=request,
-            headers={"Content-Type": "application/json"},
-        ) as resp:
-            if resp.status != 200:
-                print(f"❌ Failed {method}: {resp.status}")
+    async def _post(self, payload, raise_transient: bool = False):
+        """
+        POST a JSON-RPC request object (or batch array); returns the decoded body or None.
+        With `raise_transient`, a retryable failure (429, 5xx, REQUEST_LIMIT_EXCEEDED)
+        raises TransientError instead, so the resilience layer can retry it.
+        A 401 with a token manager configured is resent once with a fresh token.
+        Waits for a slot of the request scheduler first (discovery in the background lane).
+        """
+        async with self.scheduler.slot(lane_for(payload)):
+            started = time.perf_counter()
+            if self.streamable is not None:
+                body = await self._post_session(payload, raise_transient)
+            else:
+                body = await self._post_http(payload, raise_transient)
+        if RECORDER.enabled and body is not None:
+            RECORDER.record("mcp", payload, body, time.perf_counter() - started)
+        return body
+
+    async def _post_http(self, payload, raise_transient: bool = False, retry_auth: bool = True):
+        headers = {"Content-Type": "application/json"}
+        token = None
+        if self.auth is not None:
+            token = await self.auth.get_token()
+            headers["Authorization"] = f"Bearer {token}"
+        async with self.session.post(self.server_url, data=CODEC.dumpb(payload), headers=headers) as resp:
+            self.scheduler.observe(resp.headers)
+            if resp.status == 401 and token is not None and retry_auth:
+                logger.warning("🔑 Access token rejected, fetching a new one")
+                self.auth.invalidate(token)
+            elif resp.status != 200:
+                label = payload.get("method") if isinstance(payload, dict) else f"batch of {len(payload)}"
+                logger.error("❌ Failed %s: %s", label, resp.status)
+                if raise_transient:
+                    error = transient_error(resp.status, await resp.text(), resp.headers.get("Retry-After"))
+                    if error is not None:
+                        raise error
                 return None
+            else:
+                method = payload.get("method") if isinstance(payload, dict) else None
+                return CODEC.decode_response(method, await resp.read())
+        return await self._post_http(payload, raise_transient, retry_auth=False)
 
-            response = await resp.json()
-            print(f"\n📥 Response for {method}:")
-            print(json.dumps(response, indent=2))
-            return response
+    async def _post_session(self, payload: dict, raise_transient: bool = False):
+        """`_post` over the Streamable HTTP session."""
+        try:
+            return await self.streamable.exchange(payload)
+        except TransientError as e:
+            logger.error("❌ Failed %s: %s", payload.get("method"), e)
+            if raise_transient:
+                raise
+        except httpx.HTTPStatusError as e:
+            logger.error("❌ Failed %s: %s", payload.get("method"), e.response.status_code)
+        except MCPError as e:
+            # The session could not be opened: `initialize` answered with an error
+            logger.error("❌ Failed %s: %s", payload.get("method"), e)
+        return None
+
+    async def _ping(self):
+        """Circuit breaker probe: one `ping` round trip, raising unless it succeeds."""
+        response = await self._post(self._build_request("ping"), raise_transient=True)
+        if response is None or "error" in response:
+            raise RuntimeError(f"ping failed: {response}")
+
+    async def send_request(self, method: str, params: dict = None):
+        """
+        Send a JSON-RPC request to the MCP server.
+        Idempotent methods are retried on transient failures and every call passes
+        the circuit breaker; returns None when the request ultimately failed.
+        Latency is recorded in `mcp_request_duration_seconds` when MCP_METRICS is on.
+        """
+        request = self._build_request(method, params)
+        response = await self._send(request)
+        if response is None:
+            return None
+
+        logger.debug("📥 Response for %s (id %s): %s", method, request["id"], Payload(response))
+        return response
+
+    async def _send(self, payload):
+        """
+        `_post` a request object or batch array through the resilience layer (retries
+        when every request in it is idempotent, circuit breaker) and time it in
+        `mcp_request_duration_seconds` (method `batch` for arrays); None on failure.
+        """
+        method = payload["method"] if isinstance(payload, dict) else "batch"
+        with METRICS.span("mcp_request_duration_seconds", client="mcp-client", method=method) as span:
+            try:
+                response = await self.resilience.call(
+                    method,
+                    lambda: self._post(payload, raise_transient=True),
+                    idempotent=is_idempotent(payload),
+                )
+            except (CircuitOpenError, *self.resilience.transient) as e:
+                logger.error("❌ %s failed: %s", method, e)
+                span.status = "error"
+                response = None
+            if response is None:
+                if span.status == "ok":
+                    span.status = "http_error"
+            elif isinstance(response, dict) and "error" in response:
+                span.status = "rpc_error"
+        return response
+
+    async def send_batch(self, calls: list) -> list:
+        """
+        Send several JSON-RPC calls, given as (method, params) tuples, in one POST.
+        Responses are matched back by id and returned in the order of `calls`
+        (None for a failed call). The POST is retried and passes the circuit breaker
+        like send_request. Falls back to bounded concurrent single requests when the
+        server does not support batches.
+        """
+        requests = [self._build_request(method, params) for method, params in calls]
+        logger.debug("📦 Sending %d requests as one batch", len(requests))
+        return await self.batcher.call_many(requests)
 
     async def orchestrate_llm(self, prompt: str, model: str = "gpt-4"):
         """
@@ -76,49 +300,70 @@ class MCPClient:
             "name": "...",
             "arguments": {...}
         }
+        or, when several capabilities are needed, a plan {"steps": [...]} of such
+        objects (see execute_plan). A prompt already answered for the same capabilities and model is served
+        from the decision cache without calling the LLM.
         """
-        print(f"\n💬 Sending prompt to OpenAI ({model})...")
+        fingerprint = capability_fingerprint(
+            model,
+            *(f"tool:{name}" for name in self.registry.tools),
+            *(f"resource:{name}" for name in self.registry.resources),
+        )
+        cached = self.decision_cache.get(prompt, fingerprint)
+        if cached is not None:
+            logger.info("💾 Orchestration decision served from cache: %s", cached)
+            return cached
+
+        logger.info("💬 Sending prompt to OpenAI (%s)...", model)
         loop = asyncio.get_event_loop()
+        started = time.perf_counter()
 
-        context = {
-            "tools": [t["name"] for t in self.tools],
-            "resources": [r["name"] for r in self.resources],
-        }
+        # Only the capabilities matching the prompt's keywords when the catalog is large
+        context = self.registry.candidates(prompt)
 
-        response = await loop.run_in_executor(
-            None,
-            lambda: openai_client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are an orchestrator. "
-                            "Given user request and available MCP tools/resources, "
-                            "always respond in pure JSON ONLY with fields: "
-                            "'type' ('tool' or 'resource'), 'name', and 'arguments'. "
-                            "Use 'arguments' only for tools that require parameters."
-                        )
-                    },
-                    {
-                        "role": "assistant",
-                        "content": f"Available capabilities:\n{json.dumps(context, indent=2)}"
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0,
-                max_tokens=300
-            )
+        completion = dict(
+            model=model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "You are an orchestrator. "
+                        "Given user request and available MCP tools/resources, "
+                        "always respond in pure JSON ONLY with fields: "
+                        "'type' ('tool' or 'resource'), 'name', and 'arguments'. "
+                        "Use 'arguments' only for tools that require parameters. "
+                        "If the request needs several tools/resources, respond with "
+                        "{\"steps\": [...]} instead, one such object per call; a step may add "
+                        "an 'id' and 'depends_on' (ids of steps that must run first)."
+                    )
+                },
+                {
+                    "role": "assistant",
+                    "content": f"Available capabilities:\n{json.dumps(context, indent=2)}"
+                },
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0,
+            max_tokens=300
         )
+        response = await loop.run_in_executor(None, lambda: openai_client.chat.completions.create(**completion))
+        if RECORDER.enabled:
+            RECORDER.record("llm", completion, response.model_dump(mode="json"), time.perf_counter() - started)
 
         output = response.choices[0].message.content.strip()
-        print(f"\n🤖 OpenAI LLM Raw Output:\n{output}")
+        logger.info("🤖 OpenAI LLM Raw Output: %s", output)
 
         try:
             instructions = json.loads(output)
+            steps = normalize_plan(instructions)
+            if all(self.registry.tool(s["name"]) or self.registry.resource(s["name"]) for s in steps):
+                self.decision_cache.put(prompt, fingerprint, instructions)
             return instructions
         except json.JSONDecodeError:
-            print("❌ LLM output is not valid JSON.")
+            logger.error("❌ LLM output is not valid JSON.")
+            return None
+        except ValueError as e:
+            logger.error("❌ LLM output is not a valid plan: %s", e)
             return None
 
     async def execute_capability(self, request: dict):
@@ -126,7 +371,7 @@ class MCPClient:
         Execute a tool or resource dynamically based on LLM instructions.
         """
         if not request or "type" not in request or "name" not in request:
-            print("⚠️ No valid tool/resource request found.")
+            logger.warning("⚠️ No valid tool/resource request found.")
             return None
 
         type_ = request["type"]
@@ -134,42 +379,91 @@ class MCPClient:
         arguments = request.get("arguments", {})
 
         if type_ == "tool":
-            if name not in [t["name"] for t in self.tools]:
-                print(f"❌ Tool '{name}' not found in MCP capabilities.")
+            if self.registry.tool(name) is None:
+                logger.error("❌ Tool '%s' not found in MCP capabilities.", name)
                 return None
             response = await self.send_request(
                 "tools/call",
                 {"name": name, "arguments": arguments}
             )
-            print(f"\n🔧 Tool Execution Result:\n{json.dumps(response, indent=2)}")
+            logger.info("🔧 Tool '%s' executed", name)
             return response
 
         elif type_ == "resource":
-            # Find the resource by name
-            resource = next((r for r in self.resources if r["name"] == name), None)
-            if not resource:
-                print(f"❌ Resource '{name}' not found in MCP capabilities.")
+            # Find the resource by name, or accept a URI served by a known resource or template
+            resource = self.registry.resource(name)
+            uri = resource.get("uri") if resource else None
+            if uri is None and self.registry.resource_for_uri(name) is not None:
+                uri = name
+            if not uri:
+                logger.error("❌ Resource '%s' not found in MCP capabilities.", name)
                 return None
 
-            # Use the real URI from resource definition
-            uri = resource.get("uri")
-            response = await self.send_request(
-                "resources/read",
-                {"uri": uri}
+            response = await self.resource_cache.get_or_fetch(
+                uri,
+                lambda: self.send_request("resources/read", {"uri": uri}),
+                cacheable=lambda r: r is not None and "error" not in r,
             )
-            print(f"\n📦 Resource Fetch Result:\n{json.dumps(response, indent=2)}")
+            logger.info("📦 Resource '%s' fetched from %s", name, uri)
             return response
 
         else:
-            print(f"❌ Unknown capability type: '{type_}'")
+            logger.error("❌ Unknown capability type: '%s'", type_)
             return None
 
+    async def execute_plan(self, plan):
+        """
+        Execute an orchestrator decision: a single capability, a list of them or a
+        plan {"steps": [...]} with `depends_on` edges. Independent steps run
+        concurrently (MCP_PLAN_MAX_WORKERS at a time, MCP_PLAN_STEP_TIMEOUT seconds
+        each). A single capability returns its response as execute_capability();
+        a plan returns {"steps": [{id, type, name, status, result|error, elapsed}]}.
+        """
+        try:
+            steps = normalize_plan(plan)
+        except ValueError as e:
+            logger.warning("⚠️ Invalid plan: %s", e)
+            return None
+        if len(steps) == 1:
+            return await self.execute_capability(steps[0])
+
+        async def run_step(step):
+            response = await self.execute_capability(step)
+            if response is None:
+                raise RuntimeError(f"{step['type']} '{step['name']}' failed")
+            return response
+
+        started = time.perf_counter()
+        outcomes = await self.plan_executor.execute(steps, run_step)
+        logger.info("🗺️ Plan of %d steps finished in %.3fs", len(steps), time.perf_counter() - started)
+        return {"steps": outcomes}
+
+    async def invoke(self, prompt: str, model: str = "gpt-4"):
+        """
+        Handle one user request: orchestrate it with the LLM (or the decision cache)
+        and execute the resulting capability or plan. Returns what execute_plan()
+        returns, or None when no decision was made. With MCP_RECORD the whole request
+        is recorded as one `prompt` exchange, as LLMBackedAgent.invoke does.
+        """
+        started = time.perf_counter()
+        result = None
+        instructions = await self.orchestrate_llm(prompt, model)
+        if instructions:
+            result = await self.execute_plan(instructions)
+        if RECORDER.enabled:
+            RECORDER.record("prompt", {"client": "mcp-client", "text": prompt}, None, time.perf_counter() - started)
+        return result
+
     async def close(self):
         """
-        Close the aiohttp session if open.
+        Close the aiohttp session if open, end the MCP session, and stop the token refresh.
         """
         if self.session:
             await self.session.close()
+        if self.streamable is not None:
+            await self.streamable.aclose()
+        if self.auth is not None:
+            await self.auth.aclose()
 
 
 async def main():
@@ -180,16 +474,14 @@ async def main():
     - Executes tool or resource dynamically
     - Closes the session
     """
+    configure_logging()
     client = MCPClient(os.getenv("MCP_SERVER_URL"))
     try:
         await client.connect()
 
-        # Step 1: Ask LLM for instructions
-        instructions = await client.orchestrate_llm("Show me the catalog of products.")
-
-        # Step 2: Execute the capability (tool or resource)
-        if instructions:
-            await client.execute_capability(instructions)
+        result = await client.invoke("Show me the catalog of products.")
+        if result is not None:
+            print(json.dumps(result, indent=2))
 
     finally:
         await client.close()
@@ -0,0 +1,57 @@
+"""
+Shared building blocks for the Python MCP clients in this repository
+(`client/mcp-client.py` and the A2A agent in `agent-to-agent/`).
+"""
+from .auth import AuthError, TokenManager
+from .batching import JSONRPCBatcher
+from .capability_cache import CapabilityCache
+from .cassette import RECORDER, CassetteRecorder, load_cassette
+from .codec import CODEC, JSONCodec
+from .decision_cache import DecisionCache, capability_fingerprint, normalize_text
+from .log import Payload, configure_logging
+from .metrics import METRICS, MetricsRegistry
+from .plan import PlanExecutor, normalize_plan
+from .registry import CapabilityRegistry
+from .resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, TransientError, is_idempotent
+from .resource_cache import ResourceCache
+from .scheduler import SCHEDULER, RequestScheduler, lane_for
+from .streamable_http import StreamableHTTPTransport, create_transport
+from .streaming import JSONArrayStreamParser, SSEParser
+from .transport import MCPError, MCPTransport
+
+__all__ = [
+    "AuthError",
+    "CODEC",
+    "CapabilityCache",
+    "CapabilityRegistry",
+    "CassetteRecorder",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "DecisionCache",
+    "JSONRPCBatcher",
+    "JSONArrayStreamParser",
+    "JSONCodec",
+    "MCPError",
+    "MCPTransport",
+    "METRICS",
+    "MetricsRegistry",
+    "Payload",
+    "PlanExecutor",
+    "RECORDER",
+    "RequestScheduler",
+    "ResilientCaller",
+    "ResourceCache",
+    "SCHEDULER",
+    "SSEParser",
+    "StreamableHTTPTransport",
+    "TokenManager",
+    "TransientError",
+    "capability_fingerprint",
+    "configure_logging",
+    "create_transport",
+    "is_idempotent",
+    "lane_for",
+    "load_cassette",
+    "normalize_plan",
+    "normalize_text",
+]
@@ -0,0 +1,232 @@
+import asyncio
+import base64
+import json
+import logging
+import os
+import time
+
+import httpx
+
+try:
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+    CRYPTOGRAPHY_AVAILABLE = True
+except ImportError:
+    CRYPTOGRAPHY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+JWT_BEARER_GRANT = "urn:ietf:params:oauth:grant-type:jwt-bearer"
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def sign_jwt(claims: dict, private_key_pem: bytes) -> str:
+    """Encode and RS256-sign `claims` (needs the optional `cryptography` package)."""
+    if not CRYPTOGRAPHY_AVAILABLE:
+        raise RuntimeError("The JWT bearer flow needs the 'cryptography' package")
+    header = _b64url(json.dumps({"alg": "RS256", "typ": "JWT"}, separators=(",", ":")).encode())
+    payload = _b64url(json.dumps(claims, separators=(",", ":")).encode())
+    signing_input = f"{header}.{payload}".encode("ascii")
+    key = serialization.load_pem_private_key(private_key_pem, password=None)
+    signature = key.sign(signing_input, padding.PKCS1v15(), hashes.SHA256())
+    return f"{header}.{payload}.{_b64url(signature)}"
+
+
+class AuthError(Exception):
+    """The token endpoint refused to issue an access token."""
+
+
+class TokenManager:
+    """
+    Salesforce OAuth access tokens for the MCP transports:
+    - `client_credentials` flow (client id + secret) or `jwt` bearer flow
+      (client id + username + RS256 private key); the default is `jwt` when a
+      private key file is configured
+    - The token is cached in memory until it expires. Salesforce does not always
+      report a lifetime, so `token_ttl` (env MCP_AUTH_TOKEN_TTL, default 3600 s)
+      is used when the response has no `expires_in`
+    - A background task refreshes the token `refresh_margin` seconds before it
+      expires (env MCP_AUTH_REFRESH_MARGIN, default 300), so requests never wait
+      for the token endpoint in steady state
+    - Concurrent callers share a single refresh (single-flight)
+    - `invalidate()` after a 401 makes the next caller fetch a new token
+
+    Token requests reuse one pooled httpx client. See `from_env()` for the
+    MCP_AUTH_* variables.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str = None,
+        login_url: str = "https://login.salesforce.com",
+        flow: str = None,
+        username: str = None,
+        private_key: bytes = None,
+        token_ttl: float = None,
+        refresh_margin: float = None,
+        clock=time.time,
+    ):
+        if flow is None:
+            flow = "jwt" if private_key else "client_credentials"
+        if flow not in ("client_credentials", "jwt"):
+            raise ValueError(f"Unsupported OAuth flow '{flow}'")
+        if token_ttl is None:
+            token_ttl = float(os.getenv("MCP_AUTH_TOKEN_TTL", "3600"))
+        if refresh_margin is None:
+            refresh_margin = float(os.getenv("MCP_AUTH_REFRESH_MARGIN", "300"))
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.login_url = login_url.rstrip("/")
+        self.flow = flow
+        self.username = username
+        self.private_key = private_key
+        self.token_ttl = token_ttl
+        self.refresh_margin = refresh_margin
+        self.clock = clock
+        self.access_token = None
+        self.instance_url = None
+        self.issued_at = 0.0
+        self.expires_at = 0.0
+        self.refreshes = 0
+        self._http = None
+        self._inflight = None  # asyncio.Future of the running refresh
+        self._refresher = None  # background refresh task
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build a TokenManager from MCP_AUTH_CLIENT_ID, MCP_AUTH_CLIENT_SECRET,
+        MCP_AUTH_LOGIN_URL, MCP_AUTH_FLOW, MCP_AUTH_USERNAME and
+        MCP_AUTH_PRIVATE_KEY_FILE; returns None when no client id is set.
+        """
+        client_id = os.getenv("MCP_AUTH_CLIENT_ID")
+        if not client_id:
+            return None
+        private_key = None
+        if os.getenv("MCP_AUTH_PRIVATE_KEY_FILE"):
+            with open(os.getenv("MCP_AUTH_PRIVATE_KEY_FILE"), "rb") as f:
+                private_key = f.read()
+        return cls(
+            client_id,
+            client_secret=os.getenv("MCP_AUTH_CLIENT_SECRET"),
+            login_url=os.getenv("MCP_AUTH_LOGIN_URL", "https://login.salesforce.com"),
+            flow=os.getenv("MCP_AUTH_FLOW") or None,
+            username=os.getenv("MCP_AUTH_USERNAME"),
+            private_key=private_key,
+        )
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(timeout=30.0)
+        return self._http
+
+    def _grant(self) -> dict:
+        if self.flow == "client_credentials":
+            return {
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+            }
+        assertion = sign_jwt(
+            {
+                "iss": self.client_id,
+                "sub": self.username,
+                "aud": self.login_url,
+                "exp": int(self.clock()) + 180,
+            },
+            self.private_key,
+        )
+        return {"grant_type": JWT_BEARER_GRANT, "assertion": assertion}
+
+    async def _fetch(self) -> str:
+        resp = await self.http.post(f"{self.login_url}/services/oauth2/token", data=self._grant())
+        body = resp.json() if resp.content else {}
+        if resp.status_code != 200 or "access_token" not in body:
+            raise AuthError(f"Token request failed ({resp.status_code}): {body.get('error_description') or body}")
+        self.access_token = body["access_token"]
+        self.instance_url = body.get("instance_url")
+        self.issued_at = self.clock()
+        self.expires_at = self.issued_at + float(body.get("expires_in") or self.token_ttl)
+        self.refreshes += 1
+        logger.info("Obtained Salesforce access token (%s flow), valid for %.0fs", self.flow, self.expires_at - self.clock())
+        self._schedule_refresh()
+        return self.access_token
+
+    async def refresh(self) -> str:
+        """Fetch a new token; concurrent callers wait for the same request."""
+        inflight = self._inflight
+        if inflight is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The leading caller was cancelled: fetch it ourselves
+                return await self.refresh()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight = future
+        try:
+            token = await self._fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight = None
+        future.set_result(token)
+        return token
+
+    async def get_token(self) -> str:
+        """Return a valid access token, fetching one only when none is cached."""
+        if self.access_token is not None and self.clock() < self.expires_at:
+            return self.access_token
+        return await self.refresh()
+
+    async def headers(self) -> dict:
+        return {"Authorization": f"Bearer {await self.get_token()}"}
+
+    def invalidate(self, token: str = None):
+        """Forget the cached token (only if it is still `token`, when given)."""
+        if token is None or token == self.access_token:
+            self.access_token = None
+            self.expires_at = 0.0
+
+    def _schedule_refresh(self):
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        retry_delay = 5.0
+        while True:
+            # Short-lived tokens are refreshed at half their lifetime at the latest
+            margin = min(self.refresh_margin, (self.expires_at - self.issued_at) / 2)
+            await asyncio.sleep(max(0.0, self.expires_at - margin - self.clock()))
+            try:
+                await self.refresh()
+                retry_delay = 5.0
+            except Exception as e:
+                if self.clock() >= self.expires_at:
+                    logger.error("Background token refresh failed, token expired: %s", e)
+                    return
+                logger.warning("Background token refresh failed, retrying in %.0fs: %s", retry_delay, e)
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 60.0)
+
+    async def aclose(self):
+        """Stop the background refresh and close the token endpoint connections."""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
@@ -0,0 +1,93 @@
+import asyncio
+
+
+class JSONRPCBatcher:
+    """
+    Packs JSON-RPC requests into array POSTs and routes replies back by id:
+    - Requests submitted in the same event-loop tick go out as one batch
+    - Each caller awaits a future that is resolved with the reply carrying its `id`
+    - Servers that cannot do batches (the Apex server answers an array with a
+      single error object; MCP 2025-06-18 dropped batching) are detected once,
+      after which requests are sent one by one with bounded concurrency. A failed
+      POST only fails the calls of that batch
+
+    `post(payload)` is an async callable that POSTs a JSON payload and returns the
+    decoded body, or None when the HTTP call failed.
+    """
+
+    def __init__(self, post, max_batch_size: int = 50, max_concurrency: int = 8):
+        self.post = post
+        self.max_batch_size = max_batch_size
+        self.batch_supported = True
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending = []  # [(request, future)]
+        self._flush_scheduled = False
+        self._tasks = set()  # in-flight batch sends (keeps strong references)
+
+    async def call(self, request: dict):
+        """Queue one JSON-RPC request and wait for its reply (None on failure)."""
+        if not self.batch_supported:
+            return await self._send_single(request)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((request, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+        return await future
+
+    async def call_many(self, requests: list) -> list:
+        """Send many JSON-RPC requests in one round trip; replies keep the input order."""
+        return list(await asyncio.gather(*(self.call(r) for r in requests)))
+
+    def _flush(self):
+        self._flush_scheduled = False
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send_batch(self, batch: list):
+        if len(batch) == 1:
+            request, future = batch[0]
+            await self._resolve(future, self._send_single(request))
+            return
+        try:
+            replies = await self.post([request for request, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if isinstance(replies, dict):
+            # One error object for the whole array: the server does not understand
+            # batches. Remember it and resend one by one
+            self.batch_supported = False
+            await asyncio.gather(*(self._resolve(future, self._send_single(request)) for request, future in batch))
+            return
+        if replies is None:
+            # The HTTP call failed (e.g. 503): says nothing about batch support
+            replies = []
+
+        by_id = {str(reply.get("id")): reply for reply in replies if isinstance(reply, dict)}
+        for request, future in batch:
+            if not future.done():
+                future.set_result(by_id.get(str(request.get("id"))))
+
+    async def _send_single(self, request: dict):
+        async with self._semaphore:
+            return await self.post(request)
+
+    @staticmethod
+    async def _resolve(future, coro):
+        try:
+            result = await coro
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
@@ -0,0 +1,118 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# `notifications/<kind>/list_changed` -> capability kind to drop
+LIST_CHANGED_NOTIFICATIONS = {
+    "notifications/tools/list_changed": "tools",
+    "notifications/resources/list_changed": "resources",
+    "notifications/prompts/list_changed": "prompts",
+}
+
+
+class CapabilityCache:
+    """
+    Cache for MCP discovery results (`tools/list`, `resources/list`, `prompts/list`):
+    - Entries expire after `ttl` seconds (env MCP_CAPABILITY_TTL, default 300)
+    - `invalidate()` drops entries explicitly; `handle_notification()` does it for
+      the `notifications/*/list_changed` messages a `listChanged: true` server sends
+    - Concurrent misses for the same kind share a single fetch
+    - Optional JSON snapshot on disk (env MCP_CAPABILITY_SNAPSHOT) for warm starts
+    """
+
+    KINDS = ("tools", "resources", "prompts")
+
+    def __init__(self, ttl: float = None, snapshot_path: str = None, clock=time.time):
+        if ttl is None:
+            ttl = float(os.getenv("MCP_CAPABILITY_TTL", "300"))
+        self.ttl = ttl
+        self.snapshot_path = snapshot_path
+        self.clock = clock
+        self._entries = {}  # {kind: (stored_at, items)}
+        self._locks = {}  # {kind: asyncio.Lock}
+        if snapshot_path:
+            self.load_snapshot()
+
+    def get(self, kind: str):
+        """Return the cached list for `kind`, or None when missing or expired."""
+        entry = self._entries.get(kind)
+        if entry is None:
+            return None
+        stored_at, items = entry
+        if self.ttl and self.clock() - stored_at > self.ttl:
+            del self._entries[kind]
+            return None
+        return items
+
+    def set(self, kind: str, items: list):
+        self._entries[kind] = (self.clock(), items)
+        if self.snapshot_path:
+            self.save_snapshot()
+
+    def invalidate(self, kind: str = None):
+        """Drop one capability kind, or everything when `kind` is None."""
+        if kind is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(kind, None)
+        if self.snapshot_path:
+            self.save_snapshot()
+
+    def handle_notification(self, message: dict) -> bool:
+        """Invalidate on a `notifications/*/list_changed` message; return True if handled."""
+        kind = LIST_CHANGED_NOTIFICATIONS.get((message or {}).get("method"))
+        if kind is None:
+            return False
+        self.invalidate(kind)
+        return True
+
+    async def get_or_fetch(self, kind: str, fetch) -> list:
+        """
+        Return the cached list for `kind`, calling `await fetch()` on a miss.
+        Failed fetches are not cached.
+        """
+        items = self.get(kind)
+        if items is not None:
+            return items
+        lock = self._locks.setdefault(kind, asyncio.Lock())
+        async with lock:
+            # Another caller may have filled the entry while we waited
+            items = self.get(kind)
+            if items is None:
+                items = await fetch()
+                self.set(kind, items)
+            return items
+
+    def load_snapshot(self):
+        """Load unexpired entries from the on-disk snapshot, if present."""
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return
+        for kind, entry in snapshot.get("entries", {}).items():
+            self._entries[kind] = (entry["stored_at"], entry["items"])
+
+    def save_snapshot(self):
+        """Atomically write the current entries to the snapshot file."""
+        snapshot = {
+            "entries": {
+                kind: {"stored_at": stored_at, "items": items}
+                for kind, (stored_at, items) in self._entries.items()
+            }
+        }
+        # One temporary file per process: A2A workers started together save the same snapshot
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logger.warning("Failed to write capability snapshot '%s': %s", self.snapshot_path, e)
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
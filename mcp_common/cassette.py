@@ -0,0 +1,90 @@
+import atexit
+import gzip
+import os
+import time
+
+from .codec import CODEC
+
+FORMAT_VERSION = 1
+KINDS = ("mcp", "llm", "prompt")
+
+
+def _open(path: str, mode: str):
+    return gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)
+
+
+class CassetteRecorder:
+    """
+    Records what the clients exchange with Salesforce and OpenAI into a cassette,
+    so a session can be replayed offline (`benchmarks/replay_server.py`):
+    - One JSON object per line, gzip-compressed when the path ends in `.gz`: a header
+      `{"cassette": 1, "started": <epoch>}`, then one line per exchange
+      `{"kind", "at", "duration", "request", "response"}`; `at` is when the exchange
+      started (seconds since the recording started), `duration` the round trip as
+      seen by the client
+    - Kinds: `mcp` (a JSON-RPC request or batch and its decoded reply), `llm` (the chat
+      completion arguments and the completion) and `prompt` (a user request with the
+      client that handled it, `mcp-client` or `agent`, and how long that took)
+    - Only exchanges that got a reply are recorded
+    - Enabled by env MCP_RECORD=<path> or `start(path)`; otherwise `enabled` is false
+      and instrumented code pays one attribute check
+    - One process per cassette: `start()` truncates the file, so the A2A server
+      refuses MCP_RECORD with several workers
+    """
+
+    def __init__(self, path: str = None):
+        self.path = None
+        self.enabled = False
+        self.entries = 0
+        self._file = None
+        self._clock = 0.0
+        if path:
+            self.start(path)
+
+    def start(self, path: str):
+        """Start a new cassette at `path` (replacing the file), closing the current one."""
+        self.close()
+        self._file = _open(path, "wb")
+        self._clock = time.perf_counter()
+        self.path = path
+        self.entries = 0
+        self._write({"cassette": FORMAT_VERSION, "started": time.time()})
+        self.enabled = True
+
+    def record(self, kind: str, request, response, duration: float):
+        """Append one exchange that took `duration` seconds and has just finished."""
+        if not self.enabled:
+            return
+        at = time.perf_counter() - self._clock - duration
+        self._write({
+            "kind": kind,
+            "at": round(max(at, 0.0), 6),
+            "duration": round(duration, 6),
+            "request": request,
+            "response": response,
+        })
+        self.entries += 1
+
+    def _write(self, entry: dict):
+        self._file.write(CODEC.dumpb(entry, default=str) + b"\n")
+
+    def close(self):
+        """Flush and close the cassette; recording stops."""
+        self.enabled = False
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load_cassette(path: str) -> list:
+    """The exchanges recorded in the cassette at `path`, in recording order."""
+    with _open(path, "rb") as f:
+        lines = [line for line in f if line.strip()]
+    header = CODEC.loads(lines[0]) if lines else {}
+    if header.get("cassette") != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} cassette")
+    return [CODEC.loads(line) for line in lines[1:]]
+
+
+RECORDER = CassetteRecorder(os.getenv("MCP_RECORD"))
+atexit.register(RECORDER.close)
@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+from typing import Any, List, Union
+
+try:
+    from typing import NotRequired, TypedDict
+except ImportError:
+    # Python 3.10: NotRequired keys need the typing_extensions TypedDict
+    from typing_extensions import NotRequired, TypedDict
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+# Result shapes written by Method.cls (toolsList, resourcesList, resourcesRead, toolsCall, promptsList)
+
+class ToolInfo(TypedDict):
+    name: str
+    title: NotRequired[str]
+    description: str
+    inputSchema: dict
+
+
+class ResourceInfo(TypedDict):
+    uri: NotRequired[str]
+    uriTemplate: NotRequired[str]
+    name: str
+    title: NotRequired[str]
+    description: NotRequired[str]
+    mimeType: NotRequired[str]
+
+
+class ResourceContent(TypedDict):
+    uri: str
+    mimeType: NotRequired[str]
+    text: NotRequired[str]
+    blob: NotRequired[str]
+
+
+class TextContent(TypedDict):
+    type: str
+    text: str
+
+
+class PromptInfo(TypedDict):
+    name: str
+    title: NotRequired[str]
+    description: NotRequired[str]
+    arguments: NotRequired[List[dict]]
+
+
+class ToolsListResult(TypedDict):
+    tools: List[ToolInfo]
+
+
+class ResourcesListResult(TypedDict):
+    resources: List[ResourceInfo]
+
+
+class ResourceTemplatesListResult(TypedDict):
+    resourceTemplates: List[ResourceInfo]
+
+
+class ResourcesReadResult(TypedDict):
+    contents: List[ResourceContent]
+
+
+class ToolsCallResult(TypedDict):
+    content: List[TextContent]
+    isError: NotRequired[bool]
+
+
+class PromptsListResult(TypedDict):
+    prompts: List[PromptInfo]
+
+
+class RPCErrorObject(TypedDict):
+    code: int
+    message: str
+    data: NotRequired[Any]
+
+
+RESULT_TYPES = {
+    "tools/list": ToolsListResult,
+    "tools/call": ToolsCallResult,
+    "resources/list": ResourcesListResult,
+    "resources/templates/list": ResourceTemplatesListResult,
+    "resources/read": ResourcesReadResult,
+    "prompts/list": PromptsListResult,
+}
+
+
+def _response_type(name: str, result_type) -> type:
+    """JSON-RPC response envelope whose `result` has the shape `result_type`."""
+    return TypedDict(
+        name,
+        {
+            "jsonrpc": str,
+            "id": Union[int, str, None],
+            "result": NotRequired[result_type],
+            "error": NotRequired[RPCErrorObject],
+        },
+    )
+
+
+RESPONSE_TYPES = {
+    method: _response_type(result_type.__name__.replace("Result", "Response"), result_type)
+    for method, result_type in RESULT_TYPES.items()
+}
+
+
+class JSONCodec:
+    """
+    JSON encoding and decoding of MCP and A2A payloads:
+    - Backend `orjson`, `msgspec` or the stdlib `json`, chosen by `backend` or env
+      MCP_JSON_CODEC (default `auto`: orjson, else msgspec, else json)
+    - `loads()` takes bytes or str; `dumpb()` encodes compact UTF-8 straight to
+      bytes for the HTTP body, `dumps()` returns str. All backends produce plain
+      dicts and lists, so callers do not depend on the backend
+    - `decode_response(method, data)` decodes a JSON-RPC reply. With msgspec and
+      DEBUG logging the `result` is also validated against its typed shape
+      (RESULT_TYPES) and a mismatch is logged; that second pass is skipped
+      otherwise. The value returned is always the untyped decode, so fields the
+      shape does not declare are kept
+
+    Invalid JSON raises ValueError (json.JSONDecodeError for `json` and `orjson`).
+    """
+
+    def __init__(self, backend: str = None):
+        if backend is None:
+            backend = os.getenv("MCP_JSON_CODEC", "auto").strip().lower() or "auto"
+        if backend not in ("auto", "msgspec", "orjson", "json"):
+            raise ValueError(f"Unknown JSON codec '{backend}'")
+        # orjson decodes untyped replies fastest; msgspec is only ahead when decoding typed structs
+        available = {"orjson": ORJSON_AVAILABLE, "msgspec": MSGSPEC_AVAILABLE, "json": True}
+        if backend == "auto":
+            backend = next(name for name, installed in available.items() if installed)
+        elif not available[backend]:
+            logger.warning("JSON codec '%s' is not installed, using the standard library", backend)
+            backend = "json"
+        self.backend = backend
+        if backend == "msgspec":
+            self._decoder = msgspec.json.Decoder()
+            self._encoder = msgspec.json.Encoder()
+
+    def loads(self, data: Union[bytes, str]):
+        if self.backend == "orjson":
+            return orjson.loads(data)
+        if self.backend == "msgspec":
+            return self._decoder.decode(data)
+        return json.loads(data)
+
+    def dumpb(self, obj, default=None) -> bytes:
+        """Compact UTF-8 JSON; `default(obj)` converts otherwise unsupported values."""
+        if self.backend == "orjson":
+            return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+        if self.backend == "msgspec":
+            if default is not None:
+                return msgspec.json.encode(obj, enc_hook=default)
+            return self._encoder.encode(obj)
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=default).encode()
+
+    def dumps(self, obj, default=None) -> str:
+        if self.backend == "json":
+            return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=default)
+        return self.dumpb(obj, default).decode()
+
+    def decode_response(self, method: str, data: Union[bytes, str]):
+        """Decode the reply to a `method` request (a batch reply is not validated)."""
+        body = self.loads(data)
+        if (
+            self.backend == "msgspec"
+            and method in RESPONSE_TYPES
+            and isinstance(body, dict)
+            and logger.isEnabledFor(logging.DEBUG)
+        ):
+            try:
+                # Validation only: the typed copy would drop undeclared keys
+                msgspec.convert(body, RESPONSE_TYPES[method])
+            except msgspec.ValidationError as e:
+                logger.debug("%s reply does not match %s: %s", method, RESULT_TYPES[method].__name__, e)
+        return body
+
+
+CODEC = JSONCodec()
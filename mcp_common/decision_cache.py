@@ -0,0 +1,130 @@
+import copy
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(_NON_WORD.sub(" ", (text or "").lower()).split())
+
+
+def capability_fingerprint(*names) -> str:
+    """Stable digest of a set of capability names (order-insensitive)."""
+    digest = hashlib.sha1()
+    for name in sorted(str(n) for n in names):
+        digest.update(name.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _has_arguments(decision) -> bool:
+    """True when the decision, or any step of a plan decision, carries arguments."""
+    if isinstance(decision, dict) and "steps" in decision:
+        decision = decision["steps"]
+    if isinstance(decision, list):
+        return any(_has_arguments(step) for step in decision)
+    return bool(decision.get("arguments"))
+
+
+class DecisionCache:
+    """
+    LRU cache of orchestrator decisions (`{type, name, arguments}` or a plan), so repeated
+    user intents skip the LLM call entirely:
+    - Keyed on normalized user text plus a fingerprint of the available capabilities,
+      so a changed tool/resource list never serves an outdated decision
+    - Bounded by `max_size` (env MCP_DECISION_CACHE_SIZE, default 1024, 0 disables)
+      with least-recently-used eviction, and by `ttl` seconds (env MCP_DECISION_CACHE_TTL)
+    - Optional fuzzy matching (env MCP_DECISION_FUZZY_THRESHOLD, e.g. 0.8): on an
+      exact miss, the entry with the highest token-set (Jaccard) similarity above the
+      threshold is reused. Only decisions without arguments are matched fuzzily,
+      because arguments are usually taken from the exact wording
+    - Hit/miss counters in `stats()`
+    """
+
+    def __init__(self, max_size: int = None, ttl: float = None, fuzzy_threshold: float = None, clock=time.monotonic):
+        if max_size is None:
+            max_size = int(os.getenv("MCP_DECISION_CACHE_SIZE", "1024"))
+        if ttl is None:
+            ttl = float(os.getenv("MCP_DECISION_CACHE_TTL", "3600"))
+        if fuzzy_threshold is None and os.getenv("MCP_DECISION_FUZZY_THRESHOLD"):
+            fuzzy_threshold = float(os.getenv("MCP_DECISION_FUZZY_THRESHOLD"))
+        self.max_size = max_size
+        self.ttl = ttl
+        self.fuzzy_threshold = fuzzy_threshold
+        self.clock = clock
+        self._entries = OrderedDict()  # {(fingerprint, text): (stored_at, tokens, decision)}
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, stored_at: float) -> bool:
+        return bool(self.ttl) and self.clock() - stored_at > self.ttl
+
+    def get(self, text: str, fingerprint: str):
+        """Return a copy of the cached decision for `text`, or None."""
+        if self.max_size <= 0:
+            return None
+        key = (fingerprint, normalize_text(text))
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry[0]):
+            del self._entries[key]
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[2])
+
+        if self.fuzzy_threshold:
+            match = self._fuzzy_lookup(key)
+            if match is not None:
+                self._entries.move_to_end(match)
+                self.fuzzy_hits += 1
+                return copy.deepcopy(self._entries[match][2])
+
+        self.misses += 1
+        return None
+
+    def _fuzzy_lookup(self, key):
+        fingerprint, text = key
+        tokens = frozenset(text.split())
+        if not tokens:
+            return None
+        best_key, best_score = None, self.fuzzy_threshold
+        for candidate, (stored_at, candidate_tokens, decision) in self._entries.items():
+            if candidate[0] != fingerprint or _has_arguments(decision) or self._expired(stored_at):
+                continue
+            score = len(tokens & candidate_tokens) / len(tokens | candidate_tokens)
+            if score >= best_score:
+                best_key, best_score = candidate, score
+        return best_key
+
+    def put(self, text: str, fingerprint: str, decision: dict):
+        if self.max_size <= 0 or not decision:
+            return
+        normalized = normalize_text(text)
+        key = (fingerprint, normalized)
+        self._entries[key] = (self.clock(), frozenset(normalized.split()), copy.deepcopy(decision))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.fuzzy_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.fuzzy_hits) / lookups if lookups else 0.0,
+        }
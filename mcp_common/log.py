@@ -0,0 +1,97 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+
+from .codec import CODEC
+
+# Maximum characters of a JSON payload rendered into a log message
+PAYLOAD_LIMIT = int(os.getenv("MCP_LOG_PAYLOAD_LIMIT", "2000"))
+
+_encoder = json.JSONEncoder(ensure_ascii=False, default=str)
+_listener = None  # background thread writing queued log records
+
+
+class Payload:
+    """
+    Lazy, truncated JSON rendering of a request/response body for log messages:
+    - Nothing is serialized unless the log record is actually emitted
+    - Serialization stops once `limit` characters have been produced
+
+    Use as a %-style argument: `logger.debug("Response: %s", Payload(response))`.
+    """
+
+    __slots__ = ("payload", "limit")
+
+    def __init__(self, payload, limit: int = None):
+        self.payload = payload
+        self.limit = PAYLOAD_LIMIT if limit is None else limit
+
+    def __str__(self):
+        chunks = []
+        size = 0
+        for chunk in _encoder.iterencode(self.payload):
+            chunks.append(chunk)
+            size += len(chunk)
+            if self.limit and size > self.limit:
+                return "".join(chunks)[: self.limit] + " …(truncated)"
+        return "".join(chunks)
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per line; fields passed as `extra={"mcp": {...}}` are merged in.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "mcp", None) or {})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return CODEC.dumps(entry, default=str)
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(level: str = None, fmt: str = None):
+    """
+    Configure logging for an entry point (the clients never configure it on import):
+    - level from MCP_LOG_LEVEL (default INFO); WARNING or above is the quiet
+      production mode where no response body is ever serialized
+    - format from MCP_LOG_FORMAT: `text` (default) or `json`
+    - records are written by a background thread, so stdout never blocks the event loop
+    """
+    global _listener
+    level = (level or os.getenv("MCP_LOG_LEVEL", "INFO")).upper()
+    fmt = (fmt or os.getenv("MCP_LOG_FORMAT", "text")).lower()
+
+    handler = logging.StreamHandler()
+    if fmt == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    _stop_listener()
+    records = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, handler)
+    _listener.start()
+
+    queue_handler = logging.handlers.QueueHandler(records)
+    # Only the message is rendered on the caller's side; the real formatter runs in the listener
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(level=level, handlers=[queue_handler], force=True)
+
+
+atexit.register(_stop_listener)
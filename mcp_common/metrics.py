@@ -0,0 +1,176 @@
+import asyncio
+import bisect
+import os
+import time
+
+# Seconds; covers a fast cached hit up to a slow LLM completion
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """Prometheus-style histogram with a fixed label set."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # {label values: [bucket counts..., +Inf count, sum]}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Prometheus-style gauge with a fixed label set; holds the last value set."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # {label values: value}
+
+    def set(self, value: float, **labels):
+        self._values[tuple(str(labels.get(name, "")) for name in self.labelnames)] = value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Span:
+    """
+    Times one stage and records it in a histogram on exit. The `status` label is
+    whatever the caller assigned to `span.status` inside the block, else `ok`,
+    `error` when an exception escapes, or `cancelled` on cancellation (or a
+    stream closed early).
+    """
+
+    __slots__ = ("histogram", "labels", "status", "started")
+
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+        self.status = "ok"
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.status == "ok":
+            stopped = issubclass(exc_type, (asyncio.CancelledError, GeneratorExit))
+            self.status = "cancelled" if stopped else "error"
+        self.histogram.observe(time.perf_counter() - self.started, status=self.status, **self.labels)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+    status = "ok"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class MetricsRegistry:
+    """
+    In-process metrics for the MCP clients, exposed in the Prometheus text format:
+    - `span(metric, **labels)` times a block into the histogram `metric`
+      (labels: the given ones plus `status`)
+    - `gauge(name)` returns a gauge whose current values are rendered as they are
+    - `render()` returns the exposition text served by the A2A server on `/metrics`
+    - Disabled unless env MCP_METRICS is true; a disabled registry hands out one
+      shared no-op span, so instrumented code pays a single function call
+    """
+
+    def __init__(self, enabled: bool = None):
+        if enabled is None:
+            enabled = os.getenv("MCP_METRICS", "").strip().lower() in ("1", "true", "yes", "on")
+        self.enabled = enabled
+        self._histograms = {}
+        self._gauges = {}
+
+    def histogram(self, name: str, documentation: str = "", labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        """Return the histogram `name`, registering it on first use."""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = Histogram(name, documentation, labelnames, buckets)
+        return histogram
+
+    def gauge(self, name: str, documentation: str = "", labelnames: tuple = ()):
+        """Return the gauge `name`, registering it on first use."""
+        gauge = self._gauges.get(name)
+        if gauge is None:
+            gauge = self._gauges[name] = Gauge(name, documentation, labelnames)
+        return gauge
+
+    def span(self, metric: str, **labels):
+        if not self.enabled:
+            return _NOOP_SPAN
+        histogram = self._histograms.get(metric)
+        if histogram is None:
+            histogram = self.histogram(metric, metric, (*labels, "status"))
+        return Span(histogram, labels)
+
+    def render(self) -> str:
+        lines = []
+        metrics = {**self._histograms, **self._gauges}
+        for name in sorted(metrics):
+            lines.extend(metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+METRICS.histogram(
+    "mcp_request_duration_seconds",
+    "MCP JSON-RPC request latency by client, method and status",
+    ("client", "method", "status"),
+)
+METRICS.histogram(
+    "agent_stage_duration_seconds",
+    "LLMBackedAgent.invoke latency by stage and status",
+    ("stage", "status"),
+)
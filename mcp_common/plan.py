@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_plan(decision, max_steps: int = None) -> list:
+    """
+    Turn an orchestrator decision into a list of plan steps. Accepted shapes:
+    - a single call `{type, name, arguments}`
+    - a list of calls, all independent of each other
+    - `{"steps": [...]}` where a step may have an `id` and `depends_on: [ids]`
+
+    Every returned step has `id`, `type`, `name`, `arguments` and `depends_on`.
+    Raises ValueError for an empty or oversized plan (env MCP_PLAN_MAX_STEPS,
+    default 8), duplicate ids, unknown dependencies and cycles.
+    """
+    if max_steps is None:
+        max_steps = int(os.getenv("MCP_PLAN_MAX_STEPS", "8"))
+    if isinstance(decision, dict) and "steps" in decision:
+        calls = decision["steps"]
+    elif isinstance(decision, list):
+        calls = decision
+    elif isinstance(decision, dict):
+        calls = [decision]
+    else:
+        raise ValueError(f"Unsupported plan: {decision!r}")
+    if not calls or not all(isinstance(call, dict) and call.get("name") for call in calls):
+        raise ValueError("A plan needs at least one step and every step needs a name")
+    if len(calls) > max_steps:
+        raise ValueError(f"Plan has {len(calls)} steps, at most {max_steps} are allowed")
+
+    steps = []
+    for i, call in enumerate(calls):
+        steps.append({
+            "id": str(call.get("id") or f"step{i + 1}"),
+            "type": call.get("type", "resource"),
+            "name": call["name"],
+            "arguments": call.get("arguments") or {},
+            "depends_on": [str(dep) for dep in call.get("depends_on") or []],
+        })
+
+    ids = {step["id"] for step in steps}
+    if len(ids) != len(steps):
+        raise ValueError("Plan step ids must be unique")
+    for step in steps:
+        unknown = set(step["depends_on"]) - ids
+        if unknown:
+            raise ValueError(f"Step '{step['id']}' depends on unknown steps {sorted(unknown)}")
+    _check_acyclic(steps)
+    return steps
+
+
+def _check_acyclic(steps: list):
+    remaining = {step["id"]: set(step["depends_on"]) for step in steps}
+    while remaining:
+        ready = [step_id for step_id, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Plan has a dependency cycle between {sorted(remaining)}")
+        for step_id in ready:
+            del remaining[step_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+class PlanExecutor:
+    """
+    Runs the steps of a plan (see `normalize_plan`) as soon as their dependencies
+    have succeeded:
+    - Independent steps run concurrently, at most `max_workers` at a time
+      (env MCP_PLAN_MAX_WORKERS, default 4)
+    - Each step is abandoned after `step_timeout` seconds (env MCP_PLAN_STEP_TIMEOUT,
+      default 30), counted from the moment it got a worker slot
+    - A failed or timed out step does not stop the others; steps depending on it
+      are skipped
+
+    `execute(steps, run_step)` calls the coroutine function `run_step(step)` for each
+    step and returns one entry per step, in plan order:
+    `{id, type, name, status: ok|error|timeout|skipped, result|error, elapsed}`.
+    """
+
+    def __init__(self, max_workers: int = None, step_timeout: float = None):
+        if max_workers is None:
+            max_workers = int(os.getenv("MCP_PLAN_MAX_WORKERS", "4"))
+        if step_timeout is None:
+            step_timeout = float(os.getenv("MCP_PLAN_STEP_TIMEOUT", "30"))
+        self.max_workers = max(1, max_workers)
+        self.step_timeout = step_timeout
+
+    async def _run(self, step: dict, run_step, slots: asyncio.Semaphore) -> dict:
+        outcome = {"id": step["id"], "type": step["type"], "name": step["name"]}
+        async with slots:
+            started = time.perf_counter()
+            try:
+                outcome["result"] = await asyncio.wait_for(run_step(step), timeout=self.step_timeout or None)
+                outcome["status"] = "ok"
+            except asyncio.TimeoutError:
+                outcome["status"] = "timeout"
+                outcome["error"] = f"Step timed out after {self.step_timeout}s"
+            except Exception as e:
+                outcome["status"] = "error"
+                outcome["error"] = str(e)
+            outcome["elapsed"] = time.perf_counter() - started
+        if outcome["status"] != "ok":
+            logger.warning("Plan step '%s' (%s) %s: %s", step["id"], step["name"], outcome["status"], outcome["error"])
+        return outcome
+
+    async def execute(self, steps: list, run_step) -> list:
+        slots = asyncio.Semaphore(self.max_workers)
+        waiting = {step["id"]: step for step in steps}
+        outcomes = {}
+        running = {}  # {asyncio.Task: step id}
+        try:
+            while waiting or running:
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for step_id, step in list(waiting.items()):
+                        if not all(dep in outcomes for dep in step["depends_on"]):
+                            continue
+                        del waiting[step_id]
+                        progressed = True
+                        failed = [dep for dep in step["depends_on"] if outcomes[dep]["status"] != "ok"]
+                        if failed:
+                            outcomes[step_id] = {
+                                "id": step_id, "type": step["type"], "name": step["name"],
+                                "status": "skipped", "error": f"Depends on failed steps {failed}", "elapsed": 0.0,
+                            }
+                        else:
+                            running[asyncio.ensure_future(self._run(step, run_step, slots))] = step_id
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    outcomes[running.pop(task)] = task.result()
+        finally:
+            for task in running:
+                task.cancel()
+        return [outcomes[step["id"]] for step in steps if step["id"] in outcomes]
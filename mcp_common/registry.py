@@ -0,0 +1,169 @@
+import os
+import re
+
+_TOKEN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_TEMPLATE_VAR = re.compile(r"\{[^{}/]*\}")
+_STOPWORDS = frozenset(
+    "a an and are by can do for from get give i in is it list me my of on or please show the to what with".split()
+)
+
+# Match weight of a query word found in each capability field
+_FIELD_WEIGHTS = (("name", 3.0), ("title", 2.0), ("tags", 2.0), ("description", 1.0))
+
+
+def _tokens(text) -> set:
+    """Lowercase words of `text`, split on camelCase, snake_case and punctuation, plural `s` dropped."""
+    words = set()
+    for word in _TOKEN.findall(str(text or "")):
+        word = word.lower()
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    return words
+
+
+def compile_template(template: str):
+    """
+    Regex for a resource URI template, mirroring `Resource.matchesTemplate`: every
+    `{variable}` matches exactly one non-empty path segment, everything else literally.
+    """
+    parts = []
+    position = 0
+    for m in _TEMPLATE_VAR.finditer(template):
+        parts.append(re.escape(template[position:m.start()]))
+        parts.append("[^/]+")
+        position = m.end()
+    parts.append(re.escape(template[position:]))
+    return re.compile("".join(parts) + r"\Z")
+
+
+class CapabilityRegistry:
+    """
+    Indexed view of the capabilities discovered from the MCP server:
+    - `tools`, `resources`, `templates` and `prompts` are dicts keyed by name,
+      so validating an LLM decision is a dict lookup instead of a list scan
+    - `resource_for_uri(uri)` finds a resource by exact URI, then by template
+      (`{variable}` = one path segment, like `Resource.matchesTemplate`)
+    - `candidates(query)` pre-filters tools and resources by keyword (name, title,
+      tags, description) through an inverted index, so only the relevant subset of
+      a large catalog goes into the LLM prompt. At most `max_candidates` per kind
+      (env MCP_LLM_MAX_CANDIDATES, default 20, 0 = everything); kinds that small are
+      sent whole, and only a query matching nothing at all gets the first ones
+    """
+
+    KINDS = ("tools", "resources", "resourceTemplates", "prompts")
+
+    def __init__(self, max_candidates: int = None):
+        if max_candidates is None:
+            max_candidates = int(os.getenv("MCP_LLM_MAX_CANDIDATES", "20"))
+        self.max_candidates = max_candidates
+        self.tools = {}
+        self.resources = {}
+        self.templates = {}
+        self.prompts = {}
+        self._by_uri = {}  # {uri: resource}
+        self._patterns = []  # [(compiled template, resource)]
+        self._index = {}  # {kind: {word: {name: weight}}}
+        self._sources = {}  # {kind: list last indexed}
+
+    def _store(self, kind: str) -> dict:
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown capability kind '{kind}'")
+        return self.templates if kind == "resourceTemplates" else getattr(self, kind)
+
+    def update(self, kind: str, items: list):
+        """
+        Replace all capabilities of `kind` (as returned by `<kind>/list`). Passing the
+        list object indexed last is a no-op, so this is cheap after a cached discovery.
+        """
+        store = self._store(kind)
+        if items is not None and items is self._sources.get(kind):
+            return
+        self._sources[kind] = items
+        store.clear()
+        for item in items or []:
+            if item.get("name"):
+                store[item["name"]] = item
+        if kind in ("resources", "resourceTemplates"):
+            self._index_uris()
+        self._index[kind] = self._build_index(store)
+
+    def _index_uris(self):
+        self._by_uri = {}
+        self._patterns = []
+        for resource in (*self.resources.values(), *self.templates.values()):
+            uri = resource.get("uriTemplate") or resource.get("uri")
+            if not uri:
+                continue
+            if _TEMPLATE_VAR.search(uri):
+                self._patterns.append((compile_template(uri), resource))
+            else:
+                self._by_uri.setdefault(uri, resource)
+
+    @staticmethod
+    def _build_index(store: dict) -> dict:
+        index = {}
+        for name, item in store.items():
+            for field, weight in _FIELD_WEIGHTS:
+                value = item.get(field)
+                if isinstance(value, (list, tuple)):
+                    value = " ".join(str(v) for v in value)
+                for word in _tokens(value):
+                    scores = index.setdefault(word, {})
+                    scores[name] = max(scores.get(name, 0.0), weight)
+        return index
+
+    def tool(self, name: str):
+        return self.tools.get(name)
+
+    def resource(self, name: str):
+        """The resource (or resource template) called `name`, or None."""
+        return self.resources.get(name) or self.templates.get(name)
+
+    def prompt(self, name: str):
+        return self.prompts.get(name)
+
+    def resource_for_uri(self, uri: str):
+        """The resource serving `uri`: exact URI first, then the first matching template."""
+        if not uri:
+            return None
+        resource = self._by_uri.get(uri)
+        if resource is not None:
+            return resource
+        for pattern, resource in self._patterns:
+            if pattern.match(uri):
+                return resource
+        return None
+
+    def search(self, kind: str, query: str, limit: int = None) -> list:
+        """Names of `kind` ranked by keyword match with `query`; only matching ones."""
+        index = self._index.get(kind, {})
+        scores = {}
+        for word in _tokens(query):
+            for name, weight in index.get(word, {}).items():
+                scores[name] = scores.get(name, 0.0) + weight
+        ranked = sorted(scores, key=lambda name: -scores[name])
+        return ranked[:limit] if limit else ranked
+
+    def candidates(self, query: str, kinds=("tools", "resources")) -> dict:
+        """{kind: [names]} to offer the LLM for `query` (see the class docstring)."""
+        limit = self.max_candidates
+        selected, unmatched = {}, []
+        for kind in kinds:
+            names = list(self._store(kind))
+            if limit and len(names) > limit:
+                matches = self.search(kind, query, limit)
+                if not matches:
+                    unmatched.append(kind)
+                names = matches
+            selected[kind] = names
+        if unmatched and not any(selected[kind] for kind in kinds if kind not in unmatched):
+            # Nothing matched at all: offer the first ones rather than nothing
+            for kind in unmatched:
+                selected[kind] = list(self._store(kind))[:limit]
+        return selected
+
+    def __len__(self):
+        return len(self.tools) + len(self.resources) + len(self.templates) + len(self.prompts)
@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: throttling and unavailable/overloaded gateways
+RETRYABLE_STATUS = frozenset((408, 429, 500, 502, 503, 504))
+# Salesforce answers an exhausted API allowance with HTTP 403 and this error code
+RETRYABLE_ERROR_CODES = ("REQUEST_LIMIT_EXCEEDED", "SERVER_UNAVAILABLE")
+
+
+def is_idempotent(request) -> bool:
+    """
+    Whether a JSON-RPC request (a method name, request object or batch) is safe to
+    send more than once; a batch is when all of its requests are.
+    """
+    if isinstance(request, list):
+        return all(is_idempotent(message) for message in request)
+    method = (request.get("method") if isinstance(request, dict) else request) or ""
+    return method.endswith("/list") or method in ("resources/read", "ping")
+
+
+class TransientError(Exception):
+    """A failure that may succeed when retried (throttling, 5xx, connection loss)."""
+
+    def __init__(self, message: str, status: int = None, retry_after: float = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the server while the circuit breaker is open."""
+
+
+def transient_error(status: int, text: str = "", retry_after: str = None):
+    """
+    Return a TransientError for a retryable HTTP reply (by status, or by a
+    Salesforce error code in the body), or None when the reply is final.
+    """
+    if status < 400:
+        return None
+    if status in RETRYABLE_STATUS or any(code in (text or "") for code in RETRYABLE_ERROR_CODES):
+        try:
+            delay = float(retry_after) if retry_after else None
+        except ValueError:
+            delay = None
+        return TransientError(f"HTTP {status}: {(text or '')[:200]}", status, delay)
+    return None
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the MCP server is unhealthy:
+    - closed: calls go through; `failure_threshold` consecutive transient failures
+      (env MCP_BREAKER_FAILURES, default 5, 0 disables) open the circuit
+    - open: calls raise CircuitOpenError for `reset_timeout` seconds
+      (env MCP_BREAKER_RESET_TIMEOUT, default 30)
+    - half-open: one caller runs `probe()` (a `ping`); success closes the circuit,
+      failure opens it for another `reset_timeout`. Other callers fail fast meanwhile
+    """
+
+    def __init__(self, failure_threshold: int = None, reset_timeout: float = None, probe=None, clock=time.monotonic):
+        if failure_threshold is None:
+            failure_threshold = int(os.getenv("MCP_BREAKER_FAILURES", "5"))
+        if reset_timeout is None:
+            reset_timeout = float(os.getenv("MCP_BREAKER_RESET_TIMEOUT", "30"))
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe = probe
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self.short_circuits = 0
+        self._probing = False
+
+    async def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        if self.state == "closed":
+            return
+        if self._probing or self.clock() - self.opened_at < self.reset_timeout:
+            self.short_circuits += 1
+            raise CircuitOpenError(f"Circuit open after {self.failures} consecutive failures")
+        if self.probe is None:
+            # No probe: let this one call through as the trial request
+            self.state = "half-open"
+            return
+        self._probing = True
+        self.state = "half-open"
+        try:
+            await self.probe()
+        except Exception as e:
+            logger.warning("Circuit breaker probe failed: %s", e)
+            self._open()
+            raise CircuitOpenError(f"Server still unhealthy: {e}") from e
+        finally:
+            self._probing = False
+        logger.info("Circuit breaker probe succeeded, closing circuit")
+        self.record_success()
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half-open" or (self.failure_threshold and self.failures >= self.failure_threshold):
+            self._open()
+
+    def _open(self):
+        if self.state != "open":
+            self.opens += 1
+            logger.warning("Circuit breaker open for %.0fs after %d failures", self.reset_timeout, self.failures)
+        self.state = "open"
+        self.opened_at = self.clock()
+
+
+class ResilientCaller:
+    """
+    Retry, hedging and circuit breaking around single JSON-RPC calls:
+    - Idempotent methods (`*/list`, `resources/read`, `ping`) are retried on
+      transient failures up to `max_attempts` times (env MCP_RETRY_MAX_ATTEMPTS,
+      default 3) with exponential backoff and full jitter (MCP_RETRY_BASE_DELAY,
+      default 0.2 s, capped by MCP_RETRY_MAX_DELAY, default 5 s, or Retry-After)
+    - Optional hedging (env MCP_HEDGE_DELAY, seconds, unset = off): when an idempotent
+      call has not answered after the delay, a second identical call is started
+      and the first successful reply wins
+    - Every call passes the CircuitBreaker, other methods are sent exactly once
+
+    Transport-agnostic: `call(method, attempt)` awaits `attempt()` (a coroutine
+    function doing one HTTP round trip) and treats TransientError, ConnectionError,
+    TimeoutError and the extra exception types in `retry_on` as transient. Pass
+    `idempotent` when `method` is only a label (e.g. for a batch).
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = None,
+        base_delay: float = None,
+        max_delay: float = None,
+        hedge_delay: float = None,
+        breaker: CircuitBreaker = None,
+        retry_on: tuple = (),
+    ):
+        if max_attempts is None:
+            max_attempts = int(os.getenv("MCP_RETRY_MAX_ATTEMPTS", "3"))
+        if base_delay is None:
+            base_delay = float(os.getenv("MCP_RETRY_BASE_DELAY", "0.2"))
+        if max_delay is None:
+            max_delay = float(os.getenv("MCP_RETRY_MAX_DELAY", "5"))
+        if hedge_delay is None and os.getenv("MCP_HEDGE_DELAY"):
+            hedge_delay = float(os.getenv("MCP_HEDGE_DELAY"))
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_delay = hedge_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.transient = (TransientError, ConnectionError, asyncio.TimeoutError, *retry_on)
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    async def call(self, method: str, attempt, idempotent: bool = None):
+        if idempotent is None:
+            idempotent = is_idempotent(method)
+        attempts = self.max_attempts if idempotent else 1
+        for n in range(attempts):
+            await self.breaker.before_call()
+            try:
+                if idempotent and self.hedge_delay:
+                    result = await self._hedged(attempt)
+                else:
+                    result = await attempt()
+            except self.transient as e:
+                self.breaker.record_failure()
+                if n + 1 >= attempts:
+                    raise
+                delay = self.backoff(n, getattr(e, "retry_after", None))
+                self.retries += 1
+                logger.warning("Transient failure on %s (%s), retry %d in %.2fs", method, e, n + 1, delay)
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def stream(self, method: str, open_stream):
+        """
+        Yield from `open_stream()` (an async iterator), retrying like `call()` as
+        long as nothing has been yielded yet; a stream that breaks after its first
+        item is not replayed and the error propagates.
+        """
+        idempotent = is_idempotent(method)
+        attempts = self.max_attempts if idempotent else 1
+        for n in range(attempts):
+            await self.breaker.before_call()
+            started = False
+            try:
+                async for item in open_stream():
+                    started = True
+                    yield item
+            except self.transient as e:
+                self.breaker.record_failure()
+                if started or n + 1 >= attempts:
+                    raise
+                delay = self.backoff(n, getattr(e, "retry_after", None))
+                self.retries += 1
+                logger.warning("Transient failure on %s (%s), retry %d in %.2fs", method, e, n + 1, delay)
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return
+
+    async def _hedged(self, attempt):
+        tasks = [asyncio.ensure_future(attempt())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay)
+            if done:
+                return tasks[0].result()
+            self.hedges += 1
+            tasks.append(asyncio.ensure_future(attempt()))
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is tasks[1]:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "breaker_state": self.breaker.state,
+            "breaker_opens": self.breaker.opens,
+            "short_circuits": self.breaker.short_circuits,
+        }
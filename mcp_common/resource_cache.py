@@ -0,0 +1,233 @@
+import asyncio
+import fnmatch
+import os
+import time
+from collections import OrderedDict
+
+from .codec import CODEC
+
+
+def _parse_ttls(spec: str) -> dict:
+    """Parse `pattern=seconds,pattern=seconds` (MCP_RESOURCE_CACHE_TTLS)."""
+    ttls = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            pattern, seconds = item.rsplit("=", 1)
+            ttls[pattern.strip()] = float(seconds)
+    return ttls
+
+
+def _json_size(value) -> int:
+    return len(CODEC.dumpb(value, default=str))
+
+
+class ResourceCache:
+    """
+    Client-side cache of `resources/read` results keyed by URI:
+    - Default TTL (env MCP_RESOURCE_CACHE_TTL, 60 s) with per-URI overrides by exact
+      URI or glob pattern (`set_ttl()`, env MCP_RESOURCE_CACHE_TTLS); a TTL of 0
+      means the URI is never cached
+    - Bounded by the total JSON size of the cached values (env
+      MCP_RESOURCE_CACHE_MAX_BYTES, 16 MiB) with least-recently-used eviction
+    - Concurrent misses for the same URI share a single read (single-flight)
+    - `purge()` for explicit invalidation; `handle_notification()` purges on
+      `notifications/resources/list_changed` and `notifications/resources/updated`
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, ttl: float = None, max_bytes: int = None, ttls: dict = None, clock=time.monotonic):
+        if ttl is None:
+            ttl = float(os.getenv("MCP_RESOURCE_CACHE_TTL", "60"))
+        if max_bytes is None:
+            max_bytes = int(os.getenv("MCP_RESOURCE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.ttls = _parse_ttls(os.getenv("MCP_RESOURCE_CACHE_TTLS")) if ttls is None else dict(ttls)
+        self.clock = clock
+        self.size = 0  # bytes currently cached
+        self._entries = OrderedDict()  # {uri: (expires_at, size, value)}
+        self._inflight = {}  # {uri: asyncio.Future}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def set_ttl(self, pattern: str, ttl: float):
+        """Use `ttl` seconds for URIs equal to, or glob-matching, `pattern`."""
+        self.ttls[pattern] = ttl
+
+    def ttl_for(self, uri: str) -> float:
+        if uri in self.ttls:
+            return self.ttls[uri]
+        for pattern, ttl in self.ttls.items():
+            if fnmatch.fnmatchcase(uri, pattern):
+                return ttl
+        return self.ttl
+
+    def get(self, uri: str):
+        """Return the cached value for `uri`, or None when missing or expired."""
+        entry = self._entries.get(uri)
+        if entry is None:
+            return None
+        if self.clock() >= entry[0]:
+            self._remove(uri)
+            return None
+        self._entries.move_to_end(uri)
+        return entry[2]
+
+    def put(self, uri: str, value, size: int = None):
+        ttl = self.ttl_for(uri)
+        if ttl <= 0 or self.max_bytes <= 0:
+            return
+        size = _json_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        self._remove(uri)
+        self._entries[uri] = (self.clock() + ttl, size, value)
+        self.size += size
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, uri: str):
+        entry = self._entries.pop(uri, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    async def get_or_fetch(self, uri: str, fetch, cacheable=None):
+        """
+        Return the value for `uri`, calling `await fetch()` on a miss. Concurrent
+        callers for the same URI wait for the same fetch. The value is only stored
+        when `cacheable(value)` is true (default: value is not None), and only such
+        a value is shared with the waiting callers; otherwise they fetch again.
+        """
+        value = self.get(uri)
+        if value is not None:
+            self.hits += 1
+            return value
+        inflight = self._inflight.get(uri)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                value = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                value = None
+            if value is not None:
+                return value
+            # The leading caller was cancelled or produced no value: read it ourselves
+            return await self.get_or_fetch(uri, fetch, cacheable)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[uri] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(uri, None)
+        if cacheable(value) if cacheable else value is not None:
+            self.put(uri, value)
+            future.set_result(value)
+        else:
+            future.set_result(None)
+        return value
+
+    async def stream_or_fetch(self, uri: str, stream, wrap=None, unwrap=None):
+        """
+        Yield the items of `uri` from cache, from a read already in flight, or by
+        iterating `stream()` (an async iterator) and caching what it produced.
+
+        `wrap(items)` turns the items into the cached value and `unwrap(value)`
+        turns a cached value back into items, so it must match the values stored
+        by `get_or_fetch()` for the same URI. Items are collected only while they
+        fit in `max_bytes`; larger resources are streamed but not cached. Waiters
+        of a failed or abandoned stream read the URI again.
+        """
+        wrap = wrap or (lambda items: items)
+        unwrap = unwrap or (lambda value: value)
+
+        while True:
+            value = self.get(uri)
+            if value is not None:
+                self.hits += 1
+                break
+            inflight = self._inflight.get(uri)
+            if inflight is None:
+                break
+            self.coalesced += 1
+            try:
+                value = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                value = None
+            if value is not None:
+                break
+            # The read we waited for produced no value: look again, another waiter may be reading it
+        if value is not None:
+            for item in unwrap(value):
+                yield item
+            return
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[uri] = future
+        items, size = [], 0
+        finished = False
+        try:
+            async for item in stream():
+                if items is not None:
+                    size += _json_size(item)
+                    if size <= self.max_bytes:
+                        items.append(item)
+                    else:
+                        items = None
+                yield item
+            finished = True
+        finally:
+            self._inflight.pop(uri, None)
+            # Partial reads (error, or the consumer stopped) release waiters without a value
+            value = wrap(items) if finished and items is not None else None
+            future.set_result(value)
+        if value is not None:
+            self.put(uri, value, size)
+
+    def purge(self, uri: str = None):
+        """Drop one URI, or the whole cache when `uri` is None."""
+        if uri is None:
+            self._entries.clear()
+            self.size = 0
+        else:
+            self._remove(uri)
+
+    def handle_notification(self, message: dict) -> bool:
+        """Purge on resource change notifications; return True if handled."""
+        method = (message or {}).get("method")
+        if method == "notifications/resources/list_changed":
+            self.purge()
+            return True
+        if method == "notifications/resources/updated":
+            self.purge((message.get("params") or {}).get("uri"))
+            return True
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
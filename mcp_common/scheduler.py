@@ -0,0 +1,234 @@
+import asyncio
+import collections
+import contextlib
+import logging
+import os
+import re
+import time
+
+from .metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BACKGROUND)  # in priority order
+
+# Methods that only refresh discovery data or probe the server
+_BACKGROUND_METHODS = frozenset(("initialize", "ping", "tools/list", "resources/list", "prompts/list"))
+# The org-wide usage, not the `per-app-api-usage` of a connected app
+_API_USAGE = re.compile(r"(?<![\w-])api-usage=(\d+)/(\d+)")
+
+WAIT_SECONDS = METRICS.histogram(
+    "mcp_scheduler_wait_seconds",
+    "Time MCP requests waited for a scheduler slot by lane",
+    ("lane",),
+)
+IN_FLIGHT = METRICS.gauge("mcp_scheduler_in_flight", "MCP requests being sent by lane", ("lane",))
+QUEUED = METRICS.gauge("mcp_scheduler_queued", "MCP requests waiting for a scheduler slot by lane", ("lane",))
+THROTTLE_FACTOR = METRICS.gauge(
+    "mcp_scheduler_throttle_factor",
+    "Share of the configured request rate and concurrency currently allowed",
+)
+API_USAGE = METRICS.gauge(
+    "salesforce_api_usage_ratio",
+    "Share of the daily Salesforce API allotment used, from Sforce-Limit-Info",
+)
+
+
+def lane_for(request) -> str:
+    """
+    Lane of a JSON-RPC request (a method name, request object or batch): discovery
+    and probes are `background`, everything else (and any batch containing it) `interactive`.
+    """
+    if isinstance(request, list):
+        return BACKGROUND if all(lane_for(message) == BACKGROUND for message in request) else INTERACTIVE
+    method = request.get("method") if isinstance(request, dict) else request
+    return BACKGROUND if method in _BACKGROUND_METHODS else INTERACTIVE
+
+
+class RequestScheduler:
+    """
+    Admission control for the requests sent to the Salesforce org, shared by every
+    MCP transport of the process (`SCHEDULER`):
+    - Token bucket: at most `rate` requests per second (env MCP_RATE_LIMIT, default 0 =
+      unlimited) with bursts of up to `burst` (MCP_RATE_BURST, default max(1, rate))
+    - At most `max_in_flight` requests outstanding at once (MCP_MAX_IN_FLIGHT,
+      default 20, 0 = no cap)
+    - Two priority lanes: a waiting `interactive` request (tools/call, resources/read,
+      prompts/get) is always admitted before `background` discovery (`*/list`, `ping`)
+    - Adaptive throttling from the `Sforce-Limit-Info: api-usage=N/M` response header:
+      past `usage_threshold` of the daily allotment (MCP_API_USAGE_THRESHOLD, default
+      0.8) the rate and the in-flight cap shrink linearly, down to a tenth when it is
+      used up, and background requests are sent one at a time
+    - Wait times, queued and in-flight requests, the throttle factor and the API usage
+      are exported as metrics when MCP_METRICS is on
+
+    `slot(lane)` wraps one HTTP request; `observe(headers)` feeds it each response's headers.
+    """
+
+    MIN_FACTOR = 0.1
+
+    def __init__(
+        self,
+        rate: float = None,
+        burst: float = None,
+        max_in_flight: int = None,
+        usage_threshold: float = None,
+        clock=time.monotonic,
+    ):
+        if rate is None:
+            rate = float(os.getenv("MCP_RATE_LIMIT", "0"))
+        if burst is None:
+            burst = float(os.getenv("MCP_RATE_BURST", "0")) or max(1.0, rate)
+        if max_in_flight is None:
+            max_in_flight = int(os.getenv("MCP_MAX_IN_FLIGHT", "20"))
+        if usage_threshold is None:
+            usage_threshold = float(os.getenv("MCP_API_USAGE_THRESHOLD", "0.8"))
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.usage_threshold = usage_threshold
+        self.clock = clock
+        self.factor = 1.0  # throttle factor from the API usage
+        self.api_usage = None  # (used, allotment) from the last Sforce-Limit-Info header
+        self.in_flight = dict.fromkeys(LANES, 0)
+        self.admitted = dict.fromkeys(LANES, 0)
+        self.delayed = dict.fromkeys(LANES, 0)  # admissions that had to wait
+        self._tokens = burst
+        self._refilled = clock()
+        self._waiters = {lane: collections.deque() for lane in LANES}
+        self._timer = None  # wakes the waiters when the next token is available
+
+    def _capacity(self, lane: str) -> bool:
+        if self.max_in_flight:
+            limit = max(1, int(self.max_in_flight * self.factor))
+            if sum(self.in_flight.values()) >= limit:
+                return False
+        return lane == INTERACTIVE or self.factor == 1.0 or self.in_flight[BACKGROUND] == 0
+
+    def _take_token(self) -> float:
+        """Take a token from the bucket; returns 0, or the seconds until one is available."""
+        if not self.rate:
+            return 0.0
+        rate = self.rate * self.factor
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * rate)
+        self._refilled = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / rate
+
+    def _waiting(self, lane: str) -> bool:
+        waiters = self._waiters[lane]
+        while waiters and waiters[0].done():
+            waiters.popleft()  # cancelled while queued
+        return bool(waiters)
+
+    def _admit_waiters(self):
+        while True:
+            lane = next((lane for lane in LANES if self._waiting(lane)), None)
+            if lane is None or not self._capacity(lane):
+                return
+            delay = self._take_token()
+            if delay:
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+                return
+            self.in_flight[lane] += 1
+            self.admitted[lane] += 1
+            self._waiters[lane].popleft().set_result(None)
+
+    def _on_timer(self):
+        self._timer = None
+        self._admit_waiters()
+        self._publish()
+
+    async def acquire(self, lane: str = INTERACTIVE):
+        """Wait until a request in `lane` may be sent; pair with `release(lane)`."""
+        if lane not in LANES:
+            raise ValueError(f"Unknown scheduler lane '{lane}'")
+        ahead = LANES[:LANES.index(lane) + 1]
+        if not any(self._waiting(other) for other in ahead) and self._capacity(lane) and not self._take_token():
+            self.in_flight[lane] += 1
+            self.admitted[lane] += 1
+            if METRICS.enabled:
+                WAIT_SECONDS.observe(0.0, lane=lane)
+                self._publish()
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(future)
+        self.delayed[lane] += 1
+        started = time.perf_counter()
+        self._admit_waiters()
+        self._publish()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(lane)  # admitted just as the caller gave up
+            raise
+        finally:
+            if METRICS.enabled:
+                WAIT_SECONDS.observe(time.perf_counter() - started, lane=lane)
+
+    def release(self, lane: str = INTERACTIVE):
+        self.in_flight[lane] -= 1
+        self._admit_waiters()
+        self._publish()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, lane: str = INTERACTIVE):
+        """Hold one admission in `lane` for the duration of the block."""
+        await self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release(lane)
+
+    def observe(self, headers):
+        """Adapt to the `Sforce-Limit-Info` header of a response (case-insensitive headers)."""
+        value = headers.get("Sforce-Limit-Info") if headers is not None else None
+        m = _API_USAGE.search(value) if value else None
+        if m is None:
+            return
+        used, allotment = int(m.group(1)), int(m.group(2))
+        self.api_usage = (used, allotment)
+        ratio = used / allotment if allotment else 1.0
+        if ratio <= self.usage_threshold or self.usage_threshold >= 1:
+            factor = 1.0
+        else:
+            factor = max(self.MIN_FACTOR, 1 - (ratio - self.usage_threshold) / (1 - self.usage_threshold))
+        if factor != self.factor:
+            if factor < 1 <= self.factor:
+                logger.warning("Salesforce API usage at %d/%d, throttling MCP requests", used, allotment)
+            elif factor == 1:
+                logger.info("Salesforce API usage at %d/%d, throttling lifted", used, allotment)
+            self.factor = factor
+            self._admit_waiters()
+        self._publish()
+
+    def _publish(self):
+        if not METRICS.enabled:
+            return
+        for lane in LANES:
+            IN_FLIGHT.set(self.in_flight[lane], lane=lane)
+            QUEUED.set(sum(not future.done() for future in self._waiters[lane]), lane=lane)
+        THROTTLE_FACTOR.set(self.factor)
+        if self.api_usage:
+            used, allotment = self.api_usage
+            API_USAGE.set(used / allotment if allotment else 1.0)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": dict(self.in_flight),
+            "queued": {lane: sum(not future.done() for future in self._waiters[lane]) for lane in LANES},
+            "admitted": dict(self.admitted),
+            "delayed": dict(self.delayed),
+            "throttle_factor": self.factor,
+            "api_usage": self.api_usage,
+        }
+
+
+SCHEDULER = RequestScheduler()
@@ -0,0 +1,367 @@
+import asyncio
+import contextlib
+import logging
+import os
+import time
+
+import httpx
+
+from .cassette import RECORDER
+from .codec import CODEC
+from .metrics import METRICS
+from .resilience import TransientError
+from .streaming import JSONArrayStreamParser, SSEParser
+from .transport import MCPError, MCPTransport, _env_bool
+
+logger = logging.getLogger(__name__)
+
+# Server.protocolVersion of the Apex server
+PROTOCOL_VERSION = "2025-06-18"
+ACCEPT = "application/json, text/event-stream"
+# Reconnections with Last-Event-ID per request before giving up on its stream
+MAX_RESUMPTIONS = 3
+
+
+class StreamableHTTPTransport(MCPTransport):
+    """
+    MCP Streamable HTTP transport (protocol 2025-06-18) on top of MCPTransport:
+    - `initialize` handshake on first use, shared by concurrent callers; the
+      `Mcp-Session-Id` and negotiated `MCP-Protocol-Version` are sent on every
+      later request, and a 404 for an expired session starts a new one and resends once
+    - Replies may be `application/json` or a `text/event-stream`. SSE is parsed
+      incrementally: notifications and server requests arriving before the reply go
+      to `on_message`, and `stream_items()` yields `result.contents` items while the
+      reply event itself is still arriving
+    - A stream that breaks before the reply is resumed with a GET carrying
+      `Last-Event-ID` (items already yielded are not yielded again)
+    - With `listen` (env MCP_SESSION_LISTEN, default true) a background GET stream
+      receives server-initiated messages, so `notifications/*/list_changed` reach
+      `on_message` (the clients' `handle_notification`) as they happen instead of
+      waiting for a cache TTL. Servers without that stream (405, like the Apex REST
+      endpoint) are detected on the first attempt
+    - `ping` requests from the server are answered; other server requests get
+      "method not found"
+    - `aclose()` ends the session with a DELETE
+    """
+
+    def __init__(self, base_url: str, on_message=None, listen: bool = None, client_info: dict = None, **options):
+        super().__init__(base_url, **options)
+        if listen is None:
+            listen = _env_bool("MCP_SESSION_LISTEN", True)
+        self.on_message = on_message
+        self.listen = listen
+        self.client_info = client_info or {"name": "salesforce-apex-mcp-python", "version": "1.0.0"}
+        self.session_id = None
+        self.protocol_version = None
+        self.server_info = {}
+        self.server_capabilities = {}
+        self.resumptions = 0
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+        self._listener = None  # background GET stream task
+        self._replies_sent = set()  # answers to server requests in flight
+
+    def _session_headers(self, accept: str = ACCEPT) -> dict:
+        headers = {"Accept": accept}
+        if self.session_id:
+            headers["Mcp-Session-Id"] = self.session_id
+        if self.protocol_version:
+            headers["MCP-Protocol-Version"] = self.protocol_version
+        return headers
+
+    def _reset_session(self):
+        self.session_id = None
+        self.protocol_version = None
+        self._initialized = False
+
+    async def initialize(self) -> dict:
+        """Open the session unless it is open already; returns the server info."""
+        if not self._initialized:
+            async with self._init_lock:
+                if not self._initialized:
+                    await self._handshake()
+        return self.server_info
+
+    async def _handshake(self):
+        reply = await self._exchange(self.build_request("initialize", {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": self.client_info,
+        }))
+        if "error" in reply:
+            error = reply["error"] or {}
+            raise MCPError(error.get("code", 0), error.get("message", "initialize failed"), error.get("data"))
+        result = reply.get("result") or {}
+        self.protocol_version = result.get("protocolVersion") or PROTOCOL_VERSION
+        self.server_info = result.get("serverInfo") or {}
+        self.server_capabilities = result.get("capabilities") or {}
+        logger.info(
+            "MCP session %s opened with %s (protocol %s)",
+            self.session_id or "(stateless)", self.server_info.get("name", "server"), self.protocol_version,
+        )
+        await self._exchange({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        self._initialized = True
+        if self.listen and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.ensure_future(self._listen_loop())
+
+    @contextlib.asynccontextmanager
+    async def _open(
+        self, method: str, content: bytes = None, headers: dict = None, renew_session: bool = True, timeout=None
+    ):
+        """
+        Send one HTTP request with the session and auth headers and yield the
+        streaming response. A 401 renews the token and a 404 for an expired session
+        (when `renew_session`) opens a new session; each is resent once.
+        """
+        retried_auth = retried_session = False
+        while True:
+            request_headers, token = await self._auth_headers({**self._session_headers(), **(headers or {})})
+            request = self.client.build_request(
+                method, self.base_url, content=content, headers=request_headers, timeout=timeout or self.timeout
+            )
+            resp = await self.client.send(request, stream=True)
+            if resp.status_code == 401 and token is not None and not retried_auth:
+                await resp.aclose()
+                self.auth.invalidate(token)
+                retried_auth = True
+                continue
+            if resp.status_code == 404 and self._initialized and renew_session and not retried_session:
+                await resp.aclose()
+                logger.info("MCP session %s expired, opening a new one", self.session_id)
+                self._reset_session()
+                retried_session = True
+                await self.initialize()
+                continue
+            break
+        self.scheduler.observe(resp.headers)
+        if resp.headers.get("mcp-session-id"):
+            self.session_id = resp.headers["mcp-session-id"]
+        try:
+            yield resp
+        finally:
+            await resp.aclose()
+
+    async def exchange(self, message: dict):
+        """
+        Send one JSON-RPC message over the session and return the reply to it
+        (None for notifications and responses). Connection failures raise TransientError.
+        """
+        try:
+            await self.initialize()
+            return await self._exchange(message)
+        except httpx.TransportError as e:
+            raise TransientError(f"{type(e).__name__}: {e}") from e
+
+    async def _exchange(self, message: dict):
+        async for kind, value in self._replies(message):
+            if kind == "reply":
+                return value
+        return None
+
+    async def _replies(self, message: dict, path=None):
+        """
+        POST `message` and yield ("item", item) for each item of the array at `path`
+        as it arrives (when `path` is given), then ("reply", reply). With `path`, the
+        reply is None when the array was found, else the error reply.
+        Notifications and responses (answered with 202) yield nothing.
+        """
+        async with self._open("POST", CODEC.dumpb(message)) as resp:
+            if "method" not in message or "id" not in message:
+                await resp.aread()
+                if resp.status_code >= 400:
+                    logger.debug("Server answered %s to %s", resp.status_code, message.get("method", "a response"))
+                return
+            if resp.status_code >= 400:
+                await resp.aread()
+                self._raise_for_transient(resp)
+                resp.raise_for_status()
+            if resp.headers.get("content-type", "").startswith("text/event-stream"):
+                async for reply in self._read_events(resp, message["id"], path):
+                    yield reply
+                return
+            if path is None:
+                yield "reply", CODEC.decode_response(message["method"], await resp.aread())
+                return
+            parser = JSONArrayStreamParser(path)
+            prefix = []  # body seen before the array starts (holds an error reply)
+            async for text in resp.aiter_text():
+                if not parser.found:
+                    prefix.append(text)
+                for item in parser.feed(text):
+                    yield "item", item
+            yield "reply", None if parser.found else CODEC.loads("".join(prefix) or "{}")
+
+    async def _read_events(self, resp: httpx.Response, request_id, path=None):
+        items = []
+        parser = JSONArrayStreamParser(path) if path else None
+        sse = SSEParser(on_data=(lambda fragment: items.extend(parser.feed(fragment))) if path else None)
+        yielded = 0  # items yielded to the caller
+        seen = 0  # items parsed from the current stream (a resumed stream replays the cut event)
+        async with contextlib.AsyncExitStack() as streams:
+            for resumption in range(MAX_RESUMPTIONS + 1):
+                try:
+                    async for text in resp.aiter_text():
+                        events = sse.feed(text)
+                        for item in items:
+                            seen += 1
+                            if seen > yielded:
+                                yielded += 1
+                                yield "item", item
+                        items.clear()
+                        for event in events:
+                            message = CODEC.loads(event["data"]) if event["data"] else None
+                            if not isinstance(message, dict):
+                                continue
+                            if message.get("id") == request_id and ("result" in message or "error" in message):
+                                yield "reply", None if parser is not None and parser.found else message
+                                return
+                            await self._dispatch(message)
+                    reason = "stream closed"
+                except httpx.TransportError as e:
+                    reason = f"{type(e).__name__}: {e}"
+                if not sse.last_event_id or resumption == MAX_RESUMPTIONS:
+                    raise TransientError(f"SSE stream ended before the reply ({reason})")
+                self.resumptions += 1
+                logger.info("Resuming SSE stream after event %s (%s)", sse.last_event_id, reason)
+                resp = await streams.enter_async_context(self._open(
+                    "GET",
+                    headers={"Accept": "text/event-stream", "Last-Event-ID": sse.last_event_id},
+                    renew_session=False,
+                ))
+                if resp.status_code != 200:
+                    await resp.aread()
+                    raise TransientError(f"HTTP {resp.status_code}: SSE stream could not be resumed", resp.status_code)
+                if path:
+                    parser = JSONArrayStreamParser(path)
+                sse = SSEParser(on_data=sse.on_data, last_event_id=sse.last_event_id)
+                seen = 0
+
+    async def _dispatch(self, message: dict):
+        """Handle a server notification or request received on a stream."""
+        if "method" not in message:
+            return
+        if "id" in message:
+            if message["method"] == "ping":
+                reply = {"jsonrpc": "2.0", "id": message["id"], "result": {}}
+            else:
+                reply = {"jsonrpc": "2.0", "id": message["id"], "error": {"code": -32601, "message": "Method not found"}}
+            task = asyncio.ensure_future(self._exchange(reply))
+            self._replies_sent.add(task)
+            task.add_done_callback(self._replies_sent.discard)
+            return
+        logger.debug("Server notification %s", message["method"])
+        if self.on_message is not None:
+            try:
+                self.on_message(message)
+            except Exception:
+                logger.exception("Notification handler failed for %s", message["method"])
+
+    async def _listen_loop(self):
+        last_event_id = ""
+        delay = 1.0
+        while True:
+            headers = {"Accept": "text/event-stream"}
+            if last_event_id:
+                headers["Last-Event-ID"] = last_event_id
+            try:
+                # Idle periods between server messages are expected: no read timeout
+                idle = httpx.Timeout(None, connect=self.timeout.connect)
+                async with self._open("GET", headers=headers, renew_session=False, timeout=idle) as resp:
+                    if resp.status_code in (404, 405):
+                        logger.info("MCP server offers no event stream (HTTP %s), relying on cache TTLs", resp.status_code)
+                        return
+                    if resp.status_code != 200:
+                        raise TransientError(f"HTTP {resp.status_code}", resp.status_code)
+                    sse = SSEParser(last_event_id=last_event_id)
+                    delay = 1.0
+                    try:
+                        async for text in resp.aiter_text():
+                            for event in sse.feed(text):
+                                message = CODEC.loads(event["data"]) if event["data"] else None
+                                if isinstance(message, dict):
+                                    await self._dispatch(message)
+                    finally:
+                        last_event_id = sse.last_event_id
+                        if sse.retry:
+                            delay = sse.retry / 1000
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("MCP event stream failed, reconnecting in %.1fs: %s", delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60.0)
+                continue
+            await asyncio.sleep(delay)
+
+    async def post(self, payload, headers: dict = None) -> httpx.Response:
+        """POST a raw JSON-RPC payload within the session (the reply may be an SSE stream)."""
+        await self.initialize()
+        return await super().post(payload, {**self._session_headers(), **(headers or {})})
+
+    async def _call_admitted(self, method: str, params: dict = None) -> dict:
+        with METRICS.span("mcp_request_duration_seconds", client="streamable-http", method=method) as span:
+            await self.initialize()
+            request = self.build_request(method, params)
+            started = time.perf_counter()
+            body = await self._exchange(request)
+            if "error" in body:
+                span.status = "rpc_error"
+            if RECORDER.enabled:
+                RECORDER.record("mcp", request, body, time.perf_counter() - started)
+            return body
+
+    async def _stream_admitted(self, method: str, params: dict, path):
+        with METRICS.span("mcp_request_duration_seconds", client="streamable-http", method=method) as span:
+            await self.initialize()
+            request = self.build_request(method, params)
+            started = time.perf_counter()
+            recorded = [] if RECORDER.enabled else None  # items, only kept while recording
+            async for kind, value in self._replies(request, path):
+                if kind == "item":
+                    if recorded is not None:
+                        recorded.append(value)
+                    yield value
+                elif value is not None:
+                    span.status = "rpc_error"
+                    error = value.get("error") or {}
+                    raise MCPError(
+                        error.get("code", 0),
+                        error.get("message", f"No {'.'.join(path)} in {method} response"),
+                        error.get("data"),
+                    )
+            if recorded is not None:
+                # Record the reply the items came from
+                body = recorded
+                for key in reversed(path):
+                    body = {key: body}
+                body = {"jsonrpc": "2.0", "id": request["id"], **body}
+                RECORDER.record("mcp", request, body, time.perf_counter() - started)
+
+    async def aclose(self):
+        """Stop listening, end the session with a DELETE and close the pooled client."""
+        if self._listener is not None:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        if self.session_id is not None and self._client is not None:
+            try:
+                headers, _ = await self._auth_headers(self._session_headers())
+                await self.client.delete(self.base_url, headers=headers)
+            except Exception as e:
+                logger.debug("Could not end MCP session %s: %s", self.session_id, e)
+        self._reset_session()
+        await super().aclose()
+
+
+def create_transport(base_url: str, on_message=None, **options) -> MCPTransport:
+    """
+    The MCP transport selected by env MCP_TRANSPORT: `json` (default, one JSON reply
+    per POST, as the Apex REST endpoint answers) or `streamable-http`.
+    """
+    kind = os.getenv("MCP_TRANSPORT", "json").strip().lower()
+    if kind == "streamable-http":
+        return StreamableHTTPTransport(base_url, on_message=on_message, **options)
+    if kind != "json":
+        raise ValueError(f"Unknown MCP_TRANSPORT '{kind}'")
+    return MCPTransport(base_url, **options)
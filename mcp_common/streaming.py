@@ -0,0 +1,188 @@
+import re
+
+from .codec import CODEC
+
+_STRUCTURAL = re.compile(r'["{}\[\],:]')
+_STRING_END = re.compile(r'["\\]')
+
+
+class JSONArrayStreamParser:
+    """
+    Incrementally extracts the object items of one JSON array from a document
+    that arrives in chunks, e.g. `result.contents` of a `resources/read` reply:
+    - `feed(text)` returns the items completed by that chunk, already decoded
+    - Only the item currently being read is buffered, so memory stays bounded
+      by the largest single item instead of the whole body
+    - `found` tells whether the array was seen; `done` whether it was closed
+    """
+
+    def __init__(self, path=("result", "contents")):
+        self.path = tuple(path)
+        self.found = False
+        self.done = False
+        self._stack = []  # key each open container was opened under
+        self._key = None  # key whose value comes next in the current object
+        self._last_string = None
+        self._in_string = False
+        self._escape = False
+        self._string = []  # pieces of the string being read (outside items)
+        self._array_depth = None  # stack depth inside the target array
+        self._item = []  # pieces of the item being read
+
+    def feed(self, text: str) -> list:
+        items = []
+        i = 0
+        item_start = 0 if self._item else None
+        size = len(text)
+        while i < size:
+            if self._escape:
+                # Escaped character split across chunks
+                self._escape = False
+                i += 1
+                continue
+            if self._in_string:
+                m = _STRING_END.search(text, i)
+                if m is None:
+                    if item_start is None:
+                        self._string.append(text[i:])
+                    break
+                if m.group() == "\\":
+                    if m.end() >= size:
+                        self._escape = True
+                        if item_start is None:
+                            self._string.append(text[i:])
+                        break
+                    i = m.end() + 1
+                    continue
+                if item_start is None:
+                    self._string.append(text[i:m.start()])
+                    self._last_string = "".join(self._string)
+                    self._string = []
+                self._in_string = False
+                i = m.end()
+                continue
+
+            m = _STRUCTURAL.search(text, i)
+            if m is None:
+                break
+            ch = m.group()
+            pos = m.start()
+            i = m.end()
+            if ch == '"':
+                self._in_string = True
+            elif ch == ":":
+                self._key = self._last_string
+            elif ch == ",":
+                self._key = None
+            elif ch in "{[":
+                if self._array_depth is not None and len(self._stack) == self._array_depth and ch == "{":
+                    item_start = pos
+                elif (
+                    ch == "["
+                    and not self.found
+                    and self._stack
+                    and tuple(self._stack[1:]) + (self._key,) == self.path
+                ):
+                    self.found = True
+                    self._array_depth = len(self._stack) + 1
+                self._stack.append(self._key)
+                self._key = None
+            else:
+                self._stack.pop()
+                if self._array_depth is None:
+                    continue
+                if len(self._stack) == self._array_depth and item_start is not None and ch == "}":
+                    self._item.append(text[item_start:i])
+                    items.append(CODEC.loads("".join(self._item)))
+                    self._item = []
+                    item_start = None
+                elif len(self._stack) < self._array_depth:
+                    self._array_depth = None
+                    self.done = True
+
+        if item_start is not None:
+            self._item.append(text[item_start:])
+        return items
+
+
+_LINE_END = re.compile(r"\r\n|\r|\n")
+
+
+class SSEParser:
+    """
+    Incremental parser for a `text/event-stream` body (Server-Sent Events):
+    - `feed(text)` returns the events completed by that chunk as dicts
+      `{"id", "event", "data"}`; lines may be split anywhere across chunks
+    - `last_event_id` is the id to send as `Last-Event-ID` when reconnecting. Like
+      in a browser it only advances when an event is complete, so an event cut
+      off mid-way is replayed; `retry` is the reconnection delay (ms) the server asked for
+    - Optional `on_data(fragment)` receives the data of the event being read while
+      it is still arriving, so a large JSON payload can be parsed progressively
+    """
+
+    def __init__(self, on_data=None, last_event_id: str = ""):
+        self.on_data = on_data
+        self.last_event_id = last_event_id
+        self.retry = None
+        self._line = ""  # incomplete last line
+        self._skip_lf = False  # previous chunk ended with CR, a leading LF belongs to it
+        self._id = last_event_id  # id buffer of the event being read
+        self._event = ""
+        self._data = []
+        self._streamed = 0  # position in `_line` up to which `on_data` has seen it
+
+    def feed(self, text: str) -> list:
+        events = []
+        if self._skip_lf and text.startswith("\n"):
+            text = text[1:]
+        self._skip_lf = False
+        start = 0
+        for m in _LINE_END.finditer(text):
+            line = self._line + text[start:m.start()]
+            self._line = ""
+            self._process(line, events)
+            start = m.end()
+        if text.endswith("\r"):
+            self._skip_lf = True
+        self._line += text[start:]
+        if self.on_data is not None and self._line.startswith("data:"):
+            self._pass_data(self._line, complete=False)
+        return events
+
+    def _pass_data(self, line: str, complete: bool):
+        if self._streamed == 0:
+            if len(line) == 5 and not complete:
+                return  # the optional space after "data:" is still to come
+            if self._data:
+                self.on_data("\n")
+            self._streamed = 6 if line[5:6] == " " else 5
+        if len(line) > self._streamed:
+            self.on_data(line[self._streamed:])
+            self._streamed = len(line)
+        if complete:
+            self._streamed = 0
+
+    def _process(self, line: str, events: list):
+        if not line:
+            self.last_event_id = self._id
+            if self._data:
+                events.append({"id": self._id, "event": self._event or "message", "data": "\n".join(self._data)})
+            self._data = []
+            self._event = ""
+            return
+        if line.startswith(":"):
+            return  # comment / keep-alive
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            if self.on_data is not None:
+                self._pass_data(line if line.startswith("data:") else "data:", complete=True)
+            self._data.append(value)
+        elif field == "event":
+            self._event = value
+        elif field == "id":
+            if "\0" not in value:
+                self._id = value
+        elif field == "retry" and value.isdigit():
+            self.retry = int(value)
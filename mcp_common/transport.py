@@ -0,0 +1,256 @@
+import os
+import time
+import httpx
+
+from .auth import TokenManager
+from .cassette import RECORDER
+from .codec import CODEC
+from .metrics import METRICS
+from .resilience import ResilientCaller, TransientError, transient_error
+from .scheduler import SCHEDULER, RequestScheduler, lane_for
+from .streaming import JSONArrayStreamParser
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 support in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class MCPError(Exception):
+    """JSON-RPC error object returned by the MCP server."""
+
+    def __init__(self, code: int, message: str, data=None):
+        super().__init__(f"{message} (code {code})")
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class MCPTransport:
+    """
+    Long-lived, pooled HTTP transport for MCP JSON-RPC calls. Every call goes
+    through the resilience policy, the request scheduler and, when configured,
+    the OAuth token manager; see "Python Client Configuration" in the README.
+
+    Environment variables (used when the argument is not given):
+        MCP_HTTP_MAX_CONNECTIONS, MCP_HTTP_MAX_KEEPALIVE, MCP_HTTP_KEEPALIVE_EXPIRY,
+        MCP_HTTP_TIMEOUT, MCP_HTTP_CONNECT_TIMEOUT, MCP_HTTP2
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = None,
+        max_keepalive_connections: int = None,
+        keepalive_expiry: float = None,
+        timeout: float = None,
+        connect_timeout: float = None,
+        http2: bool = None,
+        resilience: ResilientCaller = None,
+        auth: TokenManager = None,
+        scheduler: RequestScheduler = None,
+    ):
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections or _env_int("MCP_HTTP_MAX_CONNECTIONS", 100),
+            max_keepalive_connections=max_keepalive_connections or _env_int("MCP_HTTP_MAX_KEEPALIVE", 20),
+            keepalive_expiry=keepalive_expiry or _env_float("MCP_HTTP_KEEPALIVE_EXPIRY", 30.0),
+        )
+        self.timeout = httpx.Timeout(
+            timeout or _env_float("MCP_HTTP_TIMEOUT", 30.0),
+            connect=connect_timeout or _env_float("MCP_HTTP_CONNECT_TIMEOUT", 5.0),
+        )
+        if http2 is None:
+            http2 = _env_bool("MCP_HTTP2", True)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._client = None
+        self._message_id = 0
+        self.auth = auth if auth is not None else TokenManager.from_env()
+        self.scheduler = scheduler or SCHEDULER
+        self.resilience = resilience or ResilientCaller(retry_on=(httpx.TransportError,))
+        if self.resilience.breaker.probe is None:
+            self.resilience.breaker.probe = self.ping
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared pooled client, created on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+                headers={"Content-Type": "application/json"},
+            )
+        return self._client
+
+    def next_id(self) -> int:
+        """Return a new JSON-RPC message id (the Apex server expects numeric ids)."""
+        self._message_id += 1
+        return self._message_id
+
+    async def _auth_headers(self, headers: dict = None) -> tuple:
+        """Return (headers with the bearer token, token), or (headers, None) without auth."""
+        if self.auth is None:
+            return headers, None
+        token = await self.auth.get_token()
+        return {**(headers or {}), "Authorization": f"Bearer {token}"}, token
+
+    async def post(self, payload, headers: dict = None) -> httpx.Response:
+        """POST a JSON-RPC payload to the MCP endpoint over the pooled client."""
+        request_headers, token = await self._auth_headers(headers)
+        content = CODEC.dumpb(payload)
+        resp = await self.client.post(self.base_url, content=content, headers=request_headers)
+        if resp.status_code == 401 and token is not None:
+            # Expired or revoked session: resend once with a fresh token
+            self.auth.invalidate(token)
+            request_headers, token = await self._auth_headers(headers)
+            resp = await self.client.post(self.base_url, content=content, headers=request_headers)
+        self.scheduler.observe(resp.headers)
+        return resp
+
+    def build_request(self, method: str, params: dict = None) -> dict:
+        """Build a JSON-RPC request object with a fresh id."""
+        return {
+            "jsonrpc": "2.0",
+            "id": self.next_id(),
+            "method": method,
+            "params": params or {},
+        }
+
+    @staticmethod
+    def _raise_for_transient(resp: httpx.Response):
+        if resp.status_code >= 400:
+            error = transient_error(resp.status_code, resp.text, resp.headers.get("Retry-After"))
+            if error is not None:
+                raise error
+
+    async def call(self, method: str, params: dict = None) -> dict:
+        """
+        Send a single JSON-RPC request and return the decoded response body.
+        Idempotent methods are retried on transient failures (see ResilientCaller).
+        """
+        return await self.resilience.call(method, lambda: self._call_once(method, params))
+
+    async def ping(self):
+        """One `ping` round trip, bypassing retries; raises unless the server answers."""
+        body = await self._call_once("ping", {})
+        if "error" in body:
+            error = body["error"] or {}
+            raise MCPError(error.get("code", 0), error.get("message", "ping failed"), error.get("data"))
+
+    async def _call_once(self, method: str, params: dict = None) -> dict:
+        async with self.scheduler.slot(lane_for(method)):
+            return await self._call_admitted(method, params)
+
+    async def _call_admitted(self, method: str, params: dict = None) -> dict:
+        with METRICS.span("mcp_request_duration_seconds", client="transport", method=method) as span:
+            request = self.build_request(method, params)
+            started = time.perf_counter()
+            resp = await self.post(request)
+            self._raise_for_transient(resp)
+            resp.raise_for_status()
+            body = CODEC.decode_response(method, resp.content)
+            if "error" in body:
+                span.status = "rpc_error"
+            if RECORDER.enabled:
+                RECORDER.record("mcp", request, body, time.perf_counter() - started)
+            return body
+
+    async def stream_items(self, method: str, params: dict = None, path=("result", "contents")):
+        """
+        Send a JSON-RPC request and yield the objects of the array at `path`
+        (default `result.contents`) as soon as each one has arrived, without
+        waiting for, or holding, the whole response body.
+
+        Raises MCPError when the server answers with a JSON-RPC error instead.
+        Transient failures are retried as long as no item has been yielded.
+        The request scheduler slot is released with the first item, so a slow
+        consumer does not hold lane capacity while the body is still arriving.
+        """
+        async for item in self.resilience.stream(method, lambda: self._stream_once(method, params, path)):
+            yield item
+
+    async def _stream_once(self, method: str, params: dict, path):
+        lane = lane_for(method)
+        await self.scheduler.acquire(lane)
+        held = True
+        try:
+            async for item in self._stream_admitted(method, params, path):
+                if held:
+                    # The server has answered: the rest of the body moves at the pace of the
+                    # consumer (e.g. EventQueue writes), which must not hold lane capacity
+                    held = False
+                    self.scheduler.release(lane)
+                yield item
+        finally:
+            if held:
+                self.scheduler.release(lane)
+
+    async def _stream_admitted(self, method: str, params: dict, path):
+        parser = JSONArrayStreamParser(path)
+        prefix = []  # body seen before the array starts (holds an error reply)
+        recorded = [] if RECORDER.enabled else None  # whole body, only kept while recording
+        with METRICS.span("mcp_request_duration_seconds", client="transport", method=method) as span:
+            headers, token = await self._auth_headers()
+            request = self.build_request(method, params)
+            started = time.perf_counter()
+            async with self.client.stream("POST", self.base_url, content=CODEC.dumpb(request), headers=headers) as resp:
+                self.scheduler.observe(resp.headers)
+                if resp.status_code == 401 and token is not None:
+                    self.auth.invalidate(token)
+                    raise TransientError("HTTP 401: session expired", 401)
+                if resp.status_code >= 400:
+                    await resp.aread()
+                    self._raise_for_transient(resp)
+                resp.raise_for_status()
+                async for text in resp.aiter_text():
+                    if not parser.found:
+                        prefix.append(text)
+                    if recorded is not None:
+                        recorded.append(text)
+                    for item in parser.feed(text):
+                        yield item
+
+            if recorded is not None and parser.found:
+                RECORDER.record("mcp", request, CODEC.loads("".join(recorded)), time.perf_counter() - started)
+            if not parser.found:
+                span.status = "rpc_error"
+                body = CODEC.loads("".join(prefix) or "{}")
+                error = body.get("error") or {}
+                raise MCPError(
+                    error.get("code", 0),
+                    error.get("message", f"No {'.'.join(path)} in {method} response"),
+                    error.get("data"),
+                )
+
+    async def aclose(self):
+        """Close the pooled client and release all open connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.auth is not None:
+            await self.auth.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,40 @@
+import importlib.util
+import os
+import socket
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# mcp_common, the local stand-ins in benchmarks/ and the A2A agent modules
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks"), os.path.join(ROOT, "agent-to-agent")]
+# Keep the tests independent of the environment the clients are configured by
+for name in list(os.environ):
+    if name.startswith(("MCP_", "A2A_", "LLM_", "OPENAI_")):
+        del os.environ[name]
+os.environ["OPENAI_API_KEY"] = "test"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def free_port():
+    """Return a function giving a free local TCP port per call."""
+    def port() -> int:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    return port
+
+
+@pytest.fixture(scope="session")
+def mcp_client_module():
+    """`client/mcp-client.py` (not importable by name)."""
+    spec = importlib.util.spec_from_file_location("mcp_client", os.path.join(ROOT, "client", "mcp-client.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
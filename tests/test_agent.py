@@ -0,0 +1,63 @@
+import pytest
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import TaskArtifactUpdateEvent
+
+from agent_executor import LLMBackedAgent
+from mcp_common import CapabilityCache, MCPTransport
+from stub_mcp_server import build_app, serve_app
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_discovery_errors_are_not_cached(free_port, tmp_path):
+    app = build_app(rpc_errors={"resources/list": 1})
+    snapshot = tmp_path / "capabilities.json"
+    async with serve_app(app, port=free_port()) as url:
+        agent = LLMBackedAgent(
+            url, transport=MCPTransport(url), capability_cache=CapabilityCache(snapshot_path=str(snapshot))
+        )
+        try:
+            await agent.discover_resources()
+            assert agent.resources == {}
+            assert agent.capability_cache.get("resources") is None
+            assert not snapshot.exists()
+
+            await agent.discover_resources()
+            assert list(agent.resources) == ["product-catalog"]
+            assert app.state.requests == 2
+        finally:
+            await agent.aclose()
+
+
+async def _streamed_contents(agent: LLMBackedAgent, uri: str) -> list:
+    queue = EventQueue()
+    await agent.stream_resource("product-catalog", uri, TaskUpdater(queue, "task-1", "context-1"))
+    contents = []
+    while not queue.queue.empty():
+        event = await queue.dequeue_event(no_wait=True)
+        if isinstance(event, TaskArtifactUpdateEvent):
+            contents.extend(part.root.data for part in event.artifact.parts)
+    return contents
+
+
+@pytest.mark.parametrize("first", ["read", "stream"])
+async def test_read_and_stream_share_cached_contents(free_port, first):
+    app = build_app()
+    uri = "@server://services"
+    async with serve_app(app, port=free_port()) as url:
+        agent = LLMBackedAgent(url, transport=MCPTransport(url))
+        try:
+            if first == "read":
+                read = await agent._read_resource(uri)
+                streamed = await _streamed_contents(agent, uri)
+            else:
+                streamed = await _streamed_contents(agent, uri)
+                read = await agent._read_resource(uri)
+            assert app.state.requests == 1
+            assert read == {"result": {"contents": streamed}}
+            assert len(streamed) == 10
+            # The cached value is the same whichever path stored it
+            assert agent.resource_cache.get(uri) == read
+        finally:
+            await agent.aclose()
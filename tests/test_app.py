@@ -0,0 +1,116 @@
+import importlib.util
+import json
+import logging
+import os
+
+import httpx
+import pytest
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH, EXTENDED_AGENT_CARD_PATH, PREV_AGENT_CARD_WELL_KNOWN_PATH
+
+import app as app_module
+from task_store import SQLiteTaskStore
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+@pytest.fixture(scope="module")
+def cli():
+    """`agent-to-agent/__main__.py`, loaded without starting the server."""
+    spec = importlib.util.spec_from_file_location("a2a_cli", os.path.join(ROOT, "agent-to-agent", "__main__.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(autouse=True)
+def keep_test_logging(monkeypatch):
+    """`create_app` configures the root logger of a worker; keep pytest's handlers."""
+    monkeypatch.setattr(app_module, "configure_logging", lambda: None)
+
+
+def _client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_cli_defaults(cli):
+    args = cli.parse_args([])
+    assert (args.host, args.port, args.workers) == ("0.0.0.0", 9999, 1)
+    assert (args.keep_alive, args.backlog, args.graceful_timeout) == (5, 2048, 30)
+
+
+def test_cli_reads_the_environment(cli, monkeypatch):
+    monkeypatch.setenv("A2A_PORT", "8080")
+    monkeypatch.setenv("A2A_WORKERS", "3")
+    monkeypatch.setenv("A2A_KEEP_ALIVE", "75")
+    args = cli.parse_args([])
+    assert (args.port, args.workers, args.keep_alive) == (8080, 3, 75)
+    # Flags win over the environment
+    assert cli.parse_args(["--port", "7000", "--workers", "2"]).port == 7000
+
+
+def test_zero_workers_means_one_per_core(cli, monkeypatch):
+    monkeypatch.setattr(cli.os, "cpu_count", lambda: 6)
+    assert cli.parse_args(["--workers", "0"]).workers == 6
+    monkeypatch.setattr(cli.os, "cpu_count", lambda: None)
+    assert cli.parse_args(["--workers", "0"]).workers == 1
+
+
+def test_recording_needs_a_single_worker(cli, monkeypatch, capsys):
+    monkeypatch.setenv("MCP_RECORD", "session.jsonl.gz")
+    assert cli.parse_args(["--workers", "1"]).workers == 1
+    with pytest.raises(SystemExit):
+        cli.parse_args(["--workers", "2"])
+    assert "MCP_RECORD records a single process" in capsys.readouterr().err
+
+
+@pytest.mark.anyio
+async def test_agent_cards_are_served_pre_encoded(monkeypatch):
+    monkeypatch.setenv("A2A_PUBLIC_URL", "https://agent.example.com/")
+    public_card, extended_card = app_module.build_agent_cards()
+    app = app_module.create_app()
+    async with _client(app) as http:
+        public = await http.get(AGENT_CARD_WELL_KNOWN_PATH)
+        previous = await http.get(PREV_AGENT_CARD_WELL_KNOWN_PATH)
+        extended = await http.get(EXTENDED_AGENT_CARD_PATH)
+
+    assert public.headers["content-type"] == "application/json"
+    assert public.content == app_module._card_json(public_card)
+    assert public.json()["url"] == "https://agent.example.com/"
+    # The deprecated path is still served by the SDK handler
+    assert previous.json() == public.json()
+    assert extended.content == app_module._card_json(extended_card)
+    assert [skill["id"] for skill in json.loads(extended.content)["skills"]] == ["hello_world", "super_hello_world"]
+
+
+@pytest.mark.anyio
+async def test_lifespan_closes_the_executor_and_task_store(monkeypatch, tmp_path):
+    closed = []
+
+    class Executor(app_module.HelloWorldAgentExecutor):
+        async def aclose(self):
+            closed.append("executor")
+            await super().aclose()
+
+    monkeypatch.setattr(app_module, "HelloWorldAgentExecutor", Executor)
+    monkeypatch.setenv("A2A_TASK_STORE", f"sqlite:///{tmp_path / 'tasks.db'}")
+    store_aclose = SQLiteTaskStore.aclose
+
+    async def aclose(self):
+        closed.append("task_store")
+        await store_aclose(self)
+
+    monkeypatch.setattr(SQLiteTaskStore, "aclose", aclose)
+    app = app_module.create_app()
+    async with app.router.lifespan_context(app):
+        assert closed == []
+    assert closed == ["executor", "task_store"]
+
+
+@pytest.mark.parametrize("store, warns", [(None, True), ("sqlite", False)])
+def test_in_memory_store_with_several_workers_warns(monkeypatch, tmp_path, caplog, store, warns):
+    monkeypatch.setenv("A2A_WORKERS", "4")
+    if store:
+        monkeypatch.setenv("A2A_TASK_STORE", f"sqlite:///{tmp_path / 'tasks.db'}")
+    with caplog.at_level(logging.WARNING, logger="A2AServer"):
+        app_module.create_app()
+    assert any("In-memory task store" in record.message for record in caplog.records) is warns
@@ -0,0 +1,113 @@
+import asyncio
+import contextlib
+import time
+
+import httpx
+import pytest
+
+import fake_token_server
+import stub_mcp_server
+from mcp_common import AuthError, MCPTransport, TokenManager
+
+pytestmark = pytest.mark.anyio
+
+
+class _Everything:
+    """`app.state.revoked` that revokes every token, even the ones issued later."""
+
+    def __contains__(self, token):
+        return True
+
+
+@contextlib.asynccontextmanager
+async def _servers(free_port, **token_options):
+    """(token app, login URL, MCP stub app, MCP URL) with the stub requiring a token."""
+    token_app = fake_token_server.build_app(client_id="id", client_secret="secret", **token_options)
+    mcp_app = stub_mcp_server.build_app(require_auth=True)
+    async with stub_mcp_server.serve_app(token_app, port=free_port()) as login_url:
+        async with stub_mcp_server.serve_app(mcp_app, port=free_port()) as mcp_url:
+            yield token_app, login_url.rstrip("/"), mcp_app, mcp_url
+
+
+async def test_concurrent_callers_share_one_token_request(free_port):
+    async with _servers(free_port, latency=0.05) as (token_app, login_url, _, _):
+        manager = TokenManager("id", "secret", login_url=login_url)
+        try:
+            tokens = await asyncio.gather(*(manager.get_token() for _ in range(20)))
+            assert set(tokens) == {token_app.state.issued[0]}
+            assert len(token_app.state.issued) == 1
+            # Cached afterwards
+            assert await manager.get_token() == tokens[0]
+            assert len(token_app.state.issued) == 1
+        finally:
+            await manager.aclose()
+
+
+async def test_token_is_refreshed_in_the_background_before_expiry(free_port):
+    async with _servers(free_port, ttl=1) as (token_app, login_url, _, _):
+        manager = TokenManager("id", "secret", login_url=login_url)
+        try:
+            first = await manager.get_token()
+            expires_at = manager.expires_at
+            deadline = time.monotonic() + 5
+            while manager.refreshes < 2:
+                assert time.monotonic() < deadline, "token was not refreshed"
+                await asyncio.sleep(0.01)
+            # Refreshed at half the lifetime, while the first token was still valid
+            assert time.time() < expires_at
+            assert manager.access_token == token_app.state.issued[1] != first
+            assert await manager.get_token() == token_app.state.issued[1]
+        finally:
+            await manager.aclose()
+
+
+async def test_rejected_credentials_raise_auth_error(free_port):
+    async with _servers(free_port) as (_, login_url, _, _):
+        manager = TokenManager("id", "wrong", login_url=login_url)
+        try:
+            with pytest.raises(AuthError, match="invalid client credentials"):
+                await manager.get_token()
+        finally:
+            await manager.aclose()
+
+
+async def test_transport_renews_a_rejected_token_once(free_port):
+    async with _servers(free_port) as (token_app, login_url, mcp_app, mcp_url):
+        async with MCPTransport(mcp_url, auth=TokenManager("id", "secret", login_url=login_url)) as transport:
+            assert "result" in await transport.call("tools/list")
+            mcp_app.state.revoked.add(token_app.state.issued[0])
+
+            mcp_app.state.requests = 0
+            assert "result" in await transport.call("tools/list")
+            assert mcp_app.state.requests == 2
+            assert len(token_app.state.issued) == 2
+
+            mcp_app.state.revoked, mcp_app.state.requests = _Everything(), 0
+            with pytest.raises(httpx.HTTPStatusError) as failure:
+                await transport.call("tools/list")
+            assert failure.value.response.status_code == 401
+            assert mcp_app.state.requests == 2
+            assert len(token_app.state.issued) == 3
+
+
+async def test_client_renews_a_rejected_token_once(mcp_client_module, free_port):
+    async with _servers(free_port) as (token_app, login_url, mcp_app, mcp_url):
+        client = mcp_client_module.MCPClient(mcp_url, auth=TokenManager("id", "secret", login_url=login_url))
+        try:
+            await client.connect()
+            assert [tool["name"] for tool in client.tools] == ["LeadTool"]
+            assert len(token_app.state.issued) == 1
+            mcp_app.state.revoked.add(token_app.state.issued[0])
+
+            mcp_app.state.requests = 0
+            response = await client.send_request("tools/call", {"name": "LeadTool", "arguments": {}})
+            assert response["result"]["content"][0]["text"] == "Called LeadTool"
+            assert mcp_app.state.requests == 2
+            assert len(token_app.state.issued) == 2
+
+            mcp_app.state.revoked, mcp_app.state.requests = _Everything(), 0
+            assert await client.send_request("tools/call", {"name": "LeadTool", "arguments": {}}) is None
+            assert mcp_app.state.requests == 2
+            assert len(token_app.state.issued) == 3
+        finally:
+            await client.close()
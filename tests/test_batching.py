@@ -0,0 +1,98 @@
+import pytest
+
+from mcp_common import METRICS, is_idempotent
+from stub_mcp_server import build_app, serve_app
+
+pytestmark = pytest.mark.anyio
+
+CALLS = [("tools/list", {}), ("resources/list", {}), ("resources/read", {"uri": "@server://services"})]
+
+
+async def _client(module, url):
+    client = module.MCPClient(url)
+    client.resilience.base_delay = 0.0
+    await client.connect()
+    return client
+
+
+async def test_batch_is_one_post(mcp_client_module, free_port):
+    app = build_app()
+    async with serve_app(app, port=free_port()) as url:
+        client = await _client(mcp_client_module, url)
+        try:
+            app.state.requests = 0
+            replies = await client.send_batch(CALLS)
+        finally:
+            await client.close()
+    assert [list(reply["result"]) for reply in replies] == [["tools"], ["resources"], ["contents"]]
+    assert app.state.requests == 1
+
+
+async def test_http_failure_keeps_batching(mcp_client_module, free_port):
+    app = build_app()
+    async with serve_app(app, port=free_port()) as url:
+        client = await _client(mcp_client_module, url)
+        try:
+            app.state.fail_rate, app.state.requests = 1.0, 0
+            assert await client.send_batch(CALLS) == [None, None, None]
+            # Idempotent batch: retried like a single request
+            assert app.state.requests == client.resilience.max_attempts
+
+            app.state.fail_rate, app.state.requests = 0.0, 0
+            replies = await client.send_batch(CALLS)
+        finally:
+            await client.close()
+    assert client.batcher.batch_supported
+    assert all("result" in reply for reply in replies)
+    assert app.state.requests == 1
+
+
+async def test_batch_with_a_tool_call_is_not_retried(mcp_client_module, free_port):
+    app = build_app()
+    async with serve_app(app, port=free_port()) as url:
+        client = await _client(mcp_client_module, url)
+        try:
+            app.state.fail_rate, app.state.requests = 1.0, 0
+            calls = [("tools/list", {}), ("tools/call", {"name": "LeadTool", "arguments": {}})]
+            assert await client.send_batch(calls) == [None, None]
+        finally:
+            await client.close()
+    assert app.state.requests == 1
+
+
+async def test_server_without_batches_falls_back_once(mcp_client_module, free_port):
+    app = build_app(batch=False)
+    async with serve_app(app, port=free_port()) as url:
+        client = await _client(mcp_client_module, url)
+        try:
+            app.state.requests = 0
+            first = await client.send_batch(CALLS)
+            assert not client.batcher.batch_supported
+            assert app.state.requests == 1 + len(CALLS)
+
+            app.state.requests = 0
+            second = await client.send_batch(CALLS)
+        finally:
+            await client.close()
+    assert app.state.requests == len(CALLS)
+    assert [reply["result"] for reply in first] == [reply["result"] for reply in second]
+
+
+async def test_batch_latency_is_recorded(mcp_client_module, free_port, monkeypatch):
+    monkeypatch.setattr(METRICS, "enabled", True)
+    app = build_app()
+    async with serve_app(app, port=free_port()) as url:
+        client = await _client(mcp_client_module, url)
+        try:
+            await client.send_batch(CALLS)
+        finally:
+            await client.close()
+    assert 'client="mcp-client",method="batch",status="ok"' in METRICS.render()
+
+
+def test_is_idempotent():
+    assert is_idempotent("resources/read")
+    assert is_idempotent({"method": "tools/list"})
+    assert is_idempotent([{"method": "tools/list"}, {"method": "resources/read"}])
+    assert not is_idempotent([{"method": "tools/list"}, {"method": "tools/call"}])
+    assert not is_idempotent("tools/call")
@@ -0,0 +1,41 @@
+import json
+import logging
+import multiprocessing
+import os
+
+from mcp_common import CapabilityCache
+
+TOOLS = [{"name": "LeadTool", "description": "Manages lead operations", "inputSchema": {"type": "object"}}]
+
+
+def _save_repeatedly(path: str, rounds: int):
+    """Worker process body; exits with 1 if any snapshot write failed."""
+    failures = []
+    handler = logging.Handler(logging.WARNING)
+    handler.emit = failures.append
+    logging.getLogger("mcp_common.capability_cache").addHandler(handler)
+    cache = CapabilityCache(snapshot_path=path)
+    for i in range(rounds):
+        cache.set("tools", TOOLS * (i % 5 + 1))
+    os._exit(1 if failures else 0)
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "capabilities.json")
+    CapabilityCache(snapshot_path=path).set("tools", TOOLS)
+    assert CapabilityCache(snapshot_path=path).get("tools") == TOOLS
+    assert os.listdir(tmp_path) == ["capabilities.json"]
+
+
+def test_workers_saving_together_never_tear_the_snapshot(tmp_path):
+    path = str(tmp_path / "capabilities.json")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_save_repeatedly, args=(path, 200)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert [worker.exitcode for worker in workers] == [0, 0, 0, 0]
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["entries"]["tools"]["items"][0] == TOOLS[0]
+    assert os.listdir(tmp_path) == ["capabilities.json"]
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from mcp_common import CapabilityCache
+from stub_mcp_server import build_app, serve_app
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_discovery_calls_run_concurrently(mcp_client_module, free_port):
+    app = build_app(latency=0.2)
+    async with serve_app(app, port=free_port()) as url:
+        client = mcp_client_module.MCPClient(url, capability_cache=CapabilityCache(ttl=60))
+        try:
+            await client.connect()
+        finally:
+            await client.close()
+    assert [tool["name"] for tool in client.tools] == ["LeadTool"]
+    assert [resource["name"] for resource in client.resources] == ["product-catalog"]
+    assert client.prompts
+    timings = client.connect_timings
+    assert min(timings[kind] for kind in ("tools", "resources", "prompts")) >= 0.2
+    # Three 0.2 s calls in parallel, not one after another
+    assert timings["total"] < 0.45
+    assert app.state.requests == 3
+
+
+async def test_failed_kind_does_not_abort_discovery(mcp_client_module, free_port):
+    app = build_app(rpc_errors={"prompts/list": 1})
+    cache = CapabilityCache(ttl=60)
+    async with serve_app(app, port=free_port()) as url:
+        client = mcp_client_module.MCPClient(url, capability_cache=cache)
+        try:
+            await client.connect()
+        finally:
+            await client.close()
+        assert client.prompts == []
+        assert client.tools and client.resources
+        assert cache.get("prompts") is None
+
+        # Fresh kinds come from the cache; only the failed one is asked again
+        app.state.requests = 0
+        client = mcp_client_module.MCPClient(url, capability_cache=cache)
+        try:
+            await client.connect()
+        finally:
+            await client.close()
+    assert client.prompts
+    assert app.state.requests == 1
+
+
+async def test_plan_steps_run_in_parallel(mcp_client_module, free_port):
+    app = build_app(latency=0.2)
+    async with serve_app(app, port=free_port()) as url:
+        client = mcp_client_module.MCPClient(url, capability_cache=CapabilityCache(ttl=60))
+        try:
+            await client.connect()
+            started = time.perf_counter()
+            result = await client.execute_plan({"steps": [
+                {"id": "catalog", "type": "resource", "name": "product-catalog"},
+                {"id": "lead", "type": "tool", "name": "LeadTool", "arguments": {}},
+                {"id": "missing", "type": "resource", "name": "no-such-resource"},
+                {"id": "after", "type": "tool", "name": "LeadTool", "depends_on": ["missing"]},
+            ]})
+            elapsed = time.perf_counter() - started
+        finally:
+            await client.close()
+    assert [step["status"] for step in result["steps"]] == ["ok", "ok", "error", "skipped"]
+    assert len(result["steps"][0]["result"]["result"]["contents"]) == 10
+    assert elapsed < 0.35
@@ -0,0 +1,96 @@
+import json
+import logging
+
+import pytest
+
+from mcp_common.codec import MSGSPEC_AVAILABLE, ORJSON_AVAILABLE, JSONCodec
+from stub_mcp_server import _reply
+
+if MSGSPEC_AVAILABLE:
+    import msgspec
+
+BACKENDS = [
+    "json",
+    pytest.param("orjson", marks=pytest.mark.skipif(not ORJSON_AVAILABLE, reason="orjson not installed")),
+    pytest.param("msgspec", marks=pytest.mark.skipif(not MSGSPEC_AVAILABLE, reason="msgspec not installed")),
+]
+
+REPLIES = {
+    "tools/list": {"tools": [{
+        "name": "LeadTool",
+        "description": "Manages lead operations",
+        "inputSchema": {"type": "object"},
+        "outputSchema": {"type": "object", "properties": {"id": {"type": "string"}}},
+        "annotations": {"readOnlyHint": True},
+    }]},
+    "tools/call": {
+        "content": [{"type": "text", "text": "Called LeadTool"}],
+        "structuredContent": {"id": "00Q000000000001"},
+        "isError": False,
+    },
+    "resources/list": _reply({"id": 1, "method": "resources/list"})["result"],
+    "resources/templates/list": {"resourceTemplates": [
+        {"uriTemplate": "record://Lead/{id}", "name": "lead", "mimeType": "application/json", "icons": []},
+    ]},
+    "resources/read": _reply({"id": 1, "method": "resources/read", "params": {"uri": "@server://services"}})["result"],
+    "prompts/list": {"prompts": [{"name": "code-review", "arguments": [{"name": "code", "required": True}]}]},
+}
+
+
+def _raw(method: str) -> bytes:
+    return json.dumps({"jsonrpc": "2.0", "id": 7, "result": REPLIES[method]}, indent=2).encode()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("method", sorted(REPLIES))
+def test_backends_decode_the_same_value(backend, method):
+    expected = json.loads(_raw(method))
+    assert JSONCodec(backend).decode_response(method, _raw(method)) == expected
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_reply_not_matching_its_shape_is_still_decoded(backend):
+    raw = b'{"jsonrpc": "2.0", "id": 1, "result": {"contents": "not a list"}}'
+    assert JSONCodec(backend).decode_response("resources/read", raw)["result"] == {"contents": "not a list"}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_error_and_batch_replies(backend):
+    codec = JSONCodec(backend)
+    error = {"jsonrpc": "2.0", "id": 1, "error": {"code": -32603, "message": "Internal error"}}
+    assert codec.decode_response("resources/read", json.dumps(error)) == error
+    batch = [error, {"jsonrpc": "2.0", "id": 2, "result": {}}]
+    assert codec.decode_response(None, json.dumps(batch).encode()) == batch
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_round_trip(backend):
+    codec = JSONCodec(backend)
+    value = {"text": "Café ✓", "items": [1, 2.5, None, True]}
+    assert codec.loads(codec.dumpb(value)) == value
+    assert json.loads(codec.dumps(value)) == value
+
+
+
+@pytest.mark.skipif(not MSGSPEC_AVAILABLE, reason="msgspec not installed")
+def test_shape_is_validated_only_for_debug_logging(caplog, monkeypatch):
+    raw = json.dumps({"jsonrpc": "2.0", "id": 7, "result": {"contents": "not a list"}}).encode()
+    codec = JSONCodec("msgspec")
+    calls = []
+    convert = msgspec.convert
+    monkeypatch.setattr(msgspec, "convert", lambda *args, **kwargs: calls.append(args) or convert(*args, **kwargs))
+
+    with caplog.at_level(logging.INFO, logger="mcp_common.codec"):
+        codec.decode_response("resources/read", raw)
+    assert calls == []
+
+    with caplog.at_level(logging.DEBUG, logger="mcp_common.codec"):
+        codec.decode_response("resources/read", raw)
+    assert len(calls) == 1
+    assert "does not match ResourcesReadResult" in caplog.text
+
+
+def test_auto_prefers_orjson(monkeypatch):
+    monkeypatch.delenv("MCP_JSON_CODEC", raising=False)
+    expected = "orjson" if ORJSON_AVAILABLE else "msgspec" if MSGSPEC_AVAILABLE else "json"
+    assert JSONCodec().backend == expected
@@ -0,0 +1,91 @@
+import pytest
+
+from mcp_common import DecisionCache, capability_fingerprint
+from mcp_common.decision_cache import normalize_text
+
+FINGERPRINT = capability_fingerprint("product-catalog", "open-cases")
+DECISION = {"type": "resource", "name": "product-catalog"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalized_text_hits():
+    cache = DecisionCache(max_size=10, ttl=0)
+    cache.put("Show me the catalog of products.", FINGERPRINT, DECISION)
+    assert normalize_text("  SHOW me the   catalog of products!") == "show me the catalog of products"
+    assert cache.get("  SHOW me the   catalog of products!", FINGERPRINT) == DECISION
+    assert cache.get("show me the open cases", FINGERPRINT) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+
+def test_changed_capabilities_miss():
+    cache = DecisionCache(max_size=10, ttl=0)
+    cache.put("products", FINGERPRINT, DECISION)
+    assert capability_fingerprint("open-cases", "product-catalog") == FINGERPRINT
+    assert cache.get("products", capability_fingerprint("product-catalog")) is None
+
+
+def test_cached_decisions_are_copies():
+    cache = DecisionCache(max_size=10, ttl=0)
+    cache.put("products", FINGERPRINT, DECISION)
+    cache.get("products", FINGERPRINT)["name"] = "changed"
+    assert cache.get("products", FINGERPRINT) == DECISION
+
+
+def test_least_recently_used_is_evicted():
+    cache = DecisionCache(max_size=2, ttl=0)
+    cache.put("a", FINGERPRINT, DECISION)
+    cache.put("b", FINGERPRINT, DECISION)
+    cache.get("a", FINGERPRINT)
+    cache.put("c", FINGERPRINT, DECISION)
+    assert cache.get("b", FINGERPRINT) is None
+    assert cache.get("a", FINGERPRINT) == cache.get("c", FINGERPRINT) == DECISION
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_the_ttl():
+    clock = FakeClock()
+    cache = DecisionCache(max_size=10, ttl=60, clock=clock)
+    cache.put("products", FINGERPRINT, DECISION)
+    clock.now = 60
+    assert cache.get("products", FINGERPRINT) == DECISION
+    clock.now = 61
+    assert cache.get("products", FINGERPRINT) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_size_zero_disables_the_cache():
+    cache = DecisionCache(max_size=0, ttl=0)
+    cache.put("products", FINGERPRINT, DECISION)
+    assert cache.get("products", FINGERPRINT) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_fuzzy_match_reuses_decisions_without_arguments():
+    cache = DecisionCache(max_size=10, ttl=0, fuzzy_threshold=0.6)
+    cache.put("show the product catalog", FINGERPRINT, DECISION)
+    tool = {"type": "tool", "name": "LeadTool", "arguments": {"name": "Acme"}}
+    cache.put("create a lead for acme", FINGERPRINT, tool)
+
+    assert cache.get("please show the product catalog", FINGERPRINT) == DECISION
+    # Arguments come from the exact wording: never matched fuzzily
+    assert cache.get("create a lead for acme now", FINGERPRINT) is None
+    assert cache.get("show the product catalog", capability_fingerprint("other")) is None
+    assert cache.stats()["fuzzy_hits"] == 1
+
+
+@pytest.mark.parametrize("plan, fuzzy", [
+    ({"steps": [DECISION, {"type": "resource", "name": "open-cases"}]}, True),
+    ({"steps": [DECISION, {"type": "tool", "name": "LeadTool", "arguments": {"id": "1"}}]}, False),
+])
+def test_fuzzy_match_of_plans(plan, fuzzy):
+    cache = DecisionCache(max_size=10, ttl=0, fuzzy_threshold=0.6)
+    cache.put("products and open cases", FINGERPRINT, plan)
+    assert (cache.get("the products and open cases", FINGERPRINT) == plan) is fuzzy
@@ -0,0 +1,154 @@
+import asyncio
+import time
+
+import pytest
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from a2a.types import Message, MessageSendParams, Part, Role, TaskState, TaskStatusUpdateEvent, TextPart
+from openai import AsyncOpenAI, OpenAI
+
+import fake_llm_server
+import stub_mcp_server
+from agent_executor import HelloWorldAgentExecutor, LLMBackedAgent
+from mcp_common import RECORDER, load_cassette
+
+pytestmark = pytest.mark.anyio
+
+RESOURCES = [
+    {"name": "product-catalog", "uri": "@server://services", "description": "Products and prices"},
+    {"name": "open-cases", "uri": "@server://cases", "description": "Support cases"},
+]
+
+
+async def _until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def _agent(llm_url: str) -> LLMBackedAgent:
+    """An agent with known resources, routed by the fake LLM at `llm_url`."""
+    agent = LLMBackedAgent(
+        "http://127.0.0.1:9",
+        llm_client=AsyncOpenAI(base_url=f"{llm_url}v1", api_key="test", max_retries=0),
+    )
+    agent.registry.update("resources", RESOURCES)
+    return agent
+
+
+async def test_concurrent_completions_are_capped(free_port, monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "2")
+    app = fake_llm_server.build_app(latency=0.1)
+    async with stub_mcp_server.serve_app(app, port=free_port()) as url:
+        agent = _agent(url)
+        try:
+            # Distinct requests, so none is answered by the decision cache
+            decisions = await asyncio.gather(*(agent.orchestrate_llm(f"products {i}") for i in range(6)))
+        finally:
+            await agent.aclose()
+    assert {decision["name"] for decision in decisions} == {"product-catalog"}
+    assert app.state.requests == 6
+    assert app.state.max_in_flight == 2
+
+
+async def test_repeated_request_skips_the_llm(free_port):
+    app = fake_llm_server.build_app()
+    async with stub_mcp_server.serve_app(app, port=free_port()) as url:
+        agent = _agent(url)
+        try:
+            first = await agent.orchestrate_llm("Show me the products")
+            assert await agent.orchestrate_llm("show me the products!") == first
+            # A different resource set invalidates the decision
+            agent.registry.update("resources", RESOURCES[:1])
+            await agent.orchestrate_llm("Show me the products")
+        finally:
+            await agent.aclose()
+    assert first == {"type": "resource", "name": "product-catalog", "arguments": {}}
+    assert app.state.requests == 2
+
+
+async def test_slow_completion_falls_back_to_the_closest_resource(free_port, monkeypatch):
+    monkeypatch.setenv("LLM_TIMEOUT", "0.05")
+    app = fake_llm_server.build_app(latency=0.5)
+    async with stub_mcp_server.serve_app(app, port=free_port()) as url:
+        agent = _agent(url)
+        try:
+            started = time.perf_counter()
+            decision = await agent.orchestrate_llm("show me the support cases")
+            assert time.perf_counter() - started < 0.4
+            # A fallback is not a decision worth caching
+            assert agent.decision_cache.stats()["size"] == 0
+        finally:
+            await agent.aclose()
+    assert decision == {"type": "resource", "name": "open-cases"}
+
+
+async def test_cancel_interrupts_a_running_completion(free_port, monkeypatch):
+    llm_app = fake_llm_server.build_app(latency=2.0)
+    async with stub_mcp_server.serve_app(stub_mcp_server.build_app(), port=free_port()) as mcp_url:
+        async with stub_mcp_server.serve_app(llm_app, port=free_port()) as llm_url:
+            monkeypatch.setenv("MCP_SERVER_URL", mcp_url)
+            monkeypatch.setenv("OPENAI_BASE_URL", f"{llm_url}v1")
+            executor = HelloWorldAgentExecutor()
+            message = Message(
+                role=Role.user,
+                parts=[Part(root=TextPart(text="list the products"))],
+                message_id="m-1",
+                task_id="task-1",
+                context_id="context-1",
+            )
+            context = RequestContext(MessageSendParams(message=message), task_id="task-1", context_id="context-1")
+            queue = EventQueue()
+            try:
+                running = asyncio.create_task(executor.execute(context, queue))
+                await _until(lambda: llm_app.state.in_flight == 1)
+
+                started = time.perf_counter()
+                await executor.cancel(context, queue)
+                with pytest.raises(asyncio.CancelledError):
+                    await running
+                assert time.perf_counter() - started < 1.0
+                assert executor._running == {}
+            finally:
+                await executor.aclose()
+
+    events = []
+    while not queue.queue.empty():
+        events.append(await queue.dequeue_event(no_wait=True))
+    states = [event.status.state for event in events if isinstance(event, TaskStatusUpdateEvent)]
+    assert states == [TaskState.working, TaskState.canceled]
+
+
+async def test_client_records_every_prompt_once(mcp_client_module, free_port, monkeypatch, tmp_path):
+    llm_app = fake_llm_server.build_app(latency=0.05)
+    cassette = str(tmp_path / "session.jsonl")
+    async with stub_mcp_server.serve_app(stub_mcp_server.build_app(), port=free_port()) as mcp_url:
+        async with stub_mcp_server.serve_app(llm_app, port=free_port()) as llm_url:
+            monkeypatch.setattr(
+                mcp_client_module, "openai_client", OpenAI(base_url=f"{llm_url}v1", api_key="test", max_retries=0)
+            )
+            client = mcp_client_module.MCPClient(mcp_url)
+            try:
+                await client.connect()
+                RECORDER.start(cassette)
+                try:
+                    for _ in range(2):
+                        result = await client.invoke("Show me the catalog of products.")
+                        assert len(result["result"]["contents"]) == 10
+                finally:
+                    RECORDER.close()
+            finally:
+                await client.close()
+
+    entries = load_cassette(cassette)
+    prompts = [entry for entry in entries if entry["kind"] == "prompt"]
+    # The second request is answered by the decision cache and still recorded
+    assert llm_app.state.requests == 1
+    assert [entry["request"]["client"] for entry in prompts] == ["mcp-client", "mcp-client"]
+    # A prompt spans the whole request: the completion and the resource read
+    llm = next(entry for entry in entries if entry["kind"] == "llm")
+    read = next(entry for entry in entries if entry["kind"] == "mcp" and entry["request"]["method"] == "resources/read")
+    first = prompts[0]
+    assert first["at"] <= llm["at"]
+    assert first["at"] + first["duration"] >= read["at"] + read["duration"]
@@ -0,0 +1,122 @@
+import asyncio
+
+import httpx
+import pytest
+
+import app as app_module
+from mcp_common import METRICS, MetricsRegistry
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def keep_test_logging(monkeypatch):
+    """`create_app` configures the root logger of a worker; keep pytest's handlers."""
+    monkeypatch.setattr(app_module, "configure_logging", lambda: None)
+
+
+async def _scrape() -> httpx.Response:
+    """GET /metrics from a freshly built A2A app."""
+    transport = httpx.ASGITransport(app=app_module.create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        return await http.get("/metrics")
+
+
+def _samples(registry: MetricsRegistry) -> dict:
+    """The rendered samples of `registry`, keyed by series name and labels."""
+    samples = {}
+    for line in registry.render().splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            samples[series] = float(value)
+    return samples
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry(enabled=True)
+    histogram = registry.histogram("latency_seconds", "Latency", ("method",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, method="tools/list")
+
+    text = registry.render()
+    assert text.startswith("# HELP latency_seconds Latency\n# TYPE latency_seconds histogram\n")
+    samples = _samples(registry)
+    assert samples['latency_seconds_bucket{method="tools/list",le="0.1"}'] == 2
+    assert samples['latency_seconds_bucket{method="tools/list",le="1.0"}'] == 3
+    assert samples['latency_seconds_bucket{method="tools/list",le="+Inf"}'] == 4
+    assert samples['latency_seconds_sum{method="tools/list"}'] == pytest.approx(2.65)
+    assert samples['latency_seconds_count{method="tools/list"}'] == 4
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry(enabled=True)
+    registry.gauge("pool_size", "Pool size", ("name",)).set(3, name='a "b"\\c')
+    assert _samples(registry) == {'pool_size{name="a \\"b\\"\\\\c"}': 3}
+
+
+async def test_span_status_follows_the_block():
+    registry = MetricsRegistry(enabled=True)
+    with registry.span("stage_seconds", stage="read"):
+        pass
+    with pytest.raises(ValueError):
+        with registry.span("stage_seconds", stage="read"):
+            raise ValueError("boom")
+    with registry.span("stage_seconds", stage="read") as span:
+        span.status = "fallback"
+    # An explicit status wins over the exception
+    with pytest.raises(ValueError):
+        with registry.span("stage_seconds", stage="read") as span:
+            span.status = "timeout"
+            raise ValueError("boom")
+
+    async def cancelled():
+        with registry.span("stage_seconds", stage="read"):
+            await asyncio.sleep(10)
+
+    task = asyncio.create_task(cancelled())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    counts = {
+        series: value for series, value in _samples(registry).items() if series.startswith("stage_seconds_count")
+    }
+    assert counts == {
+        f'stage_seconds_count{{stage="read",status="{status}"}}': 1
+        for status in ("cancelled", "error", "fallback", "ok", "timeout")
+    }
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    histogram = registry.histogram("stage_seconds", "Stage latency", ("stage", "status"))
+    with pytest.raises(ValueError):
+        with registry.span("stage_seconds", stage="read") as span:
+            span.status = "fallback"
+            raise ValueError("boom")
+    assert registry.span("other_seconds") is span
+    assert histogram.render() == ["# HELP stage_seconds Stage latency", "# TYPE stage_seconds histogram"]
+
+
+def test_enabled_by_env(monkeypatch):
+    assert not MetricsRegistry().enabled
+    monkeypatch.setenv("MCP_METRICS", "true")
+    assert MetricsRegistry().enabled
+
+
+async def test_metrics_endpoint_is_mounted_when_enabled(monkeypatch, keep_test_logging):
+    monkeypatch.setattr(METRICS, "enabled", True)
+    with METRICS.span("agent_stage_duration_seconds", stage="test_endpoint"):
+        pass
+    response = await _scrape()
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE mcp_request_duration_seconds histogram" in response.text
+    assert 'agent_stage_duration_seconds_count{stage="test_endpoint",status="ok"} 1' in response.text
+
+
+async def test_metrics_endpoint_is_absent_when_disabled(monkeypatch, keep_test_logging):
+    monkeypatch.setattr(METRICS, "enabled", False)
+    response = await _scrape()
+    assert response.status_code == 404
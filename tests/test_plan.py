@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import pytest
+
+from mcp_common import PlanExecutor, normalize_plan
+
+pytestmark = pytest.mark.anyio
+
+READ = {"type": "resource", "name": "product-catalog"}
+
+
+def test_decision_shapes():
+    single = normalize_plan(READ)
+    assert single == [{"id": "step1", "type": "resource", "name": "product-catalog", "arguments": {}, "depends_on": []}]
+    assert [step["id"] for step in normalize_plan([READ, READ])] == ["step1", "step2"]
+    steps = normalize_plan({"steps": [
+        {"id": 1, "type": "tool", "name": "LeadTool", "arguments": {"name": "Acme"}},
+        {"id": 2, "name": "open-cases", "depends_on": [1]},
+    ]})
+    assert [(step["id"], step["type"], step["depends_on"]) for step in steps] == [("1", "tool", []), ("2", "resource", ["1"])]
+
+
+@pytest.mark.parametrize("decision, message", [
+    ({"steps": []}, "at least one step"),
+    ([READ, {"type": "resource"}], "every step needs a name"),
+    ("product-catalog", "Unsupported plan"),
+    ({"steps": [{"id": "a", "name": "x"}, {"id": "a", "name": "y"}]}, "unique"),
+    ({"steps": [{"id": "a", "name": "x", "depends_on": ["b"]}]}, "unknown steps"),
+    ({"steps": [{"id": "a", "name": "x", "depends_on": ["a"]}]}, "cycle"),
+    ({"steps": [
+        {"id": "a", "name": "x"},
+        {"id": "b", "name": "y", "depends_on": ["a", "d"]},
+        {"id": "c", "name": "z", "depends_on": ["b"]},
+        {"id": "d", "name": "w", "depends_on": ["c"]},
+    ]}, r"cycle between \['b', 'c', 'd'\]"),
+])
+def test_invalid_plans(decision, message):
+    with pytest.raises(ValueError, match=message):
+        normalize_plan(decision)
+
+
+def test_size_limit(monkeypatch):
+    assert len(normalize_plan([READ] * 3, max_steps=3)) == 3
+    with pytest.raises(ValueError, match="Plan has 4 steps, at most 3"):
+        normalize_plan([READ] * 4, max_steps=3)
+    monkeypatch.setenv("MCP_PLAN_MAX_STEPS", "2")
+    with pytest.raises(ValueError, match="at most 2"):
+        normalize_plan([READ] * 3)
+
+
+async def test_independent_steps_run_concurrently():
+    steps = normalize_plan([{"name": f"r{i}"} for i in range(4)])
+
+    async def run_step(step):
+        await asyncio.sleep(0.1)
+        return step["name"]
+
+    started = time.perf_counter()
+    outcomes = await PlanExecutor(max_workers=4, step_timeout=5).execute(steps, run_step)
+    assert time.perf_counter() - started < 0.3
+    assert [(o["status"], o["result"]) for o in outcomes] == [("ok", "r0"), ("ok", "r1"), ("ok", "r2"), ("ok", "r3")]
+
+
+async def test_workers_bound_concurrency():
+    running, peak = 0, 0
+
+    async def run_step(step):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    await PlanExecutor(max_workers=2, step_timeout=5).execute(normalize_plan([READ] * 6), run_step)
+    assert peak == 2
+
+
+async def test_dependents_of_failed_steps_are_skipped():
+    steps = normalize_plan({"steps": [
+        {"id": "lead", "name": "LeadTool"},
+        {"id": "cases", "name": "open-cases", "depends_on": ["lead"]},
+        {"id": "summary", "name": "summary", "depends_on": ["cases"]},
+        {"id": "catalog", "name": "product-catalog"},
+        {"id": "slow", "name": "slow"},
+        {"id": "after-slow", "name": "after", "depends_on": ["slow"]},
+    ]})
+    order = []
+
+    async def run_step(step):
+        order.append(step["id"])
+        if step["id"] == "lead":
+            raise RuntimeError("LeadTool failed")
+        if step["id"] == "slow":
+            await asyncio.sleep(1)
+        return step["name"]
+
+    outcomes = await PlanExecutor(max_workers=4, step_timeout=0.05).execute(steps, run_step)
+    status = {o["id"]: o["status"] for o in outcomes}
+    assert status == {
+        "lead": "error", "cases": "skipped", "summary": "skipped",
+        "catalog": "ok", "slow": "timeout", "after-slow": "skipped",
+    }
+    assert [o["id"] for o in outcomes] == [step["id"] for step in steps]
+    assert outcomes[0]["error"] == "LeadTool failed"
+    assert "Depends on failed steps ['lead']" in outcomes[1]["error"]
+    assert sorted(order) == ["catalog", "lead", "slow"]
+
+
+async def test_dependent_step_waits_for_its_dependency():
+    finished = {}
+
+    async def run_step(step):
+        await asyncio.sleep(0.05 if step["id"] == "first" else 0)
+        finished[step["id"]] = time.perf_counter()
+        return step["id"]
+
+    steps = normalize_plan({"steps": [{"id": "second", "name": "b", "depends_on": ["first"]}, {"id": "first", "name": "a"}]})
+    outcomes = await PlanExecutor(max_workers=4, step_timeout=5).execute(steps, run_step)
+    assert [o["status"] for o in outcomes] == ["ok", "ok"]
+    assert finished["first"] < finished["second"]
@@ -0,0 +1,131 @@
+import pytest
+
+from mcp_common import CapabilityRegistry
+from mcp_common.registry import compile_template
+
+TOOLS = [
+    {"name": "LeadTool", "description": "Create a sales lead", "tags": ["crm"]},
+    {"name": "CaseEscalation", "title": "Escalate a support case", "description": "Raise the case priority"},
+    {"name": "InvoiceLookup", "description": "Find an invoice by number"},
+]
+RESOURCES = [
+    {"name": "product-catalog", "uri": "@server://services", "description": "Products and prices"},
+    {"name": "open-cases", "uri": "@server://cases", "description": "Support cases"},
+]
+TEMPLATES = [
+    {"name": "account", "uriTemplate": "@server://accounts/{id}", "description": "One account"},
+    {"name": "account-contacts", "uriTemplate": "@server://accounts/{id}/contacts", "description": "Its contacts"},
+]
+
+
+@pytest.mark.parametrize(
+    "template, uri, matches",
+    [
+        ("@server://accounts/{id}", "@server://accounts/001", True),
+        ("@server://accounts/{id}", "@server://accounts/", False),
+        ("@server://accounts/{id}", "@server://accounts/001/contacts", False),
+        ("@server://accounts/{id}/contacts", "@server://accounts/001/contacts", True),
+        ("@server://a.b/{x}", "@server://aXb/1", False),
+        ("file:///{dir}/{name}.txt", "file:///logs/today.txt", True),
+        ("@server://services", "@server://services", True),
+        ("@server://services", "@server://services/1", False),
+    ],
+)
+def test_compile_template(template, uri, matches):
+    assert bool(compile_template(template).match(uri)) is matches
+
+
+def _registry(**options) -> CapabilityRegistry:
+    registry = CapabilityRegistry(**options)
+    registry.update("tools", TOOLS)
+    registry.update("resources", RESOURCES)
+    registry.update("resourceTemplates", TEMPLATES)
+    return registry
+
+
+def test_lookups_by_name():
+    registry = _registry()
+    assert registry.tool("LeadTool") is TOOLS[0]
+    assert registry.resource("open-cases") is RESOURCES[1]
+    assert registry.resource("account") is TEMPLATES[0]
+    assert registry.tool("open-cases") is None
+    assert len(registry) == 7
+    with pytest.raises(ValueError, match="Unknown capability kind"):
+        registry.update("widgets", [])
+
+
+def test_resource_for_uri_prefers_exact_uris():
+    registry = _registry()
+    assert registry.resource_for_uri("@server://services") is RESOURCES[0]
+    assert registry.resource_for_uri("@server://accounts/001") is TEMPLATES[0]
+    assert registry.resource_for_uri("@server://accounts/001/contacts") is TEMPLATES[1]
+    assert registry.resource_for_uri("@server://unknown") is None
+    assert registry.resource_for_uri("") is None
+
+    registry.update("resources", [*RESOURCES, {"name": "acme", "uri": "@server://accounts/acme"}])
+    assert registry.resource_for_uri("@server://accounts/acme")["name"] == "acme"
+
+
+def test_update_replaces_the_kind():
+    registry = _registry()
+    registry.update("tools", TOOLS[:1])
+    assert list(registry.tools) == ["LeadTool"]
+    assert registry.search("tools", "escalate the case") == []
+
+    # Updating with the list indexed last is a no-op, even when it was changed in place
+    items = list(TOOLS)
+    registry.update("tools", items)
+    items.pop()
+    registry.update("tools", items)
+    assert registry.tool("InvoiceLookup") is not None
+
+
+def test_search_ranks_by_field_weight():
+    registry = _registry()
+    # "case" is in the name of CaseEscalation, only in the description of open-cases
+    assert registry.search("tools", "Please escalate my support cases") == ["CaseEscalation"]
+    assert registry.search("resources", "show me the product prices") == ["product-catalog"]
+    assert registry.search("resources", "cases") == ["open-cases"]
+    # camelCase names and tags are indexed
+    assert registry.search("tools", "lead for the crm") == ["LeadTool"]
+    assert registry.search("tools", "invoice or lead", limit=1) in (["InvoiceLookup"], ["LeadTool"])
+    # Stopwords alone match nothing
+    assert registry.search("tools", "show me what is it") == []
+
+
+def test_small_kinds_are_sent_whole():
+    registry = _registry()
+    assert registry.candidates("anything") == {
+        "tools": ["LeadTool", "CaseEscalation", "InvoiceLookup"],
+        "resources": ["product-catalog", "open-cases"],
+    }
+
+
+def test_candidates_are_filtered_in_large_catalogs():
+    registry = CapabilityRegistry(max_candidates=5)
+    registry.update("tools", [{"name": f"Tool{i}", "description": f"generic helper {i}"} for i in range(50)] + TOOLS)
+    registry.update("resources", RESOURCES)
+
+    selected = registry.candidates("create a lead")
+    assert selected == {"tools": ["LeadTool"], "resources": ["product-catalog", "open-cases"]}
+    assert len(registry.candidates("generic helper")["tools"]) == 5
+
+
+def test_unmatched_query_gets_the_first_candidates():
+    registry = CapabilityRegistry(max_candidates=3)
+    registry.update("tools", [{"name": f"Tool{i}"} for i in range(10)])
+    registry.update("resources", [{"name": f"res{i}", "uri": f"@server://r{i}"} for i in range(10)])
+    assert registry.candidates("weather tomorrow") == {
+        "tools": ["Tool0", "Tool1", "Tool2"],
+        "resources": ["res0", "res1", "res2"],
+    }
+    assert registry.candidates("tool 7") == {"tools": ["Tool7", "Tool0", "Tool1"], "resources": ["res7"]}
+    # A match in one kind leaves the unmatched kind empty
+    assert registry.candidates("tool") == {"tools": ["Tool0", "Tool1", "Tool2"], "resources": []}
+
+
+def test_max_candidates_from_env(monkeypatch):
+    monkeypatch.setenv("MCP_LLM_MAX_CANDIDATES", "0")
+    registry = CapabilityRegistry()
+    registry.update("tools", [{"name": f"Tool{i}"} for i in range(30)])
+    assert len(registry.candidates("weather")["tools"]) == 30
@@ -0,0 +1,173 @@
+import time
+
+import pytest
+
+from mcp_common import CircuitBreaker, CircuitOpenError, MCPTransport, ResilientCaller, TransientError
+from mcp_common import resilience
+from stub_mcp_server import build_app, serve_app
+
+pytestmark = pytest.mark.anyio
+
+URI = "@server://services"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _transport(url, **options) -> MCPTransport:
+    breaker = CircuitBreaker(
+        failure_threshold=options.pop("failure_threshold", 0),
+        reset_timeout=options.pop("reset_timeout", 30),
+        clock=options.pop("clock", time.monotonic),
+    )
+    options.setdefault("base_delay", 0.0)
+    return MCPTransport(url, resilience=ResilientCaller(breaker=breaker, **options))
+
+
+async def test_idempotent_call_is_retried_until_it_succeeds(free_port):
+    app = build_app()
+    async with serve_app(app, port=free_port()) as url:
+        async with _transport(url, max_attempts=3) as transport:
+            app.state.fail_next = 2
+            body = await transport.call("resources/read", {"uri": URI})
+            assert len(body["result"]["contents"]) == 10
+            assert transport.resilience.retries == 2
+    assert app.state.requests == 3
+
+
+async def test_retries_give_up_after_max_attempts(free_port):
+    app = build_app(fail_rate=1.0, fail_status=403)
+    async with serve_app(app, port=free_port()) as url:
+        async with _transport(url, max_attempts=3) as transport:
+            with pytest.raises(TransientError, match="REQUEST_LIMIT_EXCEEDED") as failure:
+                await transport.call("resources/list")
+    assert failure.value.status == 403
+    assert app.state.requests == 3
+
+
+async def test_retries_back_off_exponentially(free_port, monkeypatch):
+    # Full jitter at its upper bound: 0.05 s, then 0.1 s
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: high)
+    app = build_app()
+    async with serve_app(app, port=free_port()) as url:
+        async with _transport(url, max_attempts=3, base_delay=0.05) as transport:
+            app.state.fail_next = 2
+            started = time.perf_counter()
+            await transport.call("tools/list")
+            assert time.perf_counter() - started >= 0.15
+
+
+def test_backoff_bounds():
+    caller = ResilientCaller(base_delay=0.1, max_delay=1.0)
+    for attempt in range(6):
+        for _ in range(50):
+            assert 0.0 <= caller.backoff(attempt) <= min(1.0, 0.1 * 2 ** attempt)
+    assert 0.5 <= caller.backoff(0, retry_after=0.5) <= 1.0
+    assert caller.backoff(0, retry_after=30) == 1.0
+
+
+async def test_non_idempotent_call_is_sent_once(free_port):
+    app = build_app()
+    async with serve_app(app, port=free_port()) as url:
+        async with _transport(url, max_attempts=3) as transport:
+            app.state.fail_next = 1
+            with pytest.raises(TransientError):
+                await transport.call("tools/call", {"name": "LeadTool", "arguments": {}})
+            assert transport.resilience.retries == 0
+    assert app.state.requests == 1
+
+
+async def test_stream_is_retried_before_its_first_item(free_port):
+    app = build_app()
+    async with serve_app(app, port=free_port()) as url:
+        async with _transport(url, max_attempts=3) as transport:
+            app.state.fail_next = 1
+            items = [item async for item in transport.stream_items("resources/read", {"uri": URI})]
+            assert len(items) == 10
+            assert transport.resilience.retries == 1
+    assert app.state.requests == 2
+
+
+async def test_hedged_request_wins_over_a_slow_one(free_port):
+    app = build_app(slow_latency=2.0)
+    async with serve_app(app, port=free_port()) as url:
+        async with _transport(url, hedge_delay=0.05) as transport:
+            app.state.slow_next = 1
+            started = time.perf_counter()
+            body = await transport.call("resources/read", {"uri": URI})
+            elapsed = time.perf_counter() - started
+            assert "result" in body
+            assert elapsed < 1.0
+            assert (transport.resilience.hedges, transport.resilience.hedge_wins) == (1, 1)
+
+            # A fast reply sends no hedge
+            await transport.call("resources/read", {"uri": URI})
+            assert transport.resilience.hedges == 1
+    assert app.state.requests == 3
+
+
+async def test_non_idempotent_call_is_not_hedged(free_port):
+    app = build_app(slow_latency=0.3)
+    async with serve_app(app, port=free_port()) as url:
+        async with _transport(url, hedge_delay=0.05) as transport:
+            app.state.slow_next = 1
+            await transport.call("tools/call", {"name": "LeadTool", "arguments": {}})
+            assert transport.resilience.hedges == 0
+    assert app.state.requests == 1
+
+
+async def test_breaker_opens_fails_fast_and_probes_when_half_open(free_port):
+    clock = FakeClock()
+    app = build_app(fail_rate=1.0)
+    async with serve_app(app, port=free_port()) as url:
+        async with _transport(url, max_attempts=1, failure_threshold=2, reset_timeout=10, clock=clock) as transport:
+            breaker = transport.resilience.breaker
+            for _ in range(2):
+                with pytest.raises(TransientError):
+                    await transport.call("tools/list")
+            assert breaker.state == "open"
+
+            # Open: fails fast without contacting the server
+            with pytest.raises(CircuitOpenError):
+                await transport.call("tools/list")
+            assert (app.state.requests, breaker.short_circuits) == (2, 1)
+
+            # Half-open after the reset timeout: the ping probe fails and the circuit opens again
+            clock.now += 10
+            with pytest.raises(CircuitOpenError, match="still unhealthy"):
+                await transport.call("tools/list")
+            assert breaker.state == "open"
+            assert app.state.requests == 3
+
+            # The server recovered: the probe succeeds, closes the circuit and the call goes through
+            app.state.fail_rate = 0.0
+            with pytest.raises(CircuitOpenError):
+                await transport.call("tools/list")
+            clock.now += 10
+            assert "result" in await transport.call("tools/list")
+            assert (breaker.state, breaker.failures, breaker.opens) == ("closed", 0, 2)
+    assert app.state.requests == 5
+
+
+async def test_client_retries_salesforce_request_limit(mcp_client_module, free_port):
+    app = build_app(fail_status=403)
+    async with serve_app(app, port=free_port()) as url:
+        client = mcp_client_module.MCPClient(url)
+        client.resilience.base_delay = 0.0
+        try:
+            await client.connect()
+            app.state.fail_next, app.state.requests = 2, 0
+            response = await client.send_request("resources/read", {"uri": URI})
+            assert len(response["result"]["contents"]) == 10
+            assert app.state.requests == 3
+
+            app.state.fail_next, app.state.requests = 1, 0
+            assert await client.send_request("tools/call", {"name": "LeadTool", "arguments": {}}) is None
+            assert app.state.requests == 1
+        finally:
+            await client.close()
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from mcp_common import ResourceCache
+
+pytestmark = pytest.mark.anyio
+
+URI = "@server://services"
+VALUE = {"result": {"contents": [{"uri": URI, "text": "catalog"}]}}
+
+
+def _wrap(items):
+    return {"result": {"contents": items}}
+
+
+def _unwrap(value):
+    return value["result"]["contents"]
+
+
+async def test_waiter_of_a_failed_stream_reads_again():
+    cache = ResourceCache(ttl=60)
+    started = asyncio.Event()
+
+    async def broken_stream():
+        yield {"uri": URI, "text": "partial"}
+        started.set()
+        await asyncio.sleep(0.01)
+        raise ConnectionError("stream cut")
+
+    async def read_stream():
+        return [item async for item in cache.stream_or_fetch(URI, broken_stream, _wrap, _unwrap)]
+
+    async def fetch():
+        return VALUE
+
+    leader = asyncio.create_task(read_stream())
+    await started.wait()
+    waiter = await cache.get_or_fetch(URI, fetch)
+    with pytest.raises(ConnectionError):
+        await leader
+    assert waiter == VALUE
+    assert cache.get(URI) == VALUE
+    assert (cache.misses, cache.coalesced) == (2, 1)
+
+
+async def test_waiters_do_not_share_an_uncacheable_reply():
+    cache = ResourceCache(ttl=60)
+    replies = [{"error": {"code": -32603, "message": "Internal error"}}, VALUE, VALUE]
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        reply = replies[calls - 1]
+        await asyncio.sleep(0.01)
+        return reply
+
+    async def stream():
+        for item in _unwrap(await fetch()):
+            yield item
+
+    async def read_stream():
+        return [item async for item in cache.stream_or_fetch(URI, stream, _wrap, _unwrap)]
+
+    cacheable = lambda reply: "error" not in reply  # noqa: E731
+    leader = asyncio.create_task(cache.get_or_fetch(URI, fetch, cacheable))
+    await asyncio.sleep(0)
+    waiter, items = await asyncio.gather(cache.get_or_fetch(URI, fetch, cacheable), read_stream())
+    assert "error" in await leader
+    assert waiter == VALUE
+    assert items == _unwrap(VALUE)
+    assert calls == 2
+
+
+async def test_cancelled_leader_lets_the_waiter_read():
+    cache = ResourceCache(ttl=60)
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def fetch():
+        return VALUE
+
+    leader = asyncio.create_task(cache.get_or_fetch(URI, slow))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_fetch(URI, fetch))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await waiter == VALUE
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+
+import httpx
+import pytest
+
+from mcp_common import MCPTransport, RequestScheduler, lane_for
+from mcp_common.scheduler import BACKGROUND, INTERACTIVE
+from stub_mcp_server import build_app, serve_app
+
+pytestmark = pytest.mark.anyio
+
+
+def _usage(used: int, allotment: int = 100) -> dict:
+    return {"Sforce-Limit-Info": f"api-usage={used}/{allotment}"}
+
+
+@pytest.mark.parametrize(
+    "request_, lane",
+    [
+        ("tools/list", BACKGROUND),
+        ("ping", BACKGROUND),
+        ({"jsonrpc": "2.0", "id": 1, "method": "resources/read"}, INTERACTIVE),
+        ("tools/call", INTERACTIVE),
+        ([{"method": "tools/list"}, {"method": "prompts/list"}], BACKGROUND),
+        ([{"method": "tools/list"}, {"method": "prompts/get"}], INTERACTIVE),
+    ],
+)
+def test_lane_for(request_, lane):
+    assert lane_for(request_) == lane
+
+
+@pytest.mark.parametrize(
+    "used, factor",
+    [(0, 1.0), (80, 1.0), (90, 0.5), (95, 0.25), (100, 0.1), (150, 0.1)],
+)
+def test_throttle_factor_follows_api_usage(used, factor):
+    scheduler = RequestScheduler(usage_threshold=0.8)
+    scheduler.observe(_usage(used))
+    assert scheduler.factor == pytest.approx(factor)
+    assert scheduler.api_usage == (used, 100)
+
+
+def test_observe_ignores_other_headers():
+    scheduler = RequestScheduler()
+    scheduler.observe(None)
+    scheduler.observe({})
+    scheduler.observe({"Sforce-Limit-Info": "per-app-api-usage=5/10(appName=demo)"})
+    assert (scheduler.factor, scheduler.api_usage) == (1.0, None)
+    scheduler.observe({"Sforce-Limit-Info": "per-app-api-usage=9/10(appName=demo); api-usage=25/15000"})
+    assert (scheduler.factor, scheduler.api_usage) == (1.0, (25, 15000))
+    # Response headers are matched case-insensitively
+    scheduler.observe(httpx.Headers({"sforce-limit-info": "api-usage=99/100"}))
+    assert scheduler.api_usage == (99, 100)
+
+
+def test_throttling_is_logged_and_lifted(caplog):
+    scheduler = RequestScheduler(usage_threshold=0.8)
+    with caplog.at_level(logging.INFO, logger="mcp_common.scheduler"):
+        scheduler.observe(_usage(90))
+        scheduler.observe(_usage(95))
+        scheduler.observe(_usage(10, 1000))
+    assert [record.levelname for record in caplog.records] == ["WARNING", "INFO"]
+    assert scheduler.factor == 1.0
+
+
+async def test_throttling_shrinks_the_in_flight_cap():
+    scheduler = RequestScheduler(rate=0, max_in_flight=10, usage_threshold=0.8)
+    scheduler.observe(_usage(90))
+    for _ in range(5):
+        await scheduler.acquire(INTERACTIVE)
+    waiter = asyncio.create_task(scheduler.acquire(INTERACTIVE))
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    assert scheduler.stats()["queued"] == {INTERACTIVE: 1, BACKGROUND: 0}
+
+    # Usage back under the threshold admits the waiter
+    scheduler.observe(_usage(100, 1000))
+    await asyncio.wait_for(waiter, 1)
+    assert scheduler.in_flight[INTERACTIVE] == 6
+
+
+async def test_throttled_background_requests_go_one_at_a_time():
+    scheduler = RequestScheduler(rate=0, max_in_flight=10, usage_threshold=0.8)
+    await scheduler.acquire(BACKGROUND)
+    await scheduler.acquire(BACKGROUND)
+    scheduler.observe(_usage(85))
+    waiter = asyncio.create_task(scheduler.acquire(BACKGROUND))
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    # Interactive requests still get through
+    await asyncio.wait_for(scheduler.acquire(INTERACTIVE), 1)
+
+    scheduler.release(BACKGROUND)
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    scheduler.release(BACKGROUND)
+    await asyncio.wait_for(waiter, 1)
+
+
+async def test_interactive_requests_are_admitted_first():
+    scheduler = RequestScheduler(rate=0, max_in_flight=1)
+    admitted = []
+
+    async def request(lane, name):
+        async with scheduler.slot(lane):
+            admitted.append(name)
+
+    await scheduler.acquire(INTERACTIVE)
+    tasks = [asyncio.create_task(request(BACKGROUND, "list-1"))]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(request(INTERACTIVE, "read")))
+    tasks.append(asyncio.create_task(request(BACKGROUND, "list-2")))
+    await asyncio.sleep(0.01)
+    assert admitted == []
+
+    scheduler.release(INTERACTIVE)
+    await asyncio.gather(*tasks)
+    assert admitted == ["read", "list-1", "list-2"]
+    assert scheduler.stats()["delayed"] == {INTERACTIVE: 1, BACKGROUND: 2}
+
+
+async def test_rate_limit_spaces_requests():
+    scheduler = RequestScheduler(rate=50, burst=1, max_in_flight=0)
+    started = time.perf_counter()
+    for _ in range(6):
+        async with scheduler.slot():
+            pass
+    # One token in the bucket, then one every 20 ms
+    assert time.perf_counter() - started >= 0.09
+    assert scheduler.admitted[INTERACTIVE] == 6
+
+
+async def test_cancelled_waiter_gives_its_place_up():
+    scheduler = RequestScheduler(rate=0, max_in_flight=1)
+    await scheduler.acquire(INTERACTIVE)
+    cancelled = asyncio.create_task(scheduler.acquire(INTERACTIVE))
+    waiter = asyncio.create_task(scheduler.acquire(BACKGROUND))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+    scheduler.release(INTERACTIVE)
+    await asyncio.wait_for(waiter, 1)
+    assert scheduler.in_flight == {INTERACTIVE: 0, BACKGROUND: 1}
+
+
+async def test_transport_feeds_the_response_headers(free_port):
+    app = build_app(api_limit=100, api_used=89)
+    scheduler = RequestScheduler(usage_threshold=0.8)
+    async with serve_app(app, port=free_port()) as url:
+        async with MCPTransport(url, scheduler=scheduler) as transport:
+            await transport.call("tools/list")
+            assert scheduler.api_usage == (90, 100)
+            assert scheduler.factor == pytest.approx(0.5)
+            items = [item async for item in transport.stream_items("resources/read", {"uri": "@server://services"})]
+            assert len(items) == 10
+    assert scheduler.api_usage == (91, 100)
+    assert scheduler.in_flight == {INTERACTIVE: 0, BACKGROUND: 0}
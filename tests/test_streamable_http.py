@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+import pytest
+
+from mcp_common import StreamableHTTPTransport
+from stub_mcp_server import _catalog_contents
+from stub_streamable_server import build_app, serve_app
+
+pytestmark = pytest.mark.anyio
+
+URI = "@server://services"
+
+
+async def _until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+async def test_session_negotiation_and_delete(free_port):
+    app = build_app()
+    async with serve_app(app, port=free_port()) as url:
+        transport = StreamableHTTPTransport(url, listen=False)
+        info = await transport.initialize()
+        assert info["name"] == "stub-streamable-mcp"
+        assert transport.protocol_version == "2025-06-18"
+        assert app.state.sessions == {transport.session_id}
+
+        body = await transport.call("tools/list")
+        assert body["result"]["tools"][0]["name"] == "LeadTool"
+
+        await transport.aclose()
+        assert app.state.sessions == set()
+
+
+async def test_sse_reply_is_parsed_incrementally(free_port):
+    app = build_app(items=40, chunk_size=32, chunk_delay=0.005)
+    async with serve_app(app, port=free_port()) as url:
+        async with StreamableHTTPTransport(url, listen=False) as transport:
+            started = time.perf_counter()
+            items, arrivals = [], []
+            async for item in transport.stream_items("resources/read", {"uri": URI}):
+                items.append(item)
+                arrivals.append(time.perf_counter() - started)
+    assert items == _catalog_contents(URI, 40)
+    # The first content is yielded long before the last chunk of the event arrives
+    assert arrivals[0] < arrivals[-1] / 2
+
+
+async def test_progress_notifications_reach_on_message(free_port):
+    received = []
+    app = build_app()
+    async with serve_app(app, port=free_port()) as url:
+        async with StreamableHTTPTransport(url, on_message=received.append, listen=False) as transport:
+            body = await transport.call("resources/read", {"uri": URI, "_meta": {"progressToken": "read-1"}})
+    assert len(body["result"]["contents"]) == 10
+    assert [message["method"] for message in received] == ["notifications/progress"]
+    assert received[0]["params"]["progressToken"] == "read-1"
+
+
+async def test_dropped_streams_are_resumed_with_last_event_id(free_port):
+    app = build_app(items=25, chunk_size=64, drop_rate=1.0)
+    async with serve_app(app, port=free_port()) as url:
+        async with StreamableHTTPTransport(url, listen=False) as transport:
+            body = await transport.call("resources/read", {"uri": URI})
+            assert body["result"]["contents"] == _catalog_contents(URI, 25)
+            assert (transport.resumptions, app.state.resumed) == (1, 1)
+
+            items = [item async for item in transport.stream_items("resources/read", {"uri": URI})]
+            # Items already yielded before the cut are not yielded again
+            assert items == _catalog_contents(URI, 25)
+            assert (transport.resumptions, app.state.resumed) == (2, 2)
+    assert app.state.dropped == 2
+
+
+async def test_expired_session_is_renewed_on_404(free_port):
+    app = build_app()
+    async with serve_app(app, port=free_port()) as url:
+        async with StreamableHTTPTransport(url, listen=False) as transport:
+            await transport.initialize()
+            first = transport.session_id
+            app.state.sessions.clear()
+
+            body = await transport.call("resources/list")
+            assert body["result"]["resources"][0]["name"] == "product-catalog"
+            assert transport.session_id not in (None, first)
+            assert app.state.sessions == {transport.session_id}
+
+
+async def test_listener_delivers_pushed_notifications(free_port):
+    received = []
+    app = build_app(list_changed_every=0.05)
+    async with serve_app(app, port=free_port()) as url:
+        async with StreamableHTTPTransport(url, on_message=received.append, listen=True) as transport:
+            await transport.initialize()
+            await _until(lambda: len(received) >= 2)
+    assert {message["method"] for message in received} == {"notifications/resources/list_changed"}
+
+
+async def test_listener_stops_when_the_server_has_no_event_stream(free_port):
+    app = build_app(listen=False)
+    async with serve_app(app, port=free_port()) as url:
+        async with StreamableHTTPTransport(url, listen=True) as transport:
+            await transport.initialize()
+            await _until(lambda: transport._listener.done())
+            assert (await transport.call("ping"))["result"] == {}
+
+
+async def test_client_cache_is_invalidated_by_pushed_list_changed(mcp_client_module, free_port, monkeypatch):
+    monkeypatch.setenv("MCP_TRANSPORT", "streamable-http")
+    app = build_app(drop_rate=1.0, list_changed_every=0.2)
+    async with serve_app(app, port=free_port()) as url:
+        client = mcp_client_module.MCPClient(url)
+        try:
+            await client.connect()
+            assert client.session is None
+            assert [resource["name"] for resource in client.resources] == ["product-catalog"]
+            assert client.capability_cache.get("resources") is not None
+            assert client.streamable.resumptions == 3  # every discovery reply was cut
+
+            await _until(lambda: client.capability_cache.get("resources") is None)
+            assert client.capability_cache.get("tools") is not None
+        finally:
+            await client.close()
+    assert app.state.sessions == set()
+
+
+async def test_client_survives_a_failed_initialize(mcp_client_module, free_port, monkeypatch):
+    monkeypatch.setenv("MCP_TRANSPORT", "streamable-http")
+    app = build_app(rpc_errors={"initialize": 1}, listen=False)
+    async with serve_app(app, port=free_port()) as url:
+        client = mcp_client_module.MCPClient(url)
+        try:
+            assert await client.send_request("tools/call", {"name": "LeadTool", "arguments": {}}) is None
+            # The next request opens the session
+            response = await client.send_request("tools/call", {"name": "LeadTool", "arguments": {}})
+            assert response["result"]["content"][0]["text"] == "Called LeadTool"
+        finally:
+            await client.close()
@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+
+from mcp_common import MCPTransport, RequestScheduler
+from mcp_common.streaming import JSONArrayStreamParser, SSEParser
+from stub_mcp_server import build_app, serve_app
+
+ITEMS = [
+    {"uri": "@server://a", "text": 'quote " and backslash \\ and slash /'},
+    {"uri": "@server://b", "text": "brackets ] [ } { , : inside a string"},
+    {"uri": "@server://c", "text": "unicode é ✓   and escapes \n\t\\\"", "nested": {"list": [1, [2, {"x": "]"}]]}},
+    {"uri": "@server://d", "text": "\\"},
+]
+BODY = json.dumps({
+    "jsonrpc": "2.0",
+    "id": 1,
+    "result": {"note": "a \"contents\" key ] inside a string", "contents": ITEMS, "after": [{"not": "an item"}]},
+}, indent=2)
+
+
+def _feed_all(chunks, path=("result", "contents")):
+    parser = JSONArrayStreamParser(path)
+    items = [item for chunk in chunks for item in parser.feed(chunk)]
+    return parser, items
+
+
+def test_one_chunk():
+    parser, items = _feed_all([BODY])
+    assert items == ITEMS
+    assert parser.found and parser.done
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_fixed_size_chunks(size):
+    _, items = _feed_all([BODY[i:i + size] for i in range(0, len(BODY), size)])
+    assert items == ITEMS
+
+
+def test_every_split_point():
+    # Splits land inside strings, on a backslash and between an escape and its character
+    for split in range(1, len(BODY)):
+        _, items = _feed_all([BODY[:split], BODY[split:]])
+        assert items == ITEMS, f"split at {split}: {BODY[split - 5:split]!r} | {BODY[split:split + 5]!r}"
+
+
+def test_items_are_yielded_as_they_complete():
+    parser = JSONArrayStreamParser()
+    first_end = BODY.index('"@server://b"')
+    assert parser.feed(BODY[:first_end]) == ITEMS[:1]
+    assert parser.found and not parser.done
+
+
+def test_reply_without_the_array():
+    parser, items = _feed_all([json.dumps({"jsonrpc": "2.0", "id": 1, "error": {"code": -32602, "message": "bad"}})])
+    assert items == [] and not parser.found
+
+
+def test_sse_events_split_across_chunks():
+    stream = 'id: 1\nevent: message\ndata: {"a":\ndata: 1}\n\n: comment\nid: 2\ndata: {"b": 2}\r\n\r\n'
+    for split in range(1, len(stream)):
+        parser = SSEParser()
+        events = parser.feed(stream[:split]) + parser.feed(stream[split:])
+        assert [json.loads(event["data"]) for event in events] == [{"a": 1}, {"b": 2}]
+        assert parser.last_event_id == "2"
+
+
+@pytest.mark.anyio
+async def test_slow_stream_consumer_does_not_hold_a_scheduler_slot(free_port):
+    scheduler = RequestScheduler(rate=0, max_in_flight=1)
+    async with serve_app(build_app(items=50), port=free_port()) as url:
+        async with MCPTransport(url, scheduler=scheduler) as transport:
+            stream = transport.stream_items("resources/read", {"uri": "@server://services"})
+            first = await stream.__anext__()
+            # The consumer pauses after the first item; another read is still admitted
+            other = await asyncio.wait_for(transport.call("resources/read", {"uri": "@server://services"}), 2)
+            rest = [item async for item in stream]
+    assert [first, *rest] == other["result"]["contents"]
+    assert sum(scheduler.in_flight.values()) == 0
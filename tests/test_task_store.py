@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from a2a.types import Task, TaskState, TaskStatus
+
+from task_store import SQLiteTaskStore, create_task_store
+
+pytestmark = pytest.mark.anyio
+
+
+def _task(task_id: str, state: TaskState, context_id: str = "context-1") -> Task:
+    return Task(id=task_id, context_id=context_id, status=TaskStatus(state=state))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "tasks.db")
+
+
+async def test_save_get_round_trip(path):
+    store = SQLiteTaskStore(path)
+    try:
+        task = _task("task-1", TaskState.working)
+        await store.save(task)
+        assert await store.get("task-1") == task
+        assert await store.get("missing") is None
+
+        await store.save(_task("task-2", TaskState.submitted))
+        assert [t.id for t in await store.list_by_context("context-1")] == ["task-1", "task-2"]
+
+        await store.delete("task-1")
+        assert await store.get("task-1") is None
+    finally:
+        await store.aclose()
+
+
+async def test_other_store_on_the_same_file_sees_writes(path):
+    writer, reader = SQLiteTaskStore(path), SQLiteTaskStore(path)
+    try:
+        for state in (TaskState.submitted, TaskState.working, TaskState.completed):
+            await writer.save(_task("task-1", state))
+            assert (await reader.get("task-1")).status.state == state
+    finally:
+        await writer.aclose()
+        await reader.aclose()
+
+
+async def test_buffered_store_writes_new_and_final_tasks_at_once(path):
+    writer = SQLiteTaskStore(path, flush_interval=60)
+    reader = SQLiteTaskStore(path)
+    try:
+        await writer.save(_task("task-1", TaskState.submitted))
+        assert (await reader.get("task-1")).status.state == TaskState.submitted
+
+        # Intermediate states wait for the next flush
+        await writer.save(_task("task-1", TaskState.working))
+        assert (await writer.get("task-1")).status.state == TaskState.working
+        assert (await reader.get("task-1")).status.state == TaskState.submitted
+
+        await writer.save(_task("task-1", TaskState.canceled))
+        assert (await reader.get("task-1")).status.state == TaskState.canceled
+    finally:
+        await writer.aclose()
+        await reader.aclose()
+
+
+async def test_finished_tasks_are_compacted_after_the_ttl(path):
+    store = SQLiteTaskStore(path, ttl=0.05)
+    try:
+        await store.save(_task("done", TaskState.completed))
+        await store.save(_task("failed", TaskState.failed))
+        await store.save(_task("running", TaskState.working))
+        assert await store.compact() == 0
+
+        await asyncio.sleep(0.1)
+        assert await store.compact() == 2
+        assert await store.get("done") is None
+        assert await store.get("running") is not None
+    finally:
+        await store.aclose()
+
+
+def test_create_task_store(path):
+    assert isinstance(create_task_store(f"sqlite:///{path}"), SQLiteTaskStore)
+    assert not isinstance(create_task_store("memory"), SQLiteTaskStore)
+    with pytest.raises(ValueError, match="Unsupported A2A_TASK_STORE"):
+        create_task_store("postgres://db")